@@ -0,0 +1,219 @@
+"""
+Columnar assembly of many parsed banks of one type.
+
+`BankReader.parse_many` feeds the raw (NumPy) output of each bank to a
+`ColumnAssembler`. Every field is appended straight into growing NumPy
+buffers: values for scalars and fixed-shape arrays, and content plus one
+offsets buffer per list level for variable-length fields. The result is a
+single Awkward RecordArray with one record per bank. Its type comes from the
+buffers, so it is not re-inferred from Python objects.
+"""
+
+from __future__ import annotations
+
+import math
+
+import awkward as ak
+import numpy as np
+
+from dst_awkward.jagged import JaggedBuffers
+
+
+class GrowableArray:
+    """Preallocated NumPy buffer that doubles its capacity as rows are appended."""
+
+    def __init__(self, dtype, item_shape=(), capacity=1024):
+        self.data = np.empty((max(capacity, 1),) + tuple(item_shape), dtype=dtype)
+        self.size = 0
+
+    def _reserve(self, need):
+        if need > len(self.data):
+            grown = np.empty((max(need, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[: self.size] = self.data[: self.size]
+            self.data = grown
+
+    def append(self, value):
+        self._reserve(self.size + 1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        need = self.size + len(values)
+        self._reserve(need)
+        self.data[self.size : need] = values
+        self.size = need
+
+    def array(self):
+        return self.data[: self.size]
+
+
+class _ScalarColumn:
+    def __init__(self, value, capacity):
+        self.dtype = value.dtype
+        self.values = GrowableArray(self.dtype, capacity=capacity)
+
+    def accepts(self, value):
+        return isinstance(value, np.generic) and value.dtype == self.dtype
+
+    def append(self, value):
+        self.values.append(value)
+
+    def layout(self):
+        return ak.contents.NumpyArray(self.values.array())
+
+
+class _RegularColumn:
+    """Arrays of the same shape in every bank."""
+
+    def __init__(self, value, capacity):
+        self.shape = value.shape
+        self.values = GrowableArray(value.dtype, value.shape, capacity=capacity)
+
+    def accepts(self, value):
+        return (isinstance(value, np.ndarray) and value.shape == self.shape
+                and value.dtype == self.values.data.dtype)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def layout(self):
+        return ak.contents.NumpyArray(self.values.array())
+
+
+class _JaggedColumn:
+    """Variable-length values: an offsets buffer per list level plus content."""
+
+    def __init__(self, value, capacity):
+        self.depth = len(value.offsets)
+        self.dtype = value.content.dtype
+        self.item_shape = value.content.shape[1:]
+        self.outer = GrowableArray(np.int64, capacity=capacity + 1)
+        self.outer.append(0)
+        self.levels = []
+        for _ in range(self.depth):
+            level = GrowableArray(np.int64, capacity=capacity + 1)
+            level.append(0)
+            self.levels.append(level)
+        self.content = GrowableArray(self.dtype, self.item_shape, capacity=capacity)
+
+    def accepts(self, value):
+        return (isinstance(value, JaggedBuffers) and len(value.offsets) == self.depth
+                and value.content.dtype == self.dtype and value.content.shape[1:] == self.item_shape)
+
+    def append(self, value):
+        self.outer.append(self.outer.data[self.outer.size - 1] + len(value))
+        for level, offsets in zip(self.levels, value.offsets):
+            level.extend(offsets[1:] + level.data[level.size - 1])
+        self.content.extend(value.content)
+
+    def layout(self):
+        return JaggedBuffers(
+            (self.outer.array(), *(level.array() for level in self.levels)),
+            self.content.array(),
+        ).to_layout()
+
+
+class _ObjectColumn:
+    """Fallback for values without a NumPy form (e.g. Python lists with None)."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def accepts(self, value):
+        return True
+
+    def append(self, value):
+        self.values.append(_to_python(value))
+
+    def layout(self):
+        return ak.from_iter(self.values, highlevel=False)
+
+
+def _to_python(value):
+    if isinstance(value, (ak.Array, ak.Record)):
+        return value.to_list()
+    if isinstance(value, JaggedBuffers):
+        return value.to_awkward().to_list()
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+def as_jagged(value: np.ndarray, template) -> JaggedBuffers:
+    """
+    View an array whose leading dims vary between banks (None in `template`)
+    as JaggedBuffers. Dims after the last varying one stay in the content shape.
+    """
+    var = max(i for i, d in enumerate(template) if d is None) + 1
+    dims = value.shape
+    offsets = []
+    outer = 1
+    for j in range(1, var):
+        outer *= dims[j - 1]
+        offsets.append(np.arange(outer + 1, dtype=np.int64) * dims[j])
+    n = math.prod(dims[:var])
+    return JaggedBuffers(tuple(offsets), value.reshape((n,) + dims[var:]))
+
+
+class ColumnAssembler:
+    """
+    Collects the raw parse results of many banks into one RecordArray.
+
+    Args:
+        n_banks: Expected number of banks (buffers are sized for it).
+        templates: Field name -> output shape with None for varying dims
+            (ReadPlan.templates). Arrays of fields without a template are
+            treated as varying in every dim.
+    """
+
+    def __init__(self, n_banks=0, templates=None):
+        self.capacity = max(n_banks, 1)
+        self.templates = templates or {}
+        self.fields = None
+        self.columns = {}
+        self.length = 0
+
+    def _normalize(self, name, value):
+        """Turn arrays with bank-dependent shapes into JaggedBuffers."""
+        if isinstance(value, np.ndarray) and value.ndim > 0:
+            template = self.templates.get(name, (None,) * value.ndim)
+            if len(template) == value.ndim and None in template:
+                return as_jagged(value, template)
+        return value
+
+    def _new_column(self, value):
+        if isinstance(value, np.generic):
+            return _ScalarColumn(value, self.capacity)
+        if isinstance(value, np.ndarray):
+            return _RegularColumn(value, self.capacity)
+        if isinstance(value, JaggedBuffers):
+            return _JaggedColumn(value, self.capacity)
+        return _ObjectColumn([])
+
+    def append(self, results: dict) -> None:
+        if self.fields is None:
+            self.fields = list(results)
+        elif len(results) != len(self.fields) or any(f not in results for f in self.fields):
+            raise ValueError("banks in one batch must produce the same fields")
+
+        for name in self.fields:
+            value = self._normalize(name, results[name])
+            column = self.columns.get(name)
+            if column is None:
+                column = self._new_column(value)
+                self.columns[name] = column
+            elif not column.accepts(value):
+                # Shape or type changed between banks: fall back to Python objects
+                column = _ObjectColumn(ak.to_list(ak.Array(column.layout())))
+                self.columns[name] = column
+            column.append(value)
+        self.length += 1
+
+    def to_awkward(self) -> ak.Array:
+        if not self.fields:
+            return ak.Array(ak.contents.RecordArray([], [], length=self.length))
+        return ak.Array(ak.contents.RecordArray(
+            [self.columns[name].layout() for name in self.fields],
+            self.fields,
+            length=self.length,
+        ))
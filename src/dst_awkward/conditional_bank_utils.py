@@ -3,19 +3,24 @@ Shared utilities for parsing mask-gated conditional DST banks.
 
 Banks like PRFC and HCBIN use bitmasks to indicate which of 16 "fits" are present,
 with conditional sections that may or may not be present based on mask bits and
-field values (like failmode checks).
+field values (like failmode checks). `BankReader` reads them through the
+`gated_sequence` layout of their schemas (see schema_compiler.GatedOp).
 
 This module provides common helpers:
 - BufferReader: Stateful binary reader with cursor tracking
 - decode_mask_msb_first: Decode packed bitmasks using MSB-first ordering
 - fit_list, fit_empty_arrays, fit_zeros: Per-fit storage initialization
+- dense_fits: Dense 16-fit view of the sparse layout (`fit_index` plus the
+  present fits only)
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+import awkward as ak
 import numpy as np
 
 MAXFIT = 16  # Maximum number of fits in PRFC/HCBIN banks
@@ -52,9 +57,19 @@ def fit_list(default: Any = None) -> list[Any]:
     return [default] * MAXFIT
 
 
+@lru_cache(maxsize=None)
+def _empty_array(dtype: np.dtype) -> np.ndarray:
+    empty = np.empty(0, dtype=dtype)
+    empty.flags.writeable = False
+    return empty
+
+
 def fit_empty_arrays(dtype: np.dtype) -> list[np.ndarray]:
-    """Create a list of MAXFIT empty arrays with the given dtype."""
-    return [np.empty(0, dtype=dtype) for _ in range(MAXFIT)]
+    """
+    Create a list of MAXFIT empty arrays with the given dtype. The slots
+    share one read-only empty array (like the arrays read from a buffer).
+    """
+    return [_empty_array(np.dtype(dtype))] * MAXFIT
 
 
 def fit_zeros() -> list[int]:
@@ -62,6 +77,67 @@ def fit_zeros() -> list[int]:
     return [0] * MAXFIT
 
 
+def _fit_sequence(value: Any, length: int) -> bool:
+    """True for a list or (non-scalar) array of `length` entries, one per fit."""
+    if isinstance(value, (np.ndarray, ak.Array)):
+        return value.ndim > 0 and len(value) == length
+    return isinstance(value, list) and len(value) == length
+
+
+def dense_fits(data):
+    """
+    Dense 16-fit view of sparse conditional-bank data (`BankReader(name,
+    sparse_fits=True)`).
+
+    `data` is one bank (a dict, e.g. from `parse_buffer` or `ak.to_list`) or
+    an Awkward array of banks (e.g. `events["prfc"]`, which may hold None
+    for events without the bank). Each per-fit field becomes 16 entries, None
+    for the fits not present; `fit_index` is dropped. Data without
+    `fit_index` is returned unchanged.
+    """
+    if isinstance(data, dict):
+        if "fit_index" not in data:
+            return data
+        fit_index = [int(i) for i in data["fit_index"]]
+        out = {}
+        for name, value in data.items():
+            if name == "fit_index":
+                continue
+            if _fit_sequence(value, len(fit_index)):
+                dense = [None] * MAXFIT
+                for j, i in enumerate(fit_index):
+                    dense[i] = value[j]
+                value = dense
+            out[name] = value
+        return out
+
+    if "fit_index" not in ak.fields(data):
+        return data
+    fit_index = data["fit_index"]
+    counts = ak.to_numpy(ak.fill_none(ak.num(fit_index, axis=1), 0))
+    flat = ak.to_numpy(ak.flatten(fit_index, axis=None)).astype(np.int64)
+
+    # Position of (bank, fit) in the flattened per-fit values, -1 if absent
+    bank = np.repeat(np.arange(len(counts)), counts)
+    index = np.full(len(counts) * MAXFIT, -1, dtype=np.int64)
+    index[bank * MAXFIT + flat] = np.arange(len(flat))
+
+    columns = {}
+    for name in ak.fields(data):
+        if name == "fit_index":
+            continue
+        value = data[name]
+        if value.ndim > 1:
+            content = ak.flatten(value, axis=1).layout
+            value = ak.Array(ak.contents.RegularArray(
+                ak.contents.IndexedOptionArray.simplified(ak.index.Index64(index), content), MAXFIT))
+        columns[name] = value
+    dense = ak.zip(columns, depth_limit=1)
+    if data.layout.is_option:
+        dense = ak.mask(dense, ~ak.is_none(fit_index))
+    return dense
+
+
 class BufferReader:
     """
     Stateful binary buffer reader with cursor tracking.
@@ -103,6 +179,12 @@ class BufferReader:
         self.cursor += int(n * dtype.itemsize)
         return a
 
+    def skip(self, nbytes: int) -> None:
+        """Advance the cursor by nbytes, which must lie within the buffer."""
+        if self.cursor + nbytes > len(self.buffer):
+            raise ValueError("buffer is smaller than requested size")
+        self.cursor += int(nbytes)
+
     # Convenience methods for common types
     def read_i1(self) -> int:
         """Read a single int8."""
@@ -0,0 +1,144 @@
+"""
+Event selection cuts on bank fields.
+
+A cut such as ``rusdraw.nofwf >= 5`` or ``rufldf.energy[0] > 1e19`` is
+tested as soon as its bank is read. When the field sits at a fixed position
+in the bank (one of the leading fixed-size fields, see
+`schema_compiler.leading_fields`) only that value is decoded, straight from
+the raw bytes; otherwise the bank is parsed and the cut is applied to the
+parsed field. `DSTProcessor` drops an event as soon as one of its cuts
+fails and skips the rest of that event's banks without decoding them.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+import awkward as ak
+import numpy as np
+
+from dst_awkward.schema_compiler import layout_names, leading_fields
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_CUT_RE = re.compile(
+    r"^\s*(?P<bank>\w+)\.(?P<field>\w+)\s*(?:\[\s*(?P<index>\d+)\s*\])?\s*"
+    r"(?P<op>==|!=|>=|<=|>|<)\s*(?P<value>\S+)\s*$"
+)
+
+
+@dataclass(frozen=True)
+class Cut:
+    """
+    `bank.field[index] op value`. `index` picks one element of an array
+    field (flattened, C order) and must be None for scalar fields.
+    """
+
+    bank: str
+    field: str
+    op: str
+    value: float
+    index: int | None = None
+
+    @classmethod
+    def parse(cls, text: str) -> Cut:
+        """Parse a cut such as ``"rusdraw.nofwf >= 5"`` or ``"rufldf.energy[0] > 1e19"``."""
+        m = _CUT_RE.match(text)
+        if m is None:
+            raise ValueError(f"cannot parse cut {text!r} (expected bank.field[index] op value)")
+        value = m["value"]
+        try:
+            value = int(value)
+        except ValueError:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"cut {text!r}: {value!r} is not a number") from None
+        index = int(m["index"]) if m["index"] is not None else None
+        return cls(m["bank"], m["field"], m["op"], value, index)
+
+    def __str__(self) -> str:
+        index = f"[{self.index}]" if self.index is not None else ""
+        return f"{self.bank}.{self.field}{index} {self.op} {self.value}"
+
+    def test(self, value) -> bool:
+        """Apply the cut to a field value (a scalar, or an array with `index`)."""
+        if isinstance(value, ak.Array):
+            value = ak.to_numpy(ak.flatten(value, axis=None))
+        if self.index is not None:
+            flat = np.ravel(value)
+            if self.index >= len(flat):
+                return False
+            value = flat[self.index]
+        elif np.ndim(value) != 0:
+            raise ValueError(f"cut {self}: {self.field} is an array; give an index")
+        return bool(OPERATORS[self.op](value, self.value))
+
+
+class BankCuts:
+    """
+    The cuts on one bank type, prepared for a reader.
+
+    `raw` holds the cuts on fields at a fixed position, as (cut, offset,
+    dtype) for the value read directly from the bank bytes. `parsed` holds the
+    rest, tested on the output of `reader.parse_buffer`.
+    """
+
+    def __init__(self, reader, cuts):
+        self.raw = []
+        self.parsed = []
+        layout = reader.schema.get("layout", [])
+        leading = leading_fields(reader.schema, reader.dtypes)
+        # A repeated name is output from its last occurrence; only read
+        # fields directly when there is just one
+        occurrences = Counter(fld["name"] for fld in layout if "name" in fld)
+        occurrences.update(item["name"] for fld in layout for item in fld.get("items", ()))
+
+        for cut in cuts:
+            if cut.field in leading and occurrences[cut.field] == 1:
+                offset, dtype, shape = leading[cut.field]
+                count = int(np.prod(shape, dtype=np.int64))
+                if shape and cut.index is None:
+                    raise ValueError(f"cut {cut}: {cut.field} is an array; give an index")
+                if not shape and cut.index is not None:
+                    raise ValueError(f"cut {cut}: {cut.field} is a scalar")
+                if cut.index is not None:
+                    if cut.index >= count:
+                        raise ValueError(f"cut {cut}: index out of range for shape {list(shape)}")
+                    offset += cut.index * dtype.itemsize
+                self.raw.append((cut, offset, dtype))
+                continue
+
+            known = cut.field in layout_names(layout) or (reader.sparse_fits and cut.field == "fit_index")
+            if not known:
+                raise ValueError(f"cut {cut}: {reader.bank_name} has no field {cut.field!r}")
+            if reader.fields is not None and cut.field not in reader.fields:
+                raise ValueError(f"cut {cut}: {cut.field} is not among the fields read from {reader.bank_name}")
+            self.parsed.append(cut)
+
+    def test_raw(self, raw_bytes) -> bool:
+        """Cuts on fixed-position fields; banks too short to hold a field fail."""
+        for cut, offset, dtype in self.raw:
+            if offset + dtype.itemsize > len(raw_bytes):
+                return False
+            value = np.frombuffer(raw_bytes, dtype=dtype, count=1, offset=offset)[0]
+            if not OPERATORS[cut.op](value, cut.value):
+                return False
+        return True
+
+    def test_parsed(self, data: dict) -> bool:
+        """Cuts on parsed fields; a missing field fails."""
+        for cut in self.parsed:
+            if cut.field not in data or not cut.test(data[cut.field]):
+                return False
+        return True
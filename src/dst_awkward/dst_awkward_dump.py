@@ -2,6 +2,7 @@
 import sys
 import os
 import awkward as ak
+from dst_awkward.conditional_bank_utils import dense_fits
 from dst_awkward.dump import get_dump
 
 def main():
@@ -123,6 +124,10 @@ def process_file(fpath, want_banks, dump_all, all_mode_long, skip_events):
             if bank_data is None:
                 continue
 
+            # 16-fit banks written with --sparse-fits: formatters expect 16 slots
+            if "fit_index" in bank_data.fields:
+                bank_data = dense_fits(bank_data.to_list())
+
             # Dispatch
             try:
                 dump_func = get_dump(name)
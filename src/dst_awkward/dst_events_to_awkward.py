@@ -3,31 +3,98 @@ import numpy as np
 import os
 import time
 import argparse
-import glob
-import yaml
+from collections.abc import MutableMapping
 from pathlib import Path
+from dst_awkward.cuts import BankCuts, Cut
 from dst_awkward.dst_io import DSTFile
 from dst_awkward.dst_reader import BankReader
+from dst_awkward.schema_bundle import SCHEMAS_DIR, load_bundle
 
 # --- Constants ---
 # Hardcoded Marker IDs (no schema needed)
 START_BANKID = 1400000023
 STOP_BANKID  = 1400000101
 
+class LazyReaders(MutableMapping):
+    """
+    bank_id -> BankReader, with each reader built on first lookup.
+
+    Registered bank IDs are keys from the start, so membership tests and
+    iteration do not build any reader.
+
+    Args:
+        fields: Bank name -> fields to read (see BankReader); banks not
+            listed are read in full.
+        sparse_fits: Read the 16-fit banks in the sparse layout (see BankReader).
+    """
+
+    def __init__(self, fields=None, sparse_fits=False):
+        self._names = {}    # bank_id -> bank name, reader not built yet
+        self._readers = {}  # bank_id -> BankReader (or None for markers)
+        self.fields = fields or {}
+        self.sparse_fits = sparse_fits
+
+    def register(self, bank_id, bank_name):
+        self._readers.pop(bank_id, None)
+        self._names[bank_id] = bank_name
+
+    def __getitem__(self, bank_id):
+        try:
+            return self._readers[bank_id]
+        except KeyError:
+            name = self._names[bank_id]
+            reader = BankReader(name, fields=self.fields.get(name), sparse_fits=self.sparse_fits)
+        del self._names[bank_id]
+        self._readers[bank_id] = reader
+        return reader
+
+    def __setitem__(self, bank_id, reader):
+        self._names.pop(bank_id, None)
+        self._readers[bank_id] = reader
+
+    def __delitem__(self, bank_id):
+        if bank_id in self._names:
+            del self._names[bank_id]
+        else:
+            del self._readers[bank_id]
+
+    def __iter__(self):
+        # Snapshot: looking up values while iterating builds readers
+        return iter([*self._readers, *self._names])
+
+    def __len__(self):
+        return len(self._readers) + len(self._names)
+
+    def __contains__(self, bank_id):
+        return bank_id in self._readers or bank_id in self._names
+
+
 class DSTProcessor:
-    def __init__(self, get_banks=None, all_banks=True, verbose=True):
+    def __init__(self, get_banks=None, all_banks=True, verbose=True, fields=None, cuts=None,
+                 sparse_fits=False):
         """
         Args:
             get_banks (list): List of bank names (strings) to retrieve.
             all_banks (bool): If True, ignores get_banks and retrieves all known schemas.
             verbose (bool): Print setup info.
+            fields (dict): Bank name -> list of fields to read from that bank.
+                Other fields are skipped without being decoded. Banks not
+                listed are read in full.
+            cuts (list): Event selection, as `cuts.Cut` objects or strings
+                such as "rusdraw.nofwf >= 5". An event is kept only if it
+                has every cut bank and passes every cut; once a cut fails,
+                the rest of the event's banks are skipped undecoded.
+            sparse_fits (bool): Store PRFC, HCBIN and HCTIM in the sparse
+                layout: a `fit_index` column plus only the fits present,
+                instead of 16 slots per bank. `conditional_bank_utils.dense_fits`
+                gives the dense view back.
         """
         self.verbose = verbose
         self.all_banks = all_banks
         # Convert get_banks to a set for faster lookup
         self.get_banks = set(get_banks) if get_banks else set()
         
-        self.readers = {}     # Map: bank_id -> BankReader object
+        self.readers = LazyReaders(fields, sparse_fits)  # Map: bank_id -> BankReader object
         self.bank_names = {}  # Map: bank_id -> bank_name (str)
         self.got_banks = set() # Track what we actually find in the file
 
@@ -38,46 +105,50 @@ class DSTProcessor:
         self._register_marker(START_BANKID, "start")
         self._register_marker(STOP_BANKID, "stop")
 
+        # 3. Build projected readers now, so that unknown field names fail here
+        for bank_id, name in self.bank_names.items():
+            if name in self.readers.fields:
+                self.readers[bank_id]
+
+        # 4. Event selection: bank_id -> BankCuts
+        self.cuts = {}
+        by_bank = {}
+        for cut in cuts or ():
+            cut = Cut.parse(cut) if isinstance(cut, str) else cut
+            by_bank.setdefault(cut.bank, []).append(cut)
+        bank_ids = {name: bank_id for bank_id, name in self.bank_names.items()}
+        for bank, bank_cuts in by_bank.items():
+            bank_id = bank_ids.get(bank)
+            if bank_id is None or self.readers[bank_id] is None:
+                raise ValueError(f"cut on bank {bank!r}, which is not read")
+            self.cuts[bank_id] = BankCuts(self.readers[bank_id], bank_cuts)
+
     def _discover_schemas(self):
-        """Scans the 'schemas' subdirectory for YAML schema files."""
-        current_dir = Path(__file__).parent
-        schemas_dir = current_dir / "schemas"
-        
+        """Registers every bank in the schema bundle (see schema_bundle)."""
         if self.verbose:
-            print(f"Searching for schemas in: {schemas_dir}")
+            print(f"Searching for schemas in: {SCHEMAS_DIR}")
 
-        # Look for both .yml and .yaml
-        schema_files = list(schemas_dir.glob("*.yml")) + list(schemas_dir.glob("*.yaml"))
-        
-        for schema_path in schema_files:
-            try:
-                stem_name = schema_path.stem
-                
-                # Filter: If we only want specific banks, skip unrequested ones
-                if not self.all_banks and stem_name not in self.get_banks:
-                    continue
+        bundle = load_bundle()
 
-                # Parse YAML to get bankId
-                with open(schema_path, 'r') as f:
-                    schema_data = yaml.safe_load(f)
-                    bank_id = schema_data.get('bank_id')
-                
-                if bank_id:
-                    # Initialize Reader (assuming BankReader accepts the name stem)
-                    # NOTE: BankReader needs to know to look in 'schemas' and parse yaml now too.
-                    # If BankReader is hardcoded for JSON, you might need to pass the dict directly 
-                    # or update BankReader. Assuming BankReader can handle the name lookup:
-                    self.readers[bank_id] = BankReader(stem_name) 
-                    self.bank_names[bank_id] = stem_name
-                    
-                    if self.verbose:
-                        print(f"  [+] Loaded schema: {stem_name} (ID: {bank_id})")
-                else:
-                    if self.verbose:
-                        print(f"  [!] Skipping {stem_name}: No 'bankId' found in YAML.")
-                
-            except Exception as e:
-                print(f"  [!] Failed to load schema {schema_path}: {e}")
+        for stem_name, error in bundle.errors.items():
+            if self.all_banks or stem_name in self.get_banks:
+                print(f"  [!] Failed to load schema {stem_name}: {error}")
+
+        for stem_name, bank_id in bundle.bank_ids.items():
+            # Filter: If we only want specific banks, skip unrequested ones
+            if not self.all_banks and stem_name not in self.get_banks:
+                continue
+
+            if bank_id:
+                # The BankReader is only built when the bank first shows up
+                self.readers.register(bank_id, stem_name)
+                self.bank_names[bank_id] = stem_name
+
+                if self.verbose:
+                    print(f"  [+] Found schema: {stem_name} (ID: {bank_id})")
+            else:
+                if self.verbose:
+                    print(f"  [!] Skipping {stem_name}: No 'bankId' found in YAML.")
 
     def _register_marker(self, bank_id, name):
         """Registers a bank that has no payload/schema (Header only)."""
@@ -87,18 +158,41 @@ class DSTProcessor:
             if self.verbose:
                 print(f"  [+] Registered marker: {name} (ID: {bank_id})")
 
-    def process_file(self, filename, limit=None):
-        """Reads DST file and yields Events (dicts of banks)."""
+    def process_file(self, filename, limit=None, use_mmap=False, start_event=None, readahead=0,
+                     raw=False):
+        """Reads DST file and yields Events (dicts of banks).
+
+        Args:
+            filename: Path to the .dst, .dst.gz, or .dst.bz2 file.
+            limit: Max number of events to yield.
+            use_mmap: Memory-map plain .dst files (see DSTFile).
+            start_event: Jump straight to this event (0-based, counted over
+                the banks this processor reads, like the events it yields)
+                using the sidecar index written by `dst-index`.
+            readahead: Blocks to decompress ahead on a background thread
+                (see DSTFile).
+            raw: Yield each bank as (version, payload bytes) instead of
+                parsing it, for events_to_awkward. Banks with cuts are still
+                parsed to test them.
+
+        A bank that fails to parse is left out of its event, but still ends
+        the event when another bank of its type follows (as in the sidecar
+        index, whose events are formed from the bank sequence alone).
+        """
         current_event = {}
         event_count = 0
+        # Banks of the current event that are not in current_event because
+        # the event failed a cut (rejected)
+        skipped = set()
+        rejected = False
         
         # Open the DST file
-        with DSTFile(filename) as dst:
-            for bank_id, ver, raw_bytes in dst.banks():
-                
-                # 1. Filter: Do we know/want this bank?
-                if bank_id not in self.bank_names:
-                    continue
+        with DSTFile(filename, use_mmap=use_mmap, readahead=readahead) as dst:
+            if start_event:
+                dst.seek_event(start_event, bank_ids=self.bank_names)
+
+            # 1. Filter: only banks we know/want are reassembled at all
+            for bank_id, ver, raw_bytes in dst.banks(wanted=set(self.bank_names)):
 
                 name = self.bank_names[bank_id]
                 reader = self.readers[bank_id]
@@ -108,38 +202,145 @@ class DSTProcessor:
                 # 2. Event Boundary Check
                 # DST files are sequential. If we see a bank that is already 
                 # in the current buffer, the previous event is complete.
-                if name in current_event:
-                    yield current_event
+                if name in current_event or name in skipped:
+                    if self._selected(current_event):
+                        yield current_event
+                        event_count += 1
+                        if limit and event_count >= limit:
+                            return
+                    current_event = {}
+                    skipped = set()
+                    rejected = False
+
+                if rejected:
+                    skipped.add(name)
+                    continue
+
+                # 3. Parse Data (cuts on fixed-position fields need no parsing)
+                cuts = self.cuts.get(bank_id)
+                if cuts is not None and not cuts.test_raw(raw_bytes):
+                    rejected = True
+                else:
+                    try:
+                        if reader is None:
+                            # Marker Bank (Start/Stop)
+                            data = {"active": True, "_version": ver}
+                        elif raw and cuts is None:
+                            # Parsed later with the other banks of its type
+                            data = None
+                        else:
+                            # Standard Bank
+                            data, _ = reader.parse_buffer(raw_bytes)
+                            data['_version'] = ver 
+
+                        if cuts is not None and not cuts.test_parsed(data):
+                            rejected = True
+                        else:
+                            current_event[name] = (ver, bytes(raw_bytes)) if raw else data
+
+                    except Exception as e:
+                        print(f"Error parsing bank {name} (ID {bank_id}): {e}")
+                        skipped.add(name)
+
+                if rejected:
+                    # Drop the event; its remaining banks are skipped undecoded
+                    skipped.update(current_event)
+                    skipped.add(name)
                     current_event = {}
-                    event_count += 1
-                    if limit and event_count >= limit:
-                        return
-
-                # 3. Parse Data
-                try:
-                    if reader is None:
-                        # Marker Bank (Start/Stop)
-                        data = {"active": True, "_version": ver}
-                    else:
-                        # Standard Bank
-                        data, _ = reader.parse_buffer(raw_bytes)
-                        data['_version'] = ver 
-
-                    current_event[name] = data
-                    
-                except Exception as e:
-                    print(f"Error parsing bank {name} (ID {bank_id}): {e}")
 
             # Yield the final event sitting in the buffer
-            if current_event:
+            if self._selected(current_event):
                 yield current_event
 
+    def _selected(self, event):
+        """Whether a finished event is output: not empty, and holding every cut bank."""
+        return bool(event) and all(self.bank_names[bank_id] in event for bank_id in self.cuts)
+
+    def events_to_awkward(self, events):
+        """
+        One Awkward array of the events yielded by process_file(..., raw=True).
+
+        The banks of each type are parsed in one BankReader.parse_many batch
+        and placed in the events holding them (None in the others), so no
+        per-bank arrays are built. The result equals ak.Array of the events
+        process_file yields without `raw`, except that banks which fail to
+        parse are reported here, and an event left without any bank is
+        dropped.
+        """
+        bank_ids = {name: bank_id for bank_id, name in self.bank_names.items()}
+        rows = {}       # Bank name -> events holding it (in order of first appearance)
+        payloads = {}   # Bank name -> (version, payload) per event holding it
+        n_events = 0
+        for event in events:
+            for name, payload in event.items():
+                rows.setdefault(name, []).append(n_events)
+                payloads.setdefault(name, []).append(payload)
+            n_events += 1
+
+        filled = np.zeros(n_events, dtype=bool)
+        columns = []
+        for name, event_rows in rows.items():
+            versions = np.array([ver for ver, _ in payloads[name]], dtype=np.int64)
+            reader = self.readers[bank_ids[name]]
+            if reader is None:
+                # Marker banks: {"active": True, "_version": ver}
+                parsed = ak.Array(ak.contents.RecordArray(
+                    [ak.contents.NumpyArray(np.ones(len(versions), dtype=bool))], ["active"]))
+                good = np.ones(len(versions), dtype=bool)
+            else:
+                parsed, good = self._parse_many(name, reader, [raw_bytes for _, raw_bytes in payloads[name]])
+            parsed = ak.with_field(parsed, versions[good], "_version")
+
+            event_rows = np.asarray(event_rows, dtype=np.int64)[good]
+            filled[event_rows] = True
+            if len(event_rows) == n_events:
+                columns.append(parsed.layout)
+            else:
+                index = np.full(n_events, -1, dtype=np.int64)
+                index[event_rows] = np.arange(len(event_rows))
+                columns.append(ak.contents.IndexedOptionArray(ak.index.Index64(index), parsed.layout))
+
+        events_ak = ak.Array(ak.contents.RecordArray(columns, list(rows), length=n_events))
+        return events_ak if filled.all() else events_ak[filled]
+
+    def _parse_many(self, name, reader, buffers):
+        """parse_many of one bank type, without the banks that fail to parse; returns (banks, kept mask)."""
+        try:
+            return reader.parse_many(buffers), np.ones(len(buffers), dtype=bool)
+        except Exception:
+            pass
+        # Find the banks at fault, as process_file would report them
+        good = np.ones(len(buffers), dtype=bool)
+        for i, buffer in enumerate(buffers):
+            try:
+                reader.parse_buffer(buffer)
+            except Exception as e:
+                print(f"Error parsing bank {name} (ID {reader.bank_id}): {e}")
+                good[i] = False
+        return reader.parse_many([buffer for buffer, ok in zip(buffers, good) if ok]), good
+
 def main():
     parser = argparse.ArgumentParser(description="Convert DST file to Parquet/Awkward.")
     parser.add_argument("input_file", help="Path to input .dst or .dst.gz file")
     parser.add_argument("--limit", type=int, default=None, help="Max events to process")
     parser.add_argument("--banks", type=str, default=None, 
                         help="Comma-separated list of banks to read. If omitted, reads ALL.")
+    parser.add_argument("--fields", type=str, default=None,
+                        help="Comma-separated list of bank.field to keep (e.g. rusdraw.xxyy,rusdraw.yymmdd). "
+                             "Banks named here keep only these fields; other banks are read in full.")
+    parser.add_argument("--cut", action="append", default=[], metavar="CUT",
+                        help='Keep only events passing CUT, e.g. "rusdraw.nofwf >= 5" or '
+                             '"rufldf.energy[0] > 1e19" (repeatable; all cuts must pass).')
+    parser.add_argument("--sparse-fits", action="store_true",
+                        help="Store PRFC/HCBIN/HCTIM as fit_index plus the fits present, not 16 slots each.")
+    parser.add_argument("--start-event", type=int, default=None,
+                        help="First event to convert (0-based, counted over the banks read, so with --banks "
+                             "it can differ from the file's event number). Requires a sidecar index "
+                             "from dst-index.")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Memory-map uncompressed .dst input instead of reading it block by block.")
+    parser.add_argument("--readahead", type=int, default=0, metavar="N",
+                        help="Decompress N blocks ahead on a background thread (useful for .gz/.bz2).")
     
     args = parser.parse_args()
 
@@ -160,16 +361,39 @@ def main():
     else:
         print("Configuration: Reading ALL available banks.")
 
+    # Configure Field Projection
+    fields = {}
+    if args.fields:
+        for item in args.fields.split(','):
+            bank, sep, field = item.strip().partition('.')
+            if not sep or not bank or not field:
+                parser.error(f"--fields entries must look like bank.field, got {item.strip()!r}")
+            fields.setdefault(bank, []).append(field)
+        print(f"Configuration: Reading only fields: {fields}")
+
+    if args.cut:
+        print(f"Configuration: Keeping events with: {' and '.join(args.cut)}")
+
+    if args.sparse_fits:
+        print("Configuration: Sparse layout for 16-fit banks (prfc, hcbin, hctim).")
+
     # Initialize Processor
-    processor = DSTProcessor(get_banks=get_banks_list, all_banks=all_banks_flag)
+    try:
+        processor = DSTProcessor(get_banks=get_banks_list, all_banks=all_banks_flag, fields=fields,
+                                 cuts=args.cut, sparse_fits=args.sparse_fits)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Run Processing
     print(f"\nProcessing {input_path}...")
     t0 = time.time()
     
+    # Banks are kept as payloads and parsed a bank type at a time (events_to_awkward)
     event_list = []
     try:
-        for ev in processor.process_file(str(input_path), limit=args.limit):
+        for ev in processor.process_file(str(input_path), limit=args.limit, use_mmap=args.mmap,
+                                         start_event=args.start_event, readahead=args.readahead,
+                                         raw=True):
             event_list.append(ev)
     except KeyboardInterrupt:
         print("\nInterrupted! Saving current buffer...")
@@ -187,7 +411,7 @@ def main():
 
     # Convert to Awkward and Save
     print("Building Awkward Array...")
-    events_ak = ak.Array(event_list)
+    events_ak = processor.events_to_awkward(event_list)
     print(f"Array Type: {events_ak.type}")
     
     print(f"Saving to {output_parquet}...")
@@ -0,0 +1,289 @@
+"""
+Sidecar bank-offset index for random access into DST files.
+
+One pass over a DST file records, for every bank, the block number and
+in-block offset of its START_BANK command, and groups banks into events with
+the same rule as `DSTProcessor.process_file` (a repeated bank starts a new
+event). A processor reading only some banks groups only those, so its events
+are numbered differently; `DSTIndex.event_starts(bank_ids)` regroups the
+recorded bank IDs for such a subset. A few header scalars (event_num, julian, jsecond) are picked out of
+the leading fixed-size fields of each event's banks, so events can be found
+by number without decoding anything.
+
+The index is written next to the data file (`run123.dst.gz` ->
+`run123.dst.gz.idx`) and used by `DSTFile.seek_event` / `DSTFile.seek_bank`. It records the size and
+modification time of the data file it was built from, and the seeks refuse
+an index that no longer matches the file.
+For gzip files, `dst-index` also writes the decompression checkpoint index
+(`run123.dst.gz.gzidx`, see gzip_index) that makes those seeks cheap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from dst_awkward.dst_io import DSTFile
+from dst_awkward.gzip_index import DEFAULT_SPAN, GzipIndex, build_gzip_index, gzip_index_path
+from dst_awkward.schema_compiler import leading_fields
+
+INDEX_SUFFIX = ".idx"
+INDEX_FORMAT = 2
+
+# Header scalars recorded per event (-1 when no bank of the event carries them)
+INDEX_KEYS = ("event_num", "julian", "jsecond")
+
+
+def index_path(filename: str) -> str:
+    """Path of the sidecar index belonging to `filename`."""
+    return filename + INDEX_SUFFIX
+
+
+def source_stat(filename: str) -> tuple[int, int]:
+    """(size in bytes, modification time in ns) of `filename`, as recorded in an index."""
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime_ns
+
+
+@dataclass
+class DSTIndex:
+    """Bank positions and per-event summary of one DST file."""
+
+    bank_block: np.ndarray    # Block number holding each bank's START_BANK
+    bank_pos: np.ndarray      # In-block offset of that START_BANK opcode
+    bank_id: np.ndarray
+    bank_version: np.ndarray
+    event_start: np.ndarray   # Banks of event i are event_start[i]:event_start[i+1]
+    keys: dict[str, np.ndarray] = field(default_factory=dict)
+    source_size: int = -1        # Size and mtime of the data file indexed
+    source_mtime_ns: int = -1
+
+    def matches(self, filename: str) -> bool:
+        """Whether `filename` is still the file this index was built from."""
+        return source_stat(filename) == (self.source_size, self.source_mtime_ns)
+
+    def check(self, filename: str) -> None:
+        """Raise ValueError if `filename` changed since this index was built."""
+        if not self.matches(filename):
+            raise ValueError(f"{filename}: the index does not match the file (rebuilt or modified "
+                             f"since it was indexed); rebuild it with dst-index")
+
+    @property
+    def n_events(self) -> int:
+        return len(self.event_start) - 1
+
+    @property
+    def n_banks(self) -> int:
+        return len(self.bank_id)
+
+    def bank_position(self, bank: int) -> tuple[int, int]:
+        """(block, in-block offset) of bank number `bank`."""
+        return int(self.bank_block[bank]), int(self.bank_pos[bank])
+
+    def event_starts(self, bank_ids=None) -> np.ndarray:
+        """
+        Like `event_start`, for the events formed by the banks in `bank_ids`
+        alone (as DSTProcessor.process_file groups them when it reads only
+        those banks): element i is the bank number of the first bank of event
+        i, the last element is n_banks. None: every indexed bank.
+        """
+        if bank_ids is None:
+            return self.event_start
+        selected = np.isin(self.bank_id, np.fromiter(bank_ids, dtype=np.int64))
+        if selected.all():
+            return self.event_start
+
+        starts = []
+        current_ids = None
+        for bank, bank_id in zip(np.flatnonzero(selected).tolist(), self.bank_id[selected].tolist()):
+            if current_ids is None or bank_id in current_ids:
+                current_ids = set()
+                starts.append(bank)
+            current_ids.add(bank_id)
+        starts.append(self.n_banks)
+        return np.asarray(starts, dtype=np.int64)
+
+    def event_position(self, event: int, bank_ids=None) -> tuple[int, int]:
+        """
+        (block, in-block offset) of the first bank of event number `event`,
+        counting events over the banks in `bank_ids` (see event_starts).
+        """
+        starts = self.event_starts(bank_ids)
+        if not 0 <= event < len(starts) - 1:
+            raise IndexError(f"event {event} out of range (file has {len(starts) - 1} events)")
+        return self.bank_position(int(starts[event]))
+
+    def event_bank_ids(self, event: int) -> np.ndarray:
+        """Bank IDs present in event number `event`, in file order."""
+        return self.bank_id[self.event_start[event] : self.event_start[event + 1]]
+
+    def find_event(self, event_num: int) -> int:
+        """Event number (position in the file) of the first event with this `event_num`."""
+        hits = np.flatnonzero(self.keys["event_num"] == event_num)
+        if len(hits) == 0:
+            raise KeyError(f"event_num {event_num} not found in index")
+        return int(hits[0])
+
+    def save(self, path: str) -> None:
+        # Pass a file object so numpy does not append '.npz' to the name
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                format=np.int32(INDEX_FORMAT),
+                bank_block=self.bank_block,
+                bank_pos=self.bank_pos,
+                bank_id=self.bank_id,
+                bank_version=self.bank_version,
+                event_start=self.event_start,
+                source_size=np.int64(self.source_size),
+                source_mtime_ns=np.int64(self.source_mtime_ns),
+                **{f"key_{k}": v for k, v in self.keys.items()},
+            )
+
+    @classmethod
+    def load(cls, path: str) -> DSTIndex:
+        with np.load(path) as npz:
+            if int(npz["format"]) != INDEX_FORMAT:
+                raise ValueError(f"{path}: unsupported index format {int(npz['format'])} "
+                                 f"(rebuild it with dst-index)")
+            return cls(
+                bank_block=npz["bank_block"],
+                bank_pos=npz["bank_pos"],
+                bank_id=npz["bank_id"],
+                bank_version=npz["bank_version"],
+                event_start=npz["event_start"],
+                keys={k[4:]: npz[k] for k in npz.files if k.startswith("key_")},
+                source_size=int(npz["source_size"]),
+                source_mtime_ns=int(npz["source_mtime_ns"]),
+            )
+
+
+def header_offsets(schema: dict, dtypes: dict) -> dict[str, tuple[int, np.dtype]]:
+    """
+    Byte offsets (from the start of the bank, header included) of the
+    INDEX_KEYS scalars found among the leading fixed-size fields of `schema`
+    (see schema_compiler.leading_fields).
+    """
+    return {
+        name: (offset, dtype)
+        for name, (offset, dtype, shape) in leading_fields(schema, dtypes).items()
+        if not shape and name in INDEX_KEYS
+    }
+
+
+def build_index(filename: str, processor=None) -> DSTIndex:
+    """
+    Scan `filename` once and build its DSTIndex.
+
+    Args:
+        filename: Path to a .dst, .dst.gz, or .dst.bz2 file.
+        processor: DSTProcessor defining the known banks (and so the event
+            boundaries); defaults to one reading all available schemas.
+    """
+    if processor is None:
+        from dst_awkward.dst_events_to_awkward import DSTProcessor
+
+        processor = DSTProcessor(verbose=False)
+
+    known = processor.bank_names
+    key_offsets = {
+        bank_id: header_offsets(reader.schema, reader.dtypes)
+        for bank_id, reader in processor.readers.items()
+        if reader is not None
+    }
+
+    # Taken before the scan, so that a file changed during it does not match
+    size, mtime_ns = source_stat(filename)
+
+    bank_block, bank_pos, bank_ids, bank_versions = [], [], [], []
+    event_start = []
+    keys = {k: [] for k in INDEX_KEYS}
+    current_ids = None
+
+    with DSTFile(filename) as dst:
+        for bank_id, ver, raw_bytes in dst.banks(wanted=set(known)):
+
+            # Same event boundary rule as DSTProcessor.process_file
+            if current_ids is None or bank_id in current_ids:
+                current_ids = set()
+                event_start.append(len(bank_ids))
+                for k in INDEX_KEYS:
+                    keys[k].append(-1)
+            current_ids.add(bank_id)
+
+            bank_block.append(dst.bank_block)
+            bank_pos.append(dst.bank_pos)
+            bank_ids.append(bank_id)
+            bank_versions.append(ver)
+
+            for k, (offset, dtype) in key_offsets.get(bank_id, {}).items():
+                if keys[k][-1] == -1 and offset + dtype.itemsize <= len(raw_bytes):
+                    keys[k][-1] = np.frombuffer(raw_bytes, dtype=dtype, count=1, offset=offset)[0]
+
+    event_start.append(len(bank_ids))
+
+    return DSTIndex(
+        bank_block=np.asarray(bank_block, dtype=np.int64),
+        bank_pos=np.asarray(bank_pos, dtype=np.int32),
+        bank_id=np.asarray(bank_ids, dtype=np.int32),
+        bank_version=np.asarray(bank_versions, dtype=np.int32),
+        event_start=np.asarray(event_start, dtype=np.int64),
+        keys={k: np.asarray(v, dtype=np.int64) for k, v in keys.items()},
+        source_size=size,
+        source_mtime_ns=mtime_ns,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build sidecar bank-offset indexes for DST files.")
+    parser.add_argument("input_files", nargs="+", help="Paths to .dst, .dst.gz or .dst.bz2 files")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild indexes that already exist and match the data file.")
+    parser.add_argument("--gzip-span", type=int, default=DEFAULT_SPAN,
+                        help="Uncompressed bytes between gzip checkpoints (default: %(default)s).")
+    args = parser.parse_args()
+
+    from dst_awkward.dst_events_to_awkward import DSTProcessor
+
+    processor = DSTProcessor(verbose=False)
+
+    def up_to_date(out, current):
+        """Whether `out` exists and `current(out)` (it matches the data file) holds."""
+        if args.force or not os.path.exists(out):
+            return False
+        try:
+            ok = current(out)
+        except (OSError, ValueError, KeyError):
+            # Unreadable or older format
+            ok = False
+        if ok:
+            print(f"{out}: up to date (use --force to rebuild)")
+        return ok
+
+    for filename in args.input_files:
+        if filename.endswith(".gz"):
+            out = gzip_index_path(filename)
+            if not up_to_date(out, lambda path: GzipIndex.load(path).matches(filename)):
+                t0 = time.time()
+                gz_index = build_gzip_index(filename, span=args.gzip_span)
+                gz_index.save(out)
+                print(f"{out}: {len(gz_index.out_offset)} checkpoints "
+                      f"({time.time() - t0:.2f}s)")
+
+        out = index_path(filename)
+        if up_to_date(out, lambda path: DSTIndex.load(path).matches(filename)):
+            continue
+
+        t0 = time.time()
+        index = build_index(filename, processor=processor)
+        index.save(out)
+        print(f"{out}: {index.n_events} events, {index.n_banks} banks "
+              f"({time.time() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
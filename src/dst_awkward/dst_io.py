@@ -2,7 +2,10 @@ import gzip
 import bz2
 import struct
 import io
+import mmap
 import os
+import queue
+import threading
 
 # --- DST Protocol Constants (from dst_bank.c) ---
 BLOCK_LEN = 32000
@@ -17,24 +20,127 @@ CONTINUE = 8            # 0x08
 END_BANK = 14           # 0x0E
 TO_BE_CONTD = 15        # 0x0F
 
+_OPCODE_BYTE = bytes([OPCODE])
+# Commands followed by a 4-byte word (segment length, CRC or block number)
+_WORD_COMMANDS = frozenset((START_BANK, CONTINUE, END_BANK, TO_BE_CONTD, START_BLOCK))
+_unpack_int4 = struct.Struct('<i').unpack_from
+_unpack_header = struct.Struct('<ii').unpack_from
+
 class DSTFile:
-    def __init__(self, filename):
+    def __init__(self, filename, use_mmap=False, readahead=0):
+        """
+        Args:
+            filename: Path to a .dst, .dst.gz, or .dst.bz2 file.
+            use_mmap: Memory-map plain .dst files. Banks contained in a single
+                segment are then yielded as zero-copy memoryview slices of the
+                mapping; only banks split across blocks are reassembled.
+                Ignored for compressed files.
+            readahead: Number of blocks a background thread reads (and so
+                decompresses) ahead of the bank framing. zlib and bz2 release
+                the GIL, so for .gz/.bz2 input decompression overlaps with
+                framing and parsing. 0 (default) reads on the calling thread.
+                Ignored in mmap mode.
+        """
         self.filename = filename
+        self.use_mmap = use_mmap and not filename.endswith((".gz", ".bz2"))
+        self.readahead = 0 if self.use_mmap else readahead
         self.f = self._open_file(filename)
+        self.mmap = None
         self.block_buffer = b""
-        self.cursor = 0
+        self.block_start = 0
         self.eof = False
 
+        # Position bookkeeping (see seek() and the dst_index module)
+        self.block_index = -1   # Index of the block currently in block_buffer
+        self.bank_block = -1    # Block holding the START_BANK of the last yielded bank
+        self.bank_pos = -1      # In-block offset of that START_BANK opcode
+        self._resume_pos = 0    # In-block offset to resume scanning at after seek()
+        self._after_seek = False  # Tail segments of a bank begun before the seek are expected
+
+        # Background reader state (see _start_readahead)
+        self._queue = None
+        self._stop_reader = None
+        self._reader = None
+
+        if self.use_mmap:
+            self._open_mmap()
+        elif self.readahead > 0:
+            self._start_readahead()
+
     def _open_file(self, filename):
         """Transparently opens .dst, .dst.gz, or .dst.bz2"""
         if filename.endswith(".gz"):
-            return gzip.open(filename, 'rb')
+            # With a checkpoint index (see gzip_index) seeks do not inflate from the start
+            from dst_awkward.gzip_index import open_indexed_gzip
+
+            return open_indexed_gzip(filename) or gzip.open(filename, 'rb')
         elif filename.endswith(".bz2"):
             return bz2.open(filename, 'rb')
         else:
             return open(filename, 'rb')
 
+    def _open_mmap(self):
+        """Maps the whole (uncompressed) file read-only."""
+        size = os.fstat(self.f.fileno()).st_size
+        if size == 0:
+            # Empty files cannot be mapped; there is nothing to read anyway.
+            self.eof = True
+            return
+        self.mmap = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.block_buffer = self.mmap
+        # Start "one block before" the mapping so the first read lands on 0
+        self.block_start = -BLOCK_LEN
+
+    def _start_readahead(self):
+        """Start a thread filling a bounded queue with the next blocks."""
+        self._queue = queue.Queue(maxsize=self.readahead)
+        self._stop_reader = threading.Event()
+        self._reader = threading.Thread(
+            target=self._readahead_worker, args=(self._queue, self._stop_reader), daemon=True
+        )
+        self._reader.start()
+
+    def _readahead_worker(self, blocks, stop):
+        """Read blocks until EOF (a short chunk, which is queued too) or stop."""
+        while not stop.is_set():
+            try:
+                chunk = self.f.read(BLOCK_LEN)
+            except Exception as e:
+                # Re-raised by _read_next_block on the consuming thread
+                chunk = e
+            while not stop.is_set():
+                try:
+                    blocks.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(chunk, Exception) or len(chunk) < BLOCK_LEN:
+                return
+
+    def _stop_readahead(self):
+        if self._reader is None:
+            return
+        self._stop_reader.set()
+        # Unblock a pending put() so the thread sees the stop flag
+        while self._reader.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._reader.join(timeout=0.01)
+        self._queue = self._stop_reader = self._reader = None
+
     def close(self):
+        self._stop_readahead()
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # Yielded banks (or arrays built on them) still reference the
+                # mapping; it is unmapped once the last of them is released.
+                pass
+            self.mmap = None
+            self.block_buffer = b""
         if self.f:
             self.f.close()
 
@@ -44,9 +150,93 @@ class DSTFile:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def seek(self, block, offset=0):
+        """
+        Position the stream so the next banks() call starts scanning at
+        `offset` bytes into block number `block`.
+
+        `offset` should point at an OPCODE (e.g. a START_BANK position from a
+        sidecar index); use 0 to start at the beginning of the block.
+        Compressed files are seekable too. gzip files with a checkpoint index
+        (built by `dst-index`) restart decompression near the target; otherwise
+        gzip/bz2 have to decompress everything before it.
+
+        When seeking into the middle of a bank (e.g. `offset=0` of an arbitrary
+        block), its remaining segments are skipped silently.
+        """
+        if self.mmap is not None:
+            self.block_start = (block - 1) * BLOCK_LEN
+        else:
+            # The read-ahead thread owns the file position; restart it there
+            self._stop_readahead()
+            self.f.seek(block * BLOCK_LEN)
+            self.block_buffer = b""
+            if self.readahead > 0:
+                self._start_readahead()
+        self.block_index = block - 1
+        self._resume_pos = offset
+        self._after_seek = True
+        self.eof = False
+
+    def seek_event(self, event, index=None, bank_ids=None):
+        """
+        Position the stream at the first bank of event number `event`
+        (0-based, counted like DSTProcessor.process_file), using the sidecar
+        index built by `dst-index`.
+
+        Args:
+            event: Event number within the file.
+            index: A DSTIndex; loaded from the sidecar file when omitted.
+            bank_ids: Bank IDs the events are formed from, when only some
+                banks are read (see DSTIndex.event_starts); None for all
+                indexed banks.
+
+        Raises ValueError if the index was built from a different version of
+        the file (see DSTIndex.check).
+        """
+        if index is None:
+            index = self._load_index()
+        index.check(self.filename)
+        self.seek(*index.event_position(event, bank_ids))
+
+    def seek_bank(self, bank, index=None):
+        """Position the stream at bank number `bank` (0-based) of the sidecar index."""
+        if index is None:
+            index = self._load_index()
+        index.check(self.filename)
+        self.seek(*index.bank_position(bank))
+
+    def _load_index(self):
+        from dst_awkward.dst_index import DSTIndex, index_path
+
+        return DSTIndex.load(index_path(self.filename))
+
     def _read_next_block(self):
         """Reads exactly one 32KB block from the file."""
-        chunk = self.f.read(BLOCK_LEN)
+        if self.mmap is not None:
+            # Nothing is copied: the block is a window onto the mapping.
+            start = self.block_start + BLOCK_LEN
+            remaining = len(self.mmap) - start
+            if remaining < BLOCK_LEN:
+                self.eof = True
+                if remaining > 0:
+                    print(f"Warning: Last block incomplete ({remaining} bytes)")
+                return False
+            self.block_start = start
+            self.block_index += 1
+            return True
+
+        if self._reader is not None:
+            if self.eof:
+                # The reader thread has already delivered the end of the file
+                return False
+            chunk = self._queue.get()
+            if isinstance(chunk, Exception):
+                self.eof = True
+                raise chunk
+        else:
+            chunk = self.f.read(BLOCK_LEN)
+
         if len(chunk) < BLOCK_LEN:
             self.eof = True
             if len(chunk) > 0:
@@ -54,120 +244,258 @@ class DSTFile:
             return False
         
         self.block_buffer = chunk
-        self.cursor = 0
+        self.block_start = 0
+        self.block_index += 1
         return True
 
-    def banks(self):
-        """Generator that yields (bank_id, bank_version, raw_data_bytes)"""
+    def banks(self, stop_block=None, wanted=None):
+        """
+        Generator that yields (bank_id, bank_version, raw_data_bytes).
+
+        Args:
+            stop_block: Only yield banks whose START_BANK lies before this
+                block number. Together with seek(), this splits a file into
+                block ranges that can be processed independently.
+            wanted: Optional set of bank IDs to yield. The ID is read from the
+                first segment, and the segments of other banks are skipped
+                without being copied or reassembled.
+
+        In mmap mode, `raw_data_bytes` is a read-only memoryview for banks
+        stored in one segment, and bytes for banks split across blocks.
+
+        While a bank is being handled, `bank_block` / `bank_pos` give the block
+        number and in-block offset of its START_BANK command.
+        """
         
-        # State for reassembling split banks
-        current_bank_data = bytearray()
+        # State for reassembling split banks: memoryview slices of the blocks
+        # holding each segment, joined once when the bank is complete.
+        segments = []
         building_bank = False
+        skip_bank = False   # Current bank is not in `wanted`
+        bank_block = bank_pos = -1
+
+        # After seek(), segments of a bank started before the target are not an error
+        orphans_expected = self._after_seek
+        self._after_seek = False
 
         while not self.eof:
-            # If buffer exhausted, get next block
-            if self.cursor >= BLOCK_LEN:
-                if not self._read_next_block():
-                    break
-            
-            # If we haven't read any blocks yet
-            if not self.block_buffer:
-                if not self._read_next_block():
-                    break
+            if not self._read_next_block():
+                break
+            if stop_block is not None and self.block_index >= stop_block and not building_bank:
+                break
 
-            # --- PARSE BYTE STREAM ---
-            byte = self.block_buffer[self.cursor]
-            
-            # We expect an OPCODE (96) to start any command
-            if byte != OPCODE:
-                # Skip filler or garbage
-                self.cursor += 1
-                continue
-            
-            # Look ahead at the command byte
-            if self.cursor + 1 >= BLOCK_LEN:
-                # Opcode at very end of block? Edge case, but unlikely in valid DST.
-                self.cursor += 1 
-                continue
-
-            cmd = self.block_buffer[self.cursor + 1]
-            self.cursor += 2 # Consumed OPCODE + CMD
+            buffer = self.block_buffer
+            block = memoryview(buffer)
+            start = self.block_start
+            end = start + BLOCK_LEN
+
+            # After seek(), the first block is scanned from the requested offset
+            scan_start = start + self._resume_pos
+            self._resume_pos = 0
 
             # --- COMMAND HANDLERS ---
+            # scan_block() has already located every command in the block and
+            # resolved segment lengths, so we only dispatch on bank commands here.
+            for cmd, pos, seg_len in scan_block(buffer, scan_start, end):
+
+                if cmd == START_BANK:
+                    if stop_block is not None and self.block_index >= stop_block:
+                        return
+                    orphans_expected = False
+                    if building_bank:
+                        print("Warning: unexpected START_BANK while building previous bank. Resetting.")
 
-            if cmd == START_BLOCK:
-                # Structure: [OPCODE] [START_BLOCK] [BlockNum (4 bytes)]
-                # We skip the block number (4 bytes)
-                self.cursor += 4 
-            
-            elif cmd == END_BLOCK_LOGICAL or cmd == END_BLOCK_PHYSICAL:
-                # End of meaningful data in this block. Skip to next block.
-                self.cursor = BLOCK_LEN 
-
-            elif cmd == START_BANK:
-                if building_bank:
-                    print("Warning: unexpected START_BANK while building previous bank. Resetting.")
-                    current_bank_data = bytearray()
-                
-                # Read Segment Length (4 bytes)
-                seg_len = self._read_int4()
-                # Read Segment Data
-                self._read_into_buffer(current_bank_data, seg_len)
-                building_bank = True
-
-            elif cmd == CONTINUE:
-                if not building_bank:
-                    print("Warning: unexpected CONTINUE without START_BANK. Skipping.")
-                    # Skip length bytes just to be safe
-                    seg_len = self._read_int4()
-                    self.cursor += seg_len
-                else:
-                    # Append this segment to our existing buffer
-                    seg_len = self._read_int4()
-                    self._read_into_buffer(current_bank_data, seg_len)
-
-            elif cmd == END_BANK:
-                # Bank finished. 
-                # Structure: [OPCODE] [END_BANK] [CRC (4 bytes)]
-                crc = self._read_int4() # We ignore CRC check for speed
-                
-                if building_bank:
-                    # The Bank ID and Version are usually the FIRST 8 bytes of the data payload
-                    # (based on fraw1_bank_to_common_ in your C code)
-                    if len(current_bank_data) >= 8:
-                        # Unpack Header
-                        bank_id = struct.unpack('<i', current_bank_data[0:4])[0]
-                        bank_ver = struct.unpack('<i', current_bank_data[4:8])[0]
-                        
-                        # Yield the full payload (including the header bytes, 
-                        # because your schema parser will likely expect them to consume the ID/Ver fields)
-                        yield bank_id, bank_ver, bytes(current_bank_data)
-                    
-                    # Reset
-                    current_bank_data = bytearray()
+                    building_bank = True
+                    # Peek at the Bank ID so unwanted banks are never accumulated
+                    skip_bank = (wanted is not None and seg_len >= 8 and pos + 4 <= end
+                                 and _unpack_int4(buffer, pos)[0] not in wanted)
+                    segments = [] if skip_bank else [block[pos : min(pos + seg_len, end)]]
+                    # Remember where the bank starts ([OPCODE][CMD][SegLen] precede the data)
+                    bank_block = self.block_index
+                    bank_pos = pos - start - 6
+
+                elif cmd == CONTINUE:
+                    if not building_bank:
+                        if not orphans_expected:
+                            print("Warning: unexpected CONTINUE without START_BANK. Skipping.")
+                    elif not skip_bank:
+                        # Append this segment to our existing buffer
+                        segments.append(block[pos : min(pos + seg_len, end)])
+
+                elif cmd == END_BANK:
+                    # Bank finished. CRC is ignored for speed.
+                    if building_bank and skip_bank:
+                        skip_bank = False
+                        building_bank = False
+                    elif building_bank:
+                        # Single-segment banks are copied at most once; split
+                        # banks are reassembled with a single join.
+                        if len(segments) > 1:
+                            bank_data = b"".join(segments)
+                        elif self.mmap is not None:
+                            bank_data = segments[0]
+                        else:
+                            bank_data = bytes(segments[0])
+
+                        # The Bank ID and Version are usually the FIRST 8 bytes of the data payload
+                        # (based on fraw1_bank_to_common_ in your C code)
+                        if len(bank_data) >= 8:
+                            # Unpack Header
+                            bank_id, bank_ver = _unpack_header(bank_data, 0)
+                            if wanted is not None and bank_id not in wanted:
+                                # Header was too short to filter at START_BANK
+                                segments = []
+                                building_bank = False
+                                continue
+                            self.bank_block = bank_block
+                            self.bank_pos = bank_pos
+
+                            # Yield the full payload (including the header bytes, 
+                            # because your schema parser will likely expect them to consume the ID/Ver fields)
+                            yield bank_id, bank_ver, bank_data
+
+                        # Reset
+                        segments = []
+                        building_bank = False
+
+                # TO_BE_CONTD: just a marker saying "wait for CONTINUE";
+                # we stay in `building_bank = True` state.
+
+
+    def scan(self):
+        """
+        Generator over the bank headers only, without materializing payloads.
+
+        Yields (bank_id, bank_version, file_offset, total_length, n_segments):
+        `file_offset` is the uncompressed position of the bank's START_BANK
+        command (block * BLOCK_LEN + in-block offset), `total_length` the
+        payload size including the 8-byte header, and `n_segments` the number
+        of blocks it is spread over. Pass `file_offset` to read_bank() to get
+        the payload later.
+        """
+        building_bank = False
+        header = b""
+
+        orphans_expected = self._after_seek
+        self._after_seek = False
+
+        while not self.eof:
+            if not self._read_next_block():
+                break
+
+            buffer = self.block_buffer
+            start = self.block_start
+            end = start + BLOCK_LEN
+
+            scan_start = start + self._resume_pos
+            self._resume_pos = 0
+
+            for cmd, pos, seg_len in scan_block(buffer, scan_start, end):
+                seg_len = min(seg_len, end - pos)
+
+                if cmd == START_BANK:
+                    if building_bank:
+                        print("Warning: unexpected START_BANK while building previous bank. Resetting.")
+                    orphans_expected = False
+                    building_bank = True
+                    file_offset = self.block_index * BLOCK_LEN + pos - start - 6
+                    total_length = seg_len
+                    n_segments = 1
+                    header = bytes(buffer[pos : pos + min(seg_len, 8)])
+
+                elif cmd == CONTINUE:
+                    if not building_bank:
+                        if not orphans_expected:
+                            print("Warning: unexpected CONTINUE without START_BANK. Skipping.")
+                    else:
+                        total_length += seg_len
+                        n_segments += 1
+                        if len(header) < 8:
+                            header += bytes(buffer[pos : pos + min(seg_len, 8 - len(header))])
+
+                elif cmd == END_BANK:
+                    if building_bank and len(header) == 8:
+                        bank_id, bank_ver = _unpack_header(header, 0)
+                        yield bank_id, bank_ver, file_offset, total_length, n_segments
                     building_bank = False
 
-            elif cmd == TO_BE_CONTD:
-                # Just a marker saying "don't process yet, wait for CONTINUE"
-                # Checksum (4 bytes) usually follows TBC marker too
-                crc = self._read_int4()
-                # We stay in `building_bank = True` state
+    def read_bank(self, file_offset):
+        """
+        Materialize the bank whose START_BANK is at `file_offset` (as yielded
+        by scan()). Returns (bank_id, bank_version, raw_data_bytes).
 
-            else:
-                # Unknown marker or Filler (100)
-                pass
+        This seeks the file, so finish any banks()/scan() iteration over the
+        same DSTFile first.
+        """
+        self.seek(*divmod(file_offset, BLOCK_LEN))
+        for bank in self.banks():
+            return bank
+        raise ValueError(f"no bank found at offset {file_offset} of {self.filename}")
+
+
+def scan_block(block, start=0, end=BLOCK_LEN):
+    """
+    Locate the framing commands of one DST block.
+
+    Instead of stepping through the block one byte at a time, the next OPCODE
+    is found with ``find`` and bank segments are jumped over using their
+    length words, so Python-level work is proportional to the number of
+    commands rather than the number of bytes.
+
+    Args:
+        block: Buffer holding the block (any object supporting ``find`` and
+            the buffer protocol, e.g. bytes or mmap).
+        start: Offset of the block within `block`.
+        end: Offset one past the end of the block (normally start + BLOCK_LEN).
+
+    Returns:
+        List of ``(cmd, pos, seg_len)`` tuples for the bank commands
+        (START_BANK, CONTINUE, END_BANK, TO_BE_CONTD), with ``pos`` an offset
+        into `block`. For START_BANK and CONTINUE, ``pos`` is the offset of the
+        segment data and ``seg_len`` its length; for the others ``seg_len`` is 0.
+
+    Nothing past `end` is read: a command whose 4-byte word is cut off by the
+    end of the block ends the scan, also when `block` is a mapping of the
+    whole file.
+    """
+    commands = []
+    find = block.find
+    cursor = start
+
+    while cursor < end:
+        # Skip filler or garbage up to the next OPCODE
+        cursor = find(_OPCODE_BYTE, cursor, end)
+        if cursor < 0 or cursor + 1 >= end:
+            # No more commands (an OPCODE in the very last byte has no command byte)
+            break
+
+        cmd = block[cursor + 1]
+        cursor += 2  # Consumed OPCODE + CMD
+
+        if cursor + 4 > end and cmd in _WORD_COMMANDS:
+            # Truncated control word: the rest belongs to the next block
+            break
+
+        if cmd == START_BANK or cmd == CONTINUE:
+            # Structure: [OPCODE] [CMD] [SegLen (4 bytes)] [Segment Data]
+            seg_len = _unpack_int4(block, cursor)[0]
+            cursor += 4
+            commands.append((cmd, cursor, seg_len))
+            cursor += seg_len
+
+        elif cmd == END_BANK or cmd == TO_BE_CONTD:
+            # Structure: [OPCODE] [CMD] [CRC (4 bytes)], CRC ignored for speed
+            commands.append((cmd, cursor, 0))
+            cursor += 4
+
+        elif cmd == START_BLOCK:
+            # Structure: [OPCODE] [START_BLOCK] [BlockNum (4 bytes)]
+            cursor += 4
+
+        elif cmd == END_BLOCK_LOGICAL or cmd == END_BLOCK_PHYSICAL:
+            # End of meaningful data in this block.
+            break
+
+        # Unknown marker or Filler (100): keep scanning after the command byte
 
-    def _read_int4(self):
-        """Reads a 4-byte little-endian integer from current cursor."""
-        # Note: This does not handle the edge case where a 4-byte int 
-        # is split across the 32KB block boundary. 
-        # DST format avoids splitting control words across blocks.
-        val = struct.unpack_from('<i', self.block_buffer, self.cursor)[0]
-        self.cursor += 4
-        return val
-
-    def _read_into_buffer(self, target_bytearray, length):
-        """Copies `length` bytes from block to target, advancing cursor."""
-        end = self.cursor + length
-        target_bytearray.extend(self.block_buffer[self.cursor : end])
-        self.cursor = end
+    return commands
@@ -1,288 +1,180 @@
 import numpy as np
 import awkward as ak
+import copy
 from importlib import resources
 import yaml
 import struct
 
+from dst_awkward.columnar import ColumnAssembler
+from dst_awkward.schema_bundle import load_bundle
+from dst_awkward.schema_compiler import (
+    compile_schema, is_versioned, layout_names, schema_dtypes, schema_for_version,
+)
+
 def load_schema(bank_name: str):
+    # Parsed once per installation and cached (see schema_bundle)
+    schema = load_bundle().schemas.get(bank_name)
+    if schema is not None:
+        return copy.deepcopy(schema)
     with resources.files('dst_awkward.schemas').joinpath(f'{bank_name}.yaml').open('r') as f:
         return yaml.safe_load(f)
 
 class BankReader:
-    def __init__(self, bank_name: str):
+    def __init__(self, bank_name: str, backend: str = "python", fields=None, sparse_fits=False):
         # Load the schema using the bank name (e.g., "fraw1" -> loads fraw1.yaml)
         self.schema = load_schema(bank_name)
         self.bank_name = bank_name
         
         # Map YAML types to Numpy dtypes (assuming Little Endian '<')
-        endian = self.schema.get('endian', '<')
-        self.dtypes = {
-            'int8':  np.dtype(f'{endian}i1'),
-            'int16': np.dtype(f'{endian}i2'),
-            'int32': np.dtype(f'{endian}i4'),
-            'float32': np.dtype(f'{endian}f4'),
-            'float64': np.dtype(f'{endian}f8'),
-        }
-
-    def parse_buffer(self, buffer, start_offset=8):
-        """Parses a bytes object (a single bank) into a Dictionary of Awkward Arrays."""
+        self.dtypes = schema_dtypes(self.schema)
+
+        # Schemas with `sparse_fits` (the 16-fit banks PRFC, HCBIN, HCTIM) in
+        # the sparse layout: `fit_index` plus the present fits only (see
+        # schema_compiler.SparseFits). Other banks ignore the flag.
+        self.sparse_fits = bool(sparse_fits) and bool(self.schema.get("sparse_fits"))
+
+        # Projection: only these fields are output. The plan steps over the
+        # others without decoding them.
+        self.fields = None
+        if fields is not None:
+            self.fields = list(dict.fromkeys(fields))
+            known = set(layout_names(self.schema.get("layout", [])))
+            if self.sparse_fits:
+                known.add("fit_index")
+            unknown = set(self.fields) - known
+            if unknown:
+                raise ValueError(f"{bank_name}: unknown fields {sorted(unknown)}")
+
+        # Resolve the layout once; parse_buffer only executes the plan. The
+        # bundle already holds the compiled ops of the installed schemas.
+        ops = load_bundle().ops.get(bank_name) if self.fields is None and not self.sparse_fits else None
+        self.plan = compile_schema(self.schema, self.dtypes, ops=ops, fields=self.fields,
+                                   sparse=self.sparse_fits)
+
+        # Schemas whose fields are tagged with version ranges get one plan
+        # per bank version, compiled on first use and keyed by
+        # (bank_id, version). `self.plan` (every field) is used when the
+        # version is unknown.
+        self.bank_id = self.schema.get("bank_id")
+        self.versioned = is_versioned(self.schema)
+        self._plans = {}
+        self._unpack_version = struct.Struct(self.schema.get("endian", "<") + "i").unpack_from
+
+        # Batch backend for parse_many: "python", or "numba" for a compiled
+        # kernel per schema (see numba_backend). Without Numba installed the
+        # reader stays on the Python path.
+        if backend not in ("python", "numba"):
+            raise ValueError(f"unknown backend {backend!r}")
+        if backend == "numba":
+            from dst_awkward.numba_backend import NUMBA_AVAILABLE
+
+            if not NUMBA_AVAILABLE:
+                backend = "python"
+        self.backend = backend
+        self._batch_parsers = {}
+
+    def bank_version(self, buffer, start_offset=8):
+        """Version from the bank header, or None if it does not select the plan."""
+        if not self.versioned or start_offset < 8 or len(buffer) < 8:
+            return None
+        return self._unpack_version(buffer, 4)[0]
+
+    def plan_for(self, version):
+        """Read plan for banks of `version` (None: the plan with every field)."""
+        if version is None or not self.versioned:
+            return self.plan
+        key = (self.bank_id, version)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = compile_schema(self.schema, self.dtypes, version=version,
+                                                     fields=self.fields, sparse=self.sparse_fits)
+        return plan
+
+    def parse_buffer(self, buffer, start_offset=8, raw_jagged=False):
+        """Parses a bytes object (a single bank) into a Dictionary of Awkward Arrays.
+
+        With `raw_jagged`, `bulk_jagged` fields are returned as
+        `jagged.JaggedBuffers` (NumPy offsets + content) so that many banks can
+        be combined into one Awkward layout later.
+        """
         # Start at 8 to skip [BankID (4b), BankVersion (4b)]
         # unless overridden by the user.
-        #
-        # Some banks have conditional / control-flow-driven layouts that are not
-        # representable in the simple YAML dialect. For those, dispatch to a
-        # dedicated parser.
-        if self.schema.get("name") == "prfc" or self.bank_name == "prfc":
-            from dst_awkward.prfc_reader import parse_prfc_bank
-
-            endian = self.schema.get("endian", "<")
-            res = parse_prfc_bank(buffer, start_offset=start_offset, endian=endian)
-            return res.data, res.cursor
-
-        if self.schema.get("name") == "hcbin" or self.bank_name == "hcbin":
-            from dst_awkward.hcbin_reader import parse_hcbin_bank
-
-            endian = self.schema.get("endian", "<")
-            res = parse_hcbin_bank(buffer, start_offset=start_offset, endian=endian)
-            return res.data, res.cursor
-
-        if self.schema.get("name") == "hctim" or self.bank_name == "hctim":
-            from dst_awkward.hctim_reader import parse_hctim_bank
-
-            endian = self.schema.get("endian", "<")
-            res = parse_hctim_bank(buffer, start_offset=start_offset, endian=endian)
-            return res.data, res.cursor
-
-        if self.schema.get("name") == "stps2" or self.bank_name == "stps2":
-            from dst_awkward.stps2_reader import parse_stps2_bank
-
-            endian = self.schema.get("endian", "<")
-            res = parse_stps2_bank(buffer, start_offset=start_offset, endian=endian)
-            return res.data, res.cursor
-
-        if self.schema.get("name") == "stpln" or self.bank_name == "stpln":
-            from dst_awkward.stpln_reader import parse_stpln_bank
-
-            endian = self.schema.get("endian", "<")
-            # stpln reader reads bank_id/version itself, so start at offset 0 of bank
-            res = parse_stpln_bank(buffer, start_offset=0, endian=endian)
-            return res.data, res.cursor
-
-        cursor = start_offset
-
-        ctx = {}       # Context dictionary to sizes 
-        results = {}   # Dictionary of final results to return,
-
-        # Iterate over each field in the schema
-        for field in self.schema['layout']:
-            f_type = field.get('type')
-
-            # --- Case 1: Standard Primitive Field ---
-            if f_type not in ['interleaved_sequence', 
-                              'bulk_jagged', 
-                              'interleaved_jagged', 
-                              'interleaved_mixed']:
-                # Primitive types read a whole chunk of data at once
-                # that can be a scalar or an array
-                # Expect 'name', 'type', and optional 'shape'
-                
-                dtype = self.dtypes[f_type]
-                name = field['name']
-                
-                count = 1
-                shape_dims = []
-
-                # Record shape
-                if 'shape' in field:
-                    for dim in field['shape']:
-                        val = int(ctx[dim]) if isinstance(dim, str) else dim
-                        count *= val
-                        shape_dims.append(val)
-                        
-                # Read the data from the buffer and move the cursor
-                n_bytes = count * dtype.itemsize
-                data = np.frombuffer(buffer, dtype=dtype, count=count, offset=cursor)
-                cursor += n_bytes
-
-                # Store data in context and results
-                if 'shape' not in field:
-                    ctx[name] = data[0]
-                    results[name] = data[0]
-                else:
-                    data = data.reshape(tuple(shape_dims))
-                    ctx[name] = data 
-                    results[name] = ak.Array(data)
-
-            # --- Case 2: Interleaved Sequence (Fixed or Global Dynamic) ---
-            elif f_type == 'interleaved_sequence':
-                # interleaved_sequence reads multiple items in a loop where the 
-                # rows of the items are filled iteratively. The size of each item inside
-                # the loop can be set for smooth arrays with 'shape' and for jagged arrays
-                # with 'size_ref'.
+        plan = self.plan_for(self.bank_version(buffer, start_offset))
+        return plan.execute(buffer, start_offset, raw_jagged=raw_jagged)
+
+    def parse_many(self, buffers, start_offset=8):
+        """Parses a list of banks of this type into one Awkward RecordArray.
+
+        Each field is appended directly into growing NumPy buffers (with
+        offsets for variable-length fields), so the batch becomes a single
+        Awkward layout instead of one small array per bank. Record i equals
+        `parse_buffer(buffers[i])`.
+
+        With the numba backend the batch is parsed by the compiled kernel;
+        batches it cannot reproduce exactly fall back to the Python path.
+
+        Banks of different versions of a versioned schema are parsed in one
+        batch per version; fields missing from some versions are None in
+        those records.
+        """
+        versions = [self.bank_version(buffer, start_offset) for buffer in buffers]
+        if len(set(versions)) > 1:
+            return self._parse_mixed(buffers, start_offset, versions)
+        return self._parse_batch(buffers, start_offset, versions[0] if versions else None)
+
+    def _parse_batch(self, buffers, start_offset, version):
+        """parse_many for banks that all share `version`."""
+        if self.backend == "numba":
+            parser = self._numba_parser(version)
+            result = parser.parse_many(buffers, start_offset) if parser is not None else None
+            if result is not None:
+                return result
+
+        plan = self.plan_for(version)
+        assembler = ColumnAssembler(len(buffers), templates=plan.templates)
+        for buffer in buffers:
+            data, _ = plan.execute(buffer, start_offset, raw=True)
+            assembler.append(data)
+        return assembler.to_awkward()
+
+    def _parse_mixed(self, buffers, start_offset, versions):
+        """parse_many for banks of several versions: one batch per version, merged."""
+        groups = {}
+        for i, version in enumerate(versions):
+            groups.setdefault(version, []).append(i)
+
+        order = []
+        parts = []
+        for version, indices in groups.items():
+            parts.append(self._parse_batch([buffers[i] for i in indices], start_offset, version))
+            order.extend(indices)
+
+        # Fields in layout order
+        rank = {name: i for i, name in enumerate(layout_names(self.schema.get("layout", [])))}
+        fields = []
+        for part in parts:
+            fields.extend(f for f in part.fields if f not in fields)
+        fields.sort(key=lambda f: rank.get(f, len(rank)))
+
+        inverse = np.empty(len(order), dtype=np.int64)
+        inverse[np.asarray(order, dtype=np.int64)] = np.arange(len(order))
+        columns = {}
+        for name in fields:
+            pieces = [part[name] if name in part.fields else ak.Array([None] * len(part)) for part in parts]
+            columns[name] = ak.concatenate(pieces)[inverse]
+        return ak.zip(columns, depth_limit=1)
+
+    def _numba_parser(self, version=None):
+        """Compiled batch parser for `version`, built on first use (None if the layout is not covered)."""
+        key = (self.bank_id, version if self.versioned else None)
+        if key not in self._batch_parsers:
+            from dst_awkward.numba_backend import build_batch_parser
+
+            self._batch_parsers[key] = build_batch_parser(
+                self.plan_for(version), schema_for_version(self.schema, version)
+            )
+        return self._batch_parsers[key]
 
-                # 'count' can be an integer or a string reference to a prior size
-                # 'size_ref' is an optional string reference to an array of sizes for each iteration
-                # sub-items must have 'name' and 'type', optional 'shape'
-                
-                if isinstance(field['count'], str):
-                    loop_count = int(ctx[field['count']])
-                else:
-                    loop_count = field['count']
-                
-                # Determine sizes per iteration
-                if 'size_ref' in field:
-                    sizes = ctx[field['size_ref']]
-                else:
-                    sizes = None 
-
-                # Create dictionary of sub-items with empty lists to accumulate data
-                temp_storage = {sub['name']: [] for sub in field['items']}
-                
-                for i in range(loop_count):
-                    # If sizes is None, we default to 1, but item['shape'] overrides it below
-                    current_size_base = int(sizes[i]) if sizes is not None else 1
-                    
-                    for sub_field in field['items']:
-                        dtype = self.dtypes[sub_field['type']]
-                        
-                        # Calculate specific item count
-                        item_count = current_size_base
-                        fixed_dims = [] # Keep track of dimensions
-
-                        if 'shape' in sub_field:
-                            for dim in sub_field['shape']:
-                                if isinstance(dim, str):
-                                    dim = int(ctx[dim])
-                                fixed_dims.append(dim)
-                                item_count *= dim 
-                        
-                        n_bytes = item_count * dtype.itemsize
-                        data = np.frombuffer(buffer, dtype=dtype, count=item_count, offset=cursor)
-                        cursor += n_bytes
-
-                        if fixed_dims:
-                            # If we have a dynamic base size (like 'nl1'), that is the first dimension
-                            shape = tuple(fixed_dims)
-                            if current_size_base > 1:
-                                shape = (current_size_base,) + shape
-                            
-                            # Reshape in place
-                            data = data.reshape(shape)
-
-                        temp_storage[sub_field['name']].append(data)
-
-                for k, v in temp_storage.items():
-                    results[k] = ak.Array(v)
-
-            # --- Case 3: Bulk Jagged (Generalized for Rank N) ---
-            elif f_type == 'bulk_jagged':
-                dtype = self.dtypes[field['dtype']]
-                name = field['name']
-
-                # 1. Resolve Hierarchy of Counts
-                # We normalize the schema input to a list of count variable names.
-                # New Schema Style: 'counts': ['ntracks', 'nhits']
-                # Old Schema Style: 'outer_counts': 'ntracks', 'inner_counts': 'nhits'
-                count_names = []
-                if 'counts' in field:
-                    c = field['counts']
-                    count_names = c if isinstance(c, list) else [c]
-                elif 'outer_counts' in field:
-                    count_names.append(field['outer_counts'])
-                    if 'inner_counts' in field:
-                        count_names.append(field['inner_counts'])
-                
-                # 2. Retrieve and Validate Count Arrays
-                # ak.unflatten expects 1D integer arrays. If the count array in `ctx` 
-                # is already jagged (e.g. 'nhits' was read as tracks->hits), we must 
-                # flatten it completely to use it as the definition for the data stream.
-                count_arrays = []
-                for c_name in count_names:
-                    c_arr = ctx[c_name]
-                    if isinstance(c_arr, ak.Array) and c_arr.ndim > 1:
-                        c_arr = ak.flatten(c_arr, axis=None)
-                    count_arrays.append(c_arr)
-
-                # 3. Calculate Total Elements
-                # The total payload size is determined by the sum of the innermost counts.
-                # If there are no counts (scalar), total is 1 (handled in Case 1 usually).
-                if count_arrays:
-                    innermost_counts = count_arrays[-1]
-                    total_elements = int(np.sum(innermost_counts))
-                else:
-                    # Fallback for weird edge cases or empty definitions
-                    total_elements = 0
-
-                # 4. Handle Item Shape (Fixed Dimensions like x,y,z)
-                # These are dimensions that happen *before* the jaggedness (the leaves).
-                item_shape = field.get('item_shape', [])
-                items_per_row = 1
-                for dim in item_shape: items_per_row *= dim
-
-                # 5. Read Raw Buffer
-                n_bytes = int(total_elements * items_per_row * dtype.itemsize)
-                raw = np.frombuffer(buffer, dtype=dtype, count=total_elements * items_per_row, offset=cursor)
-                cursor += n_bytes
-
-                # 6. Apply Item Shape (Fixed Reshape)
-                # If item_shape is [3], we reshape flat data to (N, 3)
-                if item_shape:
-                    raw = raw.reshape((total_elements,) + tuple(item_shape))
-
-                # 7. Iterative Unflattening (The Generalization)
-                # We apply counts in reverse order (Innermost -> Outermost).
-                # Example: Data -> unflatten(hits) -> unflatten(tracks) -> Event
-                current_data = raw
-                for cnt in reversed(count_arrays):
-                    current_data = ak.unflatten(current_data, cnt)
-
-                results[name] = current_data[0]
-                
-            # --- Case 4: Interleaved Mixed (New for RUSDGEOM) ---
-            # Handles loops where some items are dynamic (array-driven) and some are fixed
-            elif f_type == 'interleaved_mixed':
-                if isinstance(field['count'], str):
-                    loop_count = int(ctx[field['count']])
-                else:
-                    loop_count = field['count']
-                temp_storage = {sub['name']: [] for sub in field['items']}
-
-                for i in range(loop_count):
-                    for sub_field in field['items']:
-                        dtype = self.dtypes[sub_field['type']]
-                        
-                        # Calculate Count and Target Shape
-                        count = 1
-                        target_shape = []
-                        
-                        # 1. Dynamic Sizing (Outer dimension for this item)
-                        if 'size_from' in sub_field:
-                            dynamic_n = int(ctx[sub_field['size_from']][i])
-                            count *= dynamic_n
-                            target_shape.append(dynamic_n)
-
-                        # 2. Fixed Sizing (Inner dimensions)
-                        if 'shape' in sub_field:
-                            for dim in sub_field['shape']: 
-                                count *= dim
-                                target_shape.append(dim)
-                        
-                        n_bytes = count * dtype.itemsize
-                        data = np.frombuffer(buffer, dtype=dtype, count=count, offset=cursor)
-                        cursor += n_bytes
-                        
-                        # Reshape if we have structural dimensions
-                        if target_shape:
-                             # .reshape() handles (0, 2) correctly for empty arrays
-                             data = data.reshape(tuple(target_shape))
-                        temp_storage[sub_field['name']].append(data)
-
-                for k, v in temp_storage.items():
-                    results[k] = ak.Array(v)
-                    # We don't necessarily add mixed jagged arrays to ctx for sizing others
-
-        return results, cursor
-    
 # --- Helper to Simulate Reading from a File ---
 def read_dst_file(filename, schema_path):
     reader = BankReader(schema_path)
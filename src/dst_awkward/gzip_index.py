@@ -0,0 +1,415 @@
+"""
+Checkpoint index for random access into gzip-compressed DST files.
+
+This is a port of zlib's `zran.c` example. One pass over a `.dst.gz` file
+inflates it block by block (`Z_BLOCK`) and, roughly every `span` uncompressed
+bytes, saves a checkpoint at a deflate block boundary: the compressed byte
+offset, the number of bits of the previous byte already consumed, and the
+32 KB window of uncompressed data preceding it. Decompression can later be
+restarted at any checkpoint (`inflatePrime` + `inflateSetDictionary`), so a
+seek costs at most `span` bytes of inflation instead of decompressing from
+the start of the file.
+
+Python's `zlib` module exposes neither `Z_BLOCK` nor `inflatePrime`, so the
+system zlib is called through ctypes.
+
+The index is stored next to the data file (`run123.dst.gz` ->
+`run123.dst.gz.gzidx`) and picked up automatically by `DSTFile`. It records
+the size and the gzip trailer (CRC-32 and length of the last member) of the
+file it was built from; an index that does not match the file is ignored.
+With it, separate workers can process disjoint block ranges of one file:
+
+    with DSTFile("run123.dst.gz") as dst:
+        dst.seek(first_block)
+        for bank_id, ver, raw in dst.banks(stop_block=last_block):
+            ...
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import io
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from dst_awkward.dst_io import BLOCK_LEN
+
+GZIP_INDEX_SUFFIX = ".gzidx"
+GZIP_INDEX_FORMAT = 2
+
+WINSIZE = 32768              # Deflate window size
+CHUNK = 1 << 16              # Compressed bytes read per input refill
+DEFAULT_SPAN = 32 * BLOCK_LEN  # Uncompressed distance between checkpoints (~1 MB)
+
+# zlib constants
+Z_OK = 0
+Z_STREAM_END = 1
+Z_NEED_DICT = 2
+Z_BUF_ERROR = -5
+Z_NO_FLUSH = 0
+Z_BLOCK = 5
+
+_WBITS_RAW = -15    # Raw deflate (restarting at a checkpoint)
+_WBITS_GZIP = 31    # gzip header/trailer
+_WBITS_AUTO = 47    # Automatic zlib/gzip header detection
+
+
+def gzip_index_path(filename: str) -> str:
+    """Path of the gzip checkpoint index belonging to `filename`."""
+    return filename + GZIP_INDEX_SUFFIX
+
+
+def gzip_fingerprint(filename: str) -> tuple[int, bytes]:
+    """(size in bytes, 8-byte gzip trailer) of `filename`, as recorded in a GzipIndex."""
+    with open(filename, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - 8, 0))
+        return size, f.read(8)
+
+
+class _ZStream(ctypes.Structure):
+    _fields_ = [
+        ("next_in", ctypes.c_void_p),
+        ("avail_in", ctypes.c_uint),
+        ("total_in", ctypes.c_ulong),
+        ("next_out", ctypes.c_void_p),
+        ("avail_out", ctypes.c_uint),
+        ("total_out", ctypes.c_ulong),
+        ("msg", ctypes.c_char_p),
+        ("state", ctypes.c_void_p),
+        ("zalloc", ctypes.c_void_p),
+        ("zfree", ctypes.c_void_p),
+        ("opaque", ctypes.c_void_p),
+        ("data_type", ctypes.c_int),
+        ("adler", ctypes.c_ulong),
+        ("reserved", ctypes.c_ulong),
+    ]
+
+
+_libz = None
+
+
+def _zlib():
+    """Load the system zlib once and declare the functions we use."""
+    global _libz
+    if _libz is None:
+        path = ctypes.util.find_library("z")
+        if path is None:
+            raise OSError("gzip checkpoint index requires the zlib shared library (libz)")
+        lib = ctypes.CDLL(path)
+        lib.zlibVersion.restype = ctypes.c_char_p
+        p = ctypes.POINTER(_ZStream)
+        lib.inflateInit2_.argtypes = [p, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        lib.inflate.argtypes = [p, ctypes.c_int]
+        lib.inflateEnd.argtypes = [p]
+        lib.inflateReset2.argtypes = [p, ctypes.c_int]
+        lib.inflatePrime.argtypes = [p, ctypes.c_int, ctypes.c_int]
+        lib.inflateSetDictionary.argtypes = [p, ctypes.c_char_p, ctypes.c_uint]
+        _libz = lib
+    return _libz
+
+
+class _Inflater:
+    """Minimal ctypes wrapper around one zlib inflate stream."""
+
+    def __init__(self, wbits: int):
+        self.lib = _zlib()
+        self.strm = _ZStream()
+        ret = self.lib.inflateInit2_(
+            ctypes.byref(self.strm), wbits, self.lib.zlibVersion(), ctypes.sizeof(_ZStream)
+        )
+        if ret != Z_OK:
+            raise OSError(f"inflateInit2 failed ({ret})")
+        self.in_buf = ctypes.create_string_buffer(CHUNK)
+
+    def feed(self, data: bytes) -> None:
+        """Make `data` (at most CHUNK bytes) the pending input."""
+        ctypes.memmove(self.in_buf, data, len(data))
+        self.strm.next_in = ctypes.addressof(self.in_buf)
+        self.strm.avail_in = len(data)
+
+    def inflate(self, out_buf, out_pos: int, out_len: int, flush: int) -> tuple[int, int]:
+        """Inflate into out_buf[out_pos:out_pos+out_len]; returns (ret, bytes produced)."""
+        self.strm.next_out = ctypes.addressof(out_buf) + out_pos
+        self.strm.avail_out = out_len
+        ret = self.lib.inflate(ctypes.byref(self.strm), flush)
+        if ret not in (Z_OK, Z_STREAM_END, Z_BUF_ERROR):
+            msg = self.strm.msg.decode() if self.strm.msg else ""
+            raise OSError(f"inflate failed ({ret}) {msg}".strip())
+        return ret, out_len - self.strm.avail_out
+
+    def reset(self, wbits: int) -> None:
+        self.lib.inflateReset2(ctypes.byref(self.strm), wbits)
+
+    def prime(self, bits: int, value: int) -> None:
+        self.lib.inflatePrime(ctypes.byref(self.strm), bits, value)
+
+    def set_dictionary(self, window: bytes) -> None:
+        self.lib.inflateSetDictionary(ctypes.byref(self.strm), window, len(window))
+
+    def close(self) -> None:
+        if self.strm is not None:
+            self.lib.inflateEnd(ctypes.byref(self.strm))
+            self.strm = None
+
+    def __del__(self):
+        self.close()
+
+
+@dataclass
+class GzipIndex:
+    """Checkpoints for restarting decompression inside a gzip file."""
+
+    out_offset: np.ndarray   # Uncompressed offset of each checkpoint
+    in_offset: np.ndarray    # Compressed offset of the first whole byte after it
+    bits: np.ndarray         # Bits of the byte before in_offset still to be used
+    windows: np.ndarray      # (n, WINSIZE) uint8: uncompressed data preceding it
+    span: int
+    source_size: int = -1    # Size and gzip trailer of the file indexed
+    source_trailer: bytes = b""
+
+    def matches(self, filename: str) -> bool:
+        """Whether `filename` is still the gzip file this index was built from."""
+        return gzip_fingerprint(filename) == (self.source_size, self.source_trailer)
+
+    def checkpoint_for(self, offset: int) -> int:
+        """Index of the last checkpoint at or before uncompressed `offset`."""
+        return max(int(np.searchsorted(self.out_offset, offset, side="right")) - 1, 0)
+
+    def save(self, path: str) -> None:
+        # Pass a file object so numpy does not append '.npz' to the name
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                format=np.int32(GZIP_INDEX_FORMAT),
+                span=np.int64(self.span),
+                out_offset=self.out_offset,
+                in_offset=self.in_offset,
+                bits=self.bits,
+                windows=self.windows,
+                source_size=np.int64(self.source_size),
+                source_trailer=np.frombuffer(self.source_trailer, dtype=np.uint8),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> GzipIndex:
+        with np.load(path) as npz:
+            if int(npz["format"]) != GZIP_INDEX_FORMAT:
+                raise ValueError(f"{path}: unsupported gzip index format {int(npz['format'])}")
+            return cls(
+                out_offset=npz["out_offset"],
+                in_offset=npz["in_offset"],
+                bits=npz["bits"],
+                windows=npz["windows"],
+                span=int(npz["span"]),
+                source_size=int(npz["source_size"]),
+                source_trailer=npz["source_trailer"].tobytes(),
+            )
+
+
+def build_gzip_index(filename: str, span: int = DEFAULT_SPAN) -> GzipIndex:
+    """
+    Inflate `filename` once and record a checkpoint about every `span`
+    uncompressed bytes (zran's `build_index`).
+    """
+    out_offset, in_offset, bits, windows = [], [], [], []
+    window = ctypes.create_string_buffer(WINSIZE)
+    inf = _Inflater(_WBITS_AUTO)
+    totin = totout = 0
+    last = -1
+    win_pos = 0   # Write position in the circular window
+
+    with open(filename, "rb") as f:
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            inf.feed(data)
+
+            while inf.strm.avail_in:
+                if win_pos == WINSIZE:
+                    win_pos = 0
+
+                avail_in = inf.strm.avail_in
+                ret, produced = inf.inflate(window, win_pos, WINSIZE - win_pos, Z_BLOCK)
+                totin += avail_in - inf.strm.avail_in
+                totout += produced
+                win_pos += produced
+
+                if ret == Z_STREAM_END:
+                    # Concatenated gzip members: the next header follows
+                    inf.reset(_WBITS_AUTO)
+                    continue
+
+                # At the end of a deflate block (bit 7 set) that is not the
+                # last one (bit 6 clear): a valid restart point.
+                data_type = inf.strm.data_type
+                if (data_type & 128) and not (data_type & 64) and (last < 0 or totout - last > span):
+                    raw = window.raw
+                    out_offset.append(totout)
+                    in_offset.append(totin)
+                    bits.append(data_type & 7)
+                    # Unroll the circular window so it ends with the latest output
+                    windows.append(np.frombuffer(raw[win_pos:] + raw[:win_pos], dtype=np.uint8))
+                    last = totout
+
+    inf.close()
+    size, trailer = gzip_fingerprint(filename)
+
+    return GzipIndex(
+        out_offset=np.asarray(out_offset, dtype=np.int64),
+        in_offset=np.asarray(in_offset, dtype=np.int64),
+        bits=np.asarray(bits, dtype=np.uint8),
+        windows=np.stack(windows) if windows else np.zeros((0, WINSIZE), dtype=np.uint8),
+        span=span,
+        source_size=size,
+        source_trailer=trailer,
+    )
+
+
+class IndexedGzipFile(io.RawIOBase):
+    """
+    Read-only, seekable file object over a gzip file with a GzipIndex.
+
+    Sequential reads inflate like `gzip.open`; `seek` restarts at the nearest
+    checkpoint and inflates forward only to the requested offset.
+    """
+
+    def __init__(self, filename: str, index: GzipIndex):
+        self.filename = filename
+        self.index = index
+        self.raw_file = open(filename, "rb")
+        self.out_buf = ctypes.create_string_buffer(CHUNK)
+        self.inf = None
+        self.pos = 0          # Uncompressed position of the next byte returned
+        self.pending = b""    # Inflated bytes not yet returned
+        self.at_eof = False
+        self._restart(0)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def _restart(self, offset: int) -> None:
+        """Restart inflation at the last checkpoint before `offset`."""
+        if self.inf is not None:
+            self.inf.close()
+        self.pending = b""
+        self.at_eof = False
+        self.trailer = 0
+
+        if len(self.index.out_offset) == 0 or offset < self.index.out_offset[0]:
+            # Before the first checkpoint: start from the gzip header
+            self.inf = _Inflater(_WBITS_AUTO)
+            self.raw = False
+            self.raw_file.seek(0)
+            self.pos = 0
+            return
+
+        i = self.index.checkpoint_for(offset)
+        bits = int(self.index.bits[i])
+        start = int(self.index.in_offset[i])
+        self.inf = _Inflater(_WBITS_RAW)
+        self.raw = True
+        self.raw_file.seek(start - (1 if bits else 0))
+        if bits:
+            byte = self.raw_file.read(1)[0]
+            self.inf.prime(bits, byte >> (8 - bits))
+        self.inf.set_dictionary(self.index.windows[i].tobytes())
+        self.pos = int(self.index.out_offset[i])
+
+    def _inflate_chunk(self) -> bytes:
+        """Inflate up to CHUNK bytes; returns b'' only at end of file."""
+        while not self.at_eof:
+            if self.inf.strm.avail_in == 0:
+                data = self.raw_file.read(CHUNK)
+                if not data:
+                    self.at_eof = True
+                    break
+                self.inf.feed(data)
+
+            if self.trailer:
+                # Skip the 8-byte CRC/size trailer of a member inflated in raw mode
+                skip = min(self.trailer, self.inf.strm.avail_in)
+                self.inf.strm.next_in += skip
+                self.inf.strm.avail_in -= skip
+                self.trailer -= skip
+                if self.trailer == 0:
+                    self.inf.reset(_WBITS_GZIP)
+                    self.raw = False
+                continue
+
+            ret, produced = self.inf.inflate(self.out_buf, 0, CHUNK, Z_NO_FLUSH)
+            if ret == Z_STREAM_END:
+                if self.raw:
+                    self.trailer = 8
+                else:
+                    self.inf.reset(_WBITS_AUTO)
+            if produced:
+                return self.out_buf.raw[:produced]
+        return b""
+
+    def read(self, size=-1):
+        chunks = []
+        have = 0
+        while size < 0 or have < size:
+            if not self.pending:
+                self.pending = self._inflate_chunk()
+                if not self.pending:
+                    break
+            take = len(self.pending) if size < 0 else min(size - have, len(self.pending))
+            chunks.append(self.pending[:take])
+            self.pending = self.pending[take:]
+            have += take
+        self.pos += have
+        return b"".join(chunks)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("IndexedGzipFile only seeks from the start")
+
+        # Restart at a checkpoint unless the target is a short hop forward
+        if offset < self.pos or offset - self.pos > self.index.span:
+            self._restart(offset)
+
+        # Inflate forward to the target
+        while self.pos < offset:
+            if not self.read(min(offset - self.pos, CHUNK)):
+                break
+        return self.pos
+
+    def close(self):
+        if self.inf is not None:
+            self.inf.close()
+            self.inf = None
+        self.raw_file.close()
+        super().close()
+
+
+def open_indexed_gzip(filename: str, index: GzipIndex | None = None) -> IndexedGzipFile | None:
+    """
+    Open `filename` with its checkpoint index, or return None if no index is
+    given and none exists next to the file, or if the index does not match
+    the file (it was built from a different file, or in an older format).
+    """
+    if index is None:
+        path = gzip_index_path(filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            index = GzipIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+    if not index.matches(filename):
+        return None
+    return IndexedGzipFile(filename, index)
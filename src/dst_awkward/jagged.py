@@ -0,0 +1,116 @@
+"""
+Plain NumPy form of jagged bank fields.
+
+`BankReader.parse_buffer(..., raw_jagged=True)` returns `bulk_jagged` fields
+as `JaggedBuffers` (offsets per list level plus a flat content array) instead
+of Awkward arrays. Building an Awkward layout per bank has a large fixed cost,
+so callers processing many banks collect the buffers and build one layout
+for the whole batch with `JaggedBuffers.concatenate`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import awkward as ak
+import numpy as np
+
+
+@dataclass(frozen=True)
+class JaggedBuffers:
+    """
+    Nested lists as buffers.
+
+    `offsets[0]` is the outermost level; every offsets array starts at 0 and
+    ends at the length of the next level (or of `content` for the innermost
+    one). `content` has shape (n, *item_shape). With no offsets the field is
+    just `content`.
+    """
+
+    offsets: tuple[np.ndarray, ...]
+    content: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets[0]) - 1 if self.offsets else len(self.content)
+
+    def to_layout(self) -> ak.contents.Content:
+        layout = ak.contents.NumpyArray(self.content)
+        for offsets in reversed(self.offsets):
+            layout = ak.contents.ListOffsetArray(ak.index.Index64(offsets), layout)
+        return layout
+
+    def to_awkward(self) -> ak.Array:
+        """The same array BankReader returns when raw_jagged is False."""
+        return ak.Array(self.to_layout())
+
+    @staticmethod
+    def concatenate(parts: list[JaggedBuffers]) -> ak.Array:
+        """
+        One Awkward array with an entry per part (e.g. per bank), built from
+        a single concatenation of the buffers.
+        """
+        if not parts:
+            return ak.Array([])
+        depth = len(parts[0].offsets)
+        if any(len(p.offsets) != depth for p in parts):
+            raise ValueError("cannot concatenate jagged fields of different depth")
+
+        outer = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in parts], out=outer[1:])
+
+        levels = []
+        for k in range(depth):
+            pieces, base = [], 0
+            for p in parts:
+                pieces.append(p.offsets[k][:-1] + base)
+                base += int(p.offsets[k][-1])
+            pieces.append(np.array([base], dtype=np.int64))
+            levels.append(np.concatenate(pieces))
+
+        merged = JaggedBuffers((outer, *levels), np.concatenate([p.content for p in parts]))
+        return merged.to_awkward()
+
+
+def jagged_from_counts(content: np.ndarray, count_arrays: list) -> JaggedBuffers | None:
+    """
+    Buffers equivalent to unflattening `content` by `count_arrays` (innermost
+    last, as in a `bulk_jagged` field) and taking the first outer entry.
+
+    Array counts give list offsets directly; a scalar count n splits the level
+    into regular groups of n. Raises ValueError/IndexError where the Awkward
+    version would. Returns None for negative array counts, which the caller
+    should leave to Awkward.
+    """
+    if not count_arrays:
+        raise IndexError("bulk_jagged field without counts")
+
+    levels = []
+    length = len(content)
+    for cnt in reversed(count_arrays):
+        if np.ndim(cnt) == 0:
+            n = int(cnt)
+            if n < 0 or n > length:
+                raise ValueError("too large counts for array or negative counts")
+            groups = length // n if n else 0
+            offsets = np.arange(groups + 1, dtype=np.int64) * n
+        else:
+            cnt = np.asarray(cnt).ravel()
+            if len(cnt) and cnt.min() < 0:
+                return None
+            offsets = np.zeros(len(cnt) + 1, dtype=np.int64)
+            np.cumsum(cnt, out=offsets[1:])
+            if offsets[-1] != length:
+                raise ValueError("structure imposed by 'counts' does not fit in the array")
+        levels.insert(0, offsets)
+        length = len(offsets) - 1
+
+    # Select the first outer entry, rebasing the offsets below it to 0
+    if length == 0:
+        raise IndexError("index value out of bounds (0, 0): 0")
+    start, stop = int(levels[0][0]), int(levels[0][1])
+    inner = []
+    for offsets in levels[1:]:
+        offsets = offsets[start : stop + 1]
+        start, stop = int(offsets[0]), int(offsets[-1])
+        inner.append(offsets - start)
+    return JaggedBuffers(tuple(inner), content[start:stop])
@@ -0,0 +1,698 @@
+"""
+Optional Numba backend for `BankReader.parse_many`.
+
+The read plan of a schema is turned into the source of one `@njit` function
+that walks a single bank's bytes. Two drivers run it over a whole batch of
+banks concatenated into one byte array:
+
+- `measure` walks every bank and counts, per output column, the content
+  bytes and the number of list entries at each list level;
+- `fill` walks them again and copies values and list lengths into one flat
+  byte buffer and one flat int64 buffer preallocated from those counts
+  (each column owns a contiguous region of each).
+
+The buffers become the same RecordArray that the Python path builds with
+`columnar.ColumnAssembler`: scalars and fixed-shape fields are regular
+columns, everything with bank-dependent dims gets an offsets array per list
+level. A run of fixed-size fields is copied as one block per bank and split
+into its fields by NumPy afterwards.
+
+The kernel only covers what it can reproduce exactly. Schemas with layouts
+outside that (duplicate names inside a loop, `size_ref` items with shapes,
+counts that are not integer fields, ...) are not compiled. A batch with
+anything irregular in it (negative or inconsistent counts, a bank shorter
+than its counts imply) is reported back, and the caller parses it with the
+Python path. Errors and edge cases therefore behave exactly as before.
+
+Generated modules are written next to the code-generation cache (see
+schema_codegen) so that Numba's own cache can keep the machine code between
+processes. Numba is not a hard dependency: without it, `build_batch_parser`
+returns None.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import types
+
+import awkward as ak
+import numpy as np
+
+from dst_awkward.jagged import JaggedBuffers
+from dst_awkward.schema_codegen import cache_dir, schema_hash
+from dst_awkward.schema_compiler import (
+    BulkJaggedOp, DynamicField, FixedRun, MixedOp, SequenceOp,
+)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Bump when the generated kernels change, to invalidate cached modules
+KERNEL_VERSION = 2
+
+_PREAMBLE = '''\
+import numpy as np
+from numba import njit
+
+
+@njit(cache=CACHE)
+def _rd_i1(data, p):
+    v = np.int64(data[p])
+    return v - 256 if v >= 128 else v
+
+
+@njit(cache=CACHE)
+def _rd_i2(data, p):
+    v = np.int64(data[p]) | (np.int64(data[p + 1]) << 8)
+    return v - 65536 if v >= 32768 else v
+
+
+@njit(cache=CACHE)
+def _rd_i4(data, p):
+    v = (np.int64(data[p]) | (np.int64(data[p + 1]) << 8)
+         | (np.int64(data[p + 2]) << 16) | (np.int64(data[p + 3]) << 24))
+    return v - 4294967296 if v >= 2147483648 else v
+
+
+@njit(cache=CACHE)
+def _copy(dst, q, src, s, n):
+    # A plain loop over the two views vectorizes; slice assignment does not
+    d = dst[q:q + n]
+    t = src[s:s + n]
+    for k in range(n):
+        d[k] = t[k]
+'''
+
+_DRIVERS = '''
+
+@njit(cache=CACHE)
+def measure(data, starts, ends, cont, lev):
+    n = len(starts)
+    pc = np.zeros((n, NC), np.int64)
+    pl = np.zeros((n, NL), np.int64)
+    for b in range(n):
+        if _walk(data, starts[b], ends[b], b, pc, pl, cont, lev, False):
+            return pc, pl, b
+    return pc, pl, -1
+
+
+@njit(cache=CACHE)
+def fill(data, starts, ends, pc, pl, cont, lev):
+    for b in range(len(starts)):
+        _walk(data, starts[b], ends[b], b, pc, pl, cont, lev, True)
+'''
+
+
+class _Unsupported(Exception):
+    """The plan uses something the kernel generator does not handle."""
+
+
+class _Column:
+    """
+    Output column of a batch.
+
+    `depth` is the number of list levels (0 for scalar and fixed-shape
+    fields, whose full per-bank shape is `shape`). Content is copied as raw
+    bytes into region `content`; level k list lengths go to region
+    `levels[k]`. Fields of a fixed run share the run's region and are read
+    from it as field `key` of the run's `record` dtype.
+    """
+
+    __slots__ = ("name", "dtype", "shape", "item_shape", "depth", "content", "levels",
+                 "record", "key")
+
+    def __init__(self, name, dtype, shape, item_shape, depth, content, levels,
+                 record=None, key=None):
+        self.name = name
+        self.dtype = dtype
+        self.shape = shape
+        self.item_shape = item_shape
+        self.depth = depth
+        self.content = content
+        self.levels = levels
+        self.record = record
+        self.key = key
+
+    def layout(self, n_banks, content, levels):
+        if self.record is not None:
+            values = np.ascontiguousarray(content.view(self.record)[self.key])
+            return ak.contents.NumpyArray(values.reshape((n_banks,) + self.shape))
+        values = content.view(self.dtype)
+        if not self.depth:
+            return ak.contents.NumpyArray(values.reshape((n_banks,) + self.shape))
+        offsets = []
+        for counts in levels:
+            off = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=off[1:])
+            offsets.append(off)
+        rows = int(offsets[-1][-1])
+        return JaggedBuffers(tuple(offsets), values.reshape((rows,) + self.item_shape)).to_layout()
+
+
+def _var_depth(template):
+    """Number of leading dims that become list levels (see columnar.as_jagged)."""
+    return max((i + 1 for i, d in enumerate(template) if d is None), default=0)
+
+
+def _product(terms):
+    return " * ".join(terms) if terms else "1"
+
+
+class _Generator:
+    """Builds the `_walk` function of one plan."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.lines = []
+        self.columns = {}
+        self.n_content = 0
+        self.n_levels = 0
+        self.scalars = {}  # ctx name -> variable holding its int value
+        self.arrays = {}   # ctx name -> (position variable, length variable, reader, itemsize, ndim)
+        self.tmp = 0
+
+        # The last producer of a name supplies its column (as in the results dict)
+        self.final = {}
+        self.order = []
+        for i, op in enumerate(plan.ops):
+            for j, name in enumerate(self._produced(op)):
+                if name is None:
+                    continue
+                if name not in self.final:
+                    self.order.append(name)
+                self.final[name] = (i, j)
+
+    @staticmethod
+    def _produced(op):
+        """Output names of `op` by position, None for fields left out of a projection."""
+        if isinstance(op, FixedRun):
+            return [name for _, name, _, _ in op.fields]
+        if isinstance(op, (DynamicField, BulkJaggedOp)):
+            return [op.name if op.out else None]
+        if isinstance(op, (SequenceOp, MixedOp)):
+            return [None if name in op.skip else name for name in op.names]
+        raise _Unsupported(type(op).__name__)
+
+    def new_var(self, prefix):
+        self.tmp += 1
+        return f"{prefix}{self.tmp}"
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    # -- ctx values --------------------------------------------------------
+
+    @staticmethod
+    def _reader(dtype):
+        if dtype.kind != "i" or dtype.byteorder == ">" or dtype.itemsize not in (1, 2, 4):
+            return None
+        return f"_rd_i{dtype.itemsize}"
+
+    def scalar(self, ref):
+        """Code for a count or dimension: a literal or an earlier integer scalar."""
+        if isinstance(ref, int):
+            return str(ref)
+        if ref not in self.scalars:
+            raise _Unsupported(f"{ref!r} is not an integer scalar field")
+        return self.scalars[ref]
+
+    def array(self, name, one_dim=True):
+        if name not in self.arrays or (one_dim and self.arrays[name][4] != 1):
+            raise _Unsupported(f"{name!r} is not an integer array field")
+        return self.arrays[name]
+
+    def keep(self, name, dtype, pos_code, length_code, ndim, d):
+        """Record where a kept field lives so that later ops can read it."""
+        self.scalars.pop(name, None)
+        self.arrays.pop(name, None)
+        reader = self._reader(dtype)
+        if reader is None:
+            return
+        if ndim is None:
+            var = self.new_var("v")
+            self.emit(d, f"{var} = {reader}(data, {pos_code})")
+            self.scalars[name] = var
+        else:
+            pos, length = self.new_var("a"), self.new_var("n")
+            self.emit(d, f"{pos} = {pos_code}")
+            self.emit(d, f"{length} = {length_code}")
+            self.arrays[name] = (pos, length, reader, dtype.itemsize, ndim)
+
+    # -- columns -----------------------------------------------------------
+
+    def new_content(self):
+        self.n_content += 1
+        return self.n_content - 1
+
+    def column(self, name, dtype, template, item_shape=None, **run):
+        """New column for `name` with the given per-bank template."""
+        depth = _var_depth(template)
+        if depth == 0:
+            shape, item_shape = tuple(template), ()
+        else:
+            shape = None
+            item_shape = tuple(template[depth:]) if item_shape is None else item_shape
+        content = run.pop("content") if run else self.new_content()
+        col = _Column(name, dtype, shape, item_shape, depth, content,
+                      list(range(self.n_levels, self.n_levels + depth)), **run)
+        self.n_levels += depth
+        self.columns[name] = col
+        return col
+
+    def copy(self, slot, d, src, nbytes):
+        self.emit(d, "if fill:")
+        self.emit(d + 1, f"q = pc[b, {slot}]")
+        self.emit(d + 1, f"_copy(cont, q, data, {src}, {nbytes})")
+        self.emit(d, f"pc[b, {slot}] += {nbytes}")
+
+    def entry(self, col, level, d, value):
+        """Append one list length at `level`."""
+        slot = col.levels[level]
+        self.emit(d, "if fill:")
+        self.emit(d + 1, f"lev[pl[b, {slot}]] = {value}")
+        self.emit(d, f"pl[b, {slot}] += 1")
+
+    def dim_levels(self, col, dims, d):
+        """List lengths of an array of shape `dims` viewed as `col.depth` levels."""
+        if col.depth == 0:
+            return
+        self.entry(col, 0, d, dims[0])
+        for k in range(1, col.depth):
+            slot = col.levels[k]
+            m = self.new_var("m")
+            self.emit(d, f"{m} = {_product(dims[:k])}")
+            self.emit(d, "if fill:")
+            self.emit(d + 1, f"q = pl[b, {slot}]")
+            self.emit(d + 1, f"for t in range({m}):")
+            self.emit(d + 2, f"lev[q + t] = {dims[k]}")
+            self.emit(d, f"pl[b, {slot}] += {m}")
+
+    def check_dims(self, dims, d):
+        runtime = [x for x in dims if not x.lstrip("-").isdigit()]
+        if any(x.startswith("-") for x in dims if x not in runtime):
+            raise _Unsupported("negative literal dimension")
+        if runtime:
+            self.emit(d, f"if {' or '.join(f'{x} < 0' for x in runtime)}:")
+            self.emit(d + 1, "return 1")
+
+    # -- ops ---------------------------------------------------------------
+
+    def fixed_run(self, i, op):
+        self.emit(1, f"if p + {op.nbytes} > end:")
+        self.emit(2, "return 1")
+        slot = None
+        for j, (key, name, shape, keep) in enumerate(op.fields):
+            fdt, off = op.record.fields[key][:2]
+            if keep:
+                ndim = len(shape) if shape else None
+                length = int(np.prod(shape, dtype=np.int64)) if shape else 1
+                self.keep(name, fdt.base, f"p + {off}", str(length), ndim, 1)
+            if self.final.get(name) == (i, j):
+                if slot is None:
+                    slot = self.new_content()
+                self.column(name, fdt.base, tuple(shape) if shape else (),
+                            content=slot, record=op.record, key=key)
+        for key, name, shape in op.ctx_only:
+            fdt, off = op.record.fields[key][:2]
+            ndim = len(shape) if shape else None
+            length = int(np.prod(shape, dtype=np.int64)) if shape else 1
+            self.keep(name, fdt.base, f"p + {off}", str(length), ndim, 1)
+        if slot is not None:
+            self.copy(slot, 1, "p", op.nbytes)
+        self.emit(1, f"p += {op.nbytes}")
+
+    def dynamic(self, i, op):
+        dims = []
+        for dim in op.dims:
+            var = self.new_var("d")
+            self.emit(1, f"{var} = {self.scalar(dim)}")
+            dims.append(var)
+        self.check_dims(dims, 1)
+        nbytes = self.new_var("nb")
+        self.emit(1, f"{nbytes} = {_product(dims)} * {op.dtype.itemsize}")
+        self.emit(1, f"if p + {nbytes} > end:")
+        self.emit(2, "return 1")
+        if op.keep:
+            self.keep(op.name, op.dtype, "p", _product(dims), len(dims), 1)
+        if self.final.get(op.name) == (i, 0):
+            template = tuple(x if isinstance(x, int) else None for x in op.dims)
+            col = self.column(op.name, op.dtype, template)
+            self.dim_levels(col, dims, 1)
+            self.copy(col.content, 1, "p", nbytes)
+        self.emit(1, f"p += {nbytes}")
+
+    def sequence(self, i, op):
+        if len(set(op.names)) != len(op.names):
+            raise _Unsupported("duplicate names in interleaved_sequence")
+        if isinstance(op.count, int) and op.count < 0:
+            raise _Unsupported("negative literal count")
+        if op.size_ref is None:
+            self._sequence_records(i, op)
+        elif not any(dims for _, _, dims in op.items):
+            self._sequence_offsets(i, op)
+        else:
+            raise _Unsupported("size_ref sequence with item shapes")
+
+    def _sequence_records(self, i, op):
+        n = self.new_var("c")
+        self.emit(1, f"{n} = {self.scalar(op.count)}")
+        # Item dims are only evaluated for a non-empty sequence
+        item_dims = []
+        for _, _, dims in op.items:
+            resolved = []
+            for dim in dims or (1,):
+                if isinstance(dim, int):
+                    resolved.append(str(dim))
+                else:
+                    var = self.new_var("d")
+                    self.emit(1, f"{var} = {self.scalar(dim)} if {n} > 0 else 0")
+                    resolved.append(var)
+            item_dims.append(resolved)
+        self.emit(1, f"if {n} < 0:")
+        self.emit(2, f"{n} = 0")
+        self.check_dims([x for dims in item_dims for x in dims], 1)
+
+        sizes = []
+        for (_, dtype, _), dims in zip(op.items, item_dims):
+            var = self.new_var("ib")
+            self.emit(1, f"{var} = {_product(dims)} * {dtype.itemsize}")
+            sizes.append(var)
+        rec = self.new_var("rec")
+        self.emit(1, f"{rec} = {' + '.join(sizes)}")
+        self.emit(1, f"if p + {n} * {rec} > end:")
+        self.emit(2, "return 1")
+
+        start = "0"
+        for j, ((name, dtype, dims), resolved, size) in enumerate(zip(op.items, item_dims, sizes)):
+            if self.final.get(name) == (i, j):
+                count = op.count if isinstance(op.count, int) else None
+                template = (count,) + (tuple(x if isinstance(x, int) else None for x in dims) if dims else (1,))
+                col = self.column(name, dtype, template)
+                self.dim_levels(col, [n] + resolved, 1)
+                self.emit(1, "if fill:")
+                self.emit(2, f"q = pc[b, {col.content}]")
+                self.emit(2, f"for r in range({n}):")
+                self.emit(3, f"s = p + r * {rec} + {start}")
+                self.emit(3, f"_copy(cont, q + r * {size}, data, s, {size})")
+                self.emit(1, f"pc[b, {col.content}] += {n} * {size}")
+            start = f"{start} + {size}"
+        self.emit(1, f"p += {n} * {rec}")
+
+    def _sequence_offsets(self, i, op):
+        pos, length, reader, itemsize, _ = self.array(op.size_ref)
+        n, total = self.new_var("c"), self.new_var("tot")
+        self.emit(1, f"{n} = {self.scalar(op.count)}")
+        self.emit(1, f"if {n} < 0 or {n} > {length}:")
+        self.emit(2, "return 1")
+        self.emit(1, f"{total} = 0")
+        self.emit(1, f"for r in range({n}):")
+        self.emit(2, f"s = {reader}(data, {pos} + r * {itemsize})")
+        self.emit(2, "if s < 0:")
+        self.emit(3, "return 1")
+        self.emit(2, f"{total} += s")
+        row = sum(dtype.itemsize for _, dtype, _ in op.items)
+        self.emit(1, f"if p + {total} * {row} > end:")
+        self.emit(2, "return 1")
+
+        start = 0
+        for j, (name, dtype, _) in enumerate(op.items):
+            if self.final.get(name) == (i, j):
+                col = self.column(name, dtype, (None, None), item_shape=())
+                self.entry(col, 0, 1, n)
+                lslot = col.levels[1]
+                self.emit(1, "if fill:")
+                self.emit(2, f"q = pc[b, {col.content}]")
+                self.emit(2, "u = 0")
+                self.emit(2, f"for r in range({n}):")
+                self.emit(3, f"s = {reader}(data, {pos} + r * {itemsize})")
+                self.emit(3, f"lev[pl[b, {lslot}] + r] = s")
+                self.emit(3, f"src = p + u * {row} + s * {start}")
+                self.emit(3, f"_copy(cont, q, data, src, s * {dtype.itemsize})")
+                self.emit(3, f"q += s * {dtype.itemsize}")
+                self.emit(3, "u += s")
+                self.emit(1, f"pl[b, {lslot}] += {n}")
+                self.emit(1, f"pc[b, {col.content}] += {total} * {dtype.itemsize}")
+            start += dtype.itemsize
+        self.emit(1, f"p += {total} * {row}")
+
+    def bulk_jagged(self, i, op):
+        if not op.count_names:
+            raise _Unsupported("bulk_jagged without counts")
+        refs = []
+        for name in op.count_names:
+            if name in self.scalars:
+                refs.append(("scalar", self.scalars[name]))
+            elif name in self.arrays:
+                refs.append(("array", self.arrays[name]))
+            else:
+                raise _Unsupported(f"{name!r} is not an integer field")
+
+        rows, nbytes = self.new_var("rows"), self.new_var("nb")
+        kind, ref = refs[-1]
+        if kind == "scalar":
+            self.emit(1, f"{rows} = {ref}")
+        else:
+            pos, length, reader, itemsize, _ = ref
+            self.emit(1, f"{rows} = 0")
+            self.emit(1, f"for r in range({length}):")
+            self.emit(2, f"{rows} += {reader}(data, {pos} + r * {itemsize})")
+        row_bytes = op.items_per_row * op.dtype.itemsize
+        self.emit(1, f"if {rows} < 0:")
+        self.emit(2, "return 1")
+        self.emit(1, f"{nbytes} = {rows} * {row_bytes}")
+        self.emit(1, f"if p + {nbytes} > end:")
+        self.emit(2, "return 1")
+
+        # Offsets per level, innermost first, as in jagged.jagged_from_counts
+        length = self.new_var("ln")
+        self.emit(1, f"{length} = {rows}")
+        levels = [None] * len(refs)
+        for k in range(len(refs) - 1, -1, -1):
+            kind, ref = refs[k]
+            lv = levels[k] = self.new_var("lv")
+            if kind == "scalar":
+                self.emit(1, f"if {ref} < 0 or {ref} > {length}:")
+                self.emit(2, "return 1")
+                self.emit(1, f"{lv} = np.arange(({length} // {ref} if {ref} else 0) + 1) * {ref}")
+            else:
+                pos, count, reader, itemsize, _ = ref
+                self.emit(1, f"{lv} = np.zeros({count} + 1, np.int64)")
+                self.emit(1, f"for r in range({count}):")
+                self.emit(2, f"s = {reader}(data, {pos} + r * {itemsize})")
+                self.emit(2, "if s < 0:")
+                self.emit(3, "return 1")
+                self.emit(2, f"{lv}[r + 1] = {lv}[r] + s")
+                self.emit(1, f"if {lv}[{count}] != {length}:")
+                self.emit(2, "return 1")
+            self.emit(1, f"{length} = len({lv}) - 1")
+        self.emit(1, f"if {length} == 0:")
+        self.emit(2, "return 1")
+
+        if self.final.get(op.name) == (i, 0):
+            template = (None,) * len(refs) + op.item_shape
+            col = self.column(op.name, op.dtype, template, item_shape=op.item_shape)
+            st, sp = self.new_var("st"), self.new_var("sp")
+            self.emit(1, f"{st} = {levels[0]}[0]")
+            self.emit(1, f"{sp} = {levels[0]}[1]")
+            self.entry(col, 0, 1, f"{sp} - {st}")
+            for k in range(1, len(refs)):
+                slot = col.levels[k]
+                lv = levels[k]
+                self.emit(1, "if fill:")
+                self.emit(2, f"q = pl[b, {slot}]")
+                self.emit(2, f"for u in range({st}, {sp}):")
+                self.emit(3, f"lev[q + u - {st}] = {lv}[u + 1] - {lv}[u]")
+                self.emit(1, f"pl[b, {slot}] += {sp} - {st}")
+                self.emit(1, f"{st}, {sp} = {lv}[{st}], {lv}[{sp}]")
+            self.copy(col.content, 1, f"p + {st} * {row_bytes}", f"({sp} - {st}) * {row_bytes}")
+        self.emit(1, f"p += {nbytes}")
+
+    def mixed(self, i, op):
+        if len(set(op.names)) != len(op.names):
+            raise _Unsupported("duplicate names in interleaved_mixed")
+        if isinstance(op.count, int) and op.count < 0:
+            raise _Unsupported("negative literal count")
+        n = self.new_var("c")
+        self.emit(1, f"{n} = {self.scalar(op.count)}")
+        self.emit(1, f"if {n} < 0:")
+        self.emit(2, "return 1")
+        for size_from in dict.fromkeys(item[2] for item in op.items if item[2] is not None):
+            pos, length, reader, itemsize, _ = self.array(size_from)
+            self.emit(1, f"if {length} < {n}:")
+            self.emit(2, "return 1")
+            self.emit(1, f"for r in range({n}):")
+            self.emit(2, f"if {reader}(data, {pos} + r * {itemsize}) < 0:")
+            self.emit(3, "return 1")
+
+        count = op.count if isinstance(op.count, int) else None
+        cols = []
+        for j, (name, dtype, size_from, shape, _) in enumerate(op.items):
+            col = None
+            if self.final.get(name) == (i, j):
+                if size_from is not None:
+                    col = self.column(name, dtype, (None, None) + shape, item_shape=shape)
+                else:
+                    col = self.column(name, dtype, (count,) + (shape or (1,)))
+                if col.depth:
+                    self.entry(col, 0, 1, n)
+            cols.append(col)
+
+        self.emit(1, f"for r in range({n}):")
+        for (name, dtype, size_from, shape, fixed_count), col in zip(op.items, cols):
+            per = fixed_count * dtype.itemsize
+            if size_from is not None:
+                pos, _, reader, itemsize, _ = self.array(size_from)
+                self.emit(2, f"s = {reader}(data, {pos} + r * {itemsize})")
+                self.emit(2, f"nb = s * {per}")
+            else:
+                self.emit(2, f"nb = {per}")
+            self.emit(2, "if p + nb > end:")
+            self.emit(3, "return 1")
+            if col is not None:
+                if size_from is not None:
+                    self.entry(col, 1, 2, "s")
+                self.copy(col.content, 2, "p", "nb")
+            self.emit(2, "p += nb")
+
+    def generate(self):
+        self.emit(0, "@njit(cache=CACHE)")
+        self.emit(0, "def _walk(data, p, end, b, pc, pl, cont, lev, fill):")
+        for i, op in enumerate(self.plan.ops):
+            self.emit(1, f"# {type(op).__name__}")
+            if isinstance(op, FixedRun):
+                self.fixed_run(i, op)
+            elif isinstance(op, DynamicField):
+                self.dynamic(i, op)
+            elif isinstance(op, SequenceOp):
+                self.sequence(i, op)
+            elif isinstance(op, BulkJaggedOp):
+                self.bulk_jagged(i, op)
+            elif isinstance(op, MixedOp):
+                self.mixed(i, op)
+            else:
+                raise _Unsupported(type(op).__name__)
+        self.emit(1, "return 0")
+
+        source = (_PREAMBLE + f"\nNC = {self.n_content}\nNL = {self.n_levels}\n\n\n"
+                  + "\n".join(self.lines) + "\n" + _DRIVERS)
+        return source, [self.columns[name] for name in self.order]
+
+
+def generate_kernel_source(plan) -> tuple[str, list]:
+    """
+    Source of the Numba kernel module for `plan` and its output columns, in
+    field order. Raises _Unsupported for plans the kernel does not cover.
+    """
+    return _Generator(plan).generate()
+
+
+def _regions(sizes, align):
+    """
+    Write positions for per-(bank, region) sizes laid out region after region
+    in one buffer, each region starting on an `align` boundary. Returns
+    (positions, region starts, buffer size).
+    """
+    totals = sizes.sum(axis=0)
+    padded = -(-totals // align) * align
+    base = np.zeros(len(totals) + 1, dtype=np.int64)
+    np.cumsum(padded, out=base[1:])
+    # Each bank writes from the end of the previous bank's output
+    positions = base[:-1] + np.cumsum(sizes, axis=0) - sizes
+    return positions, base[:-1], int(base[-1])
+
+
+class NumbaBatchParser:
+    """Runs the compiled kernel of one bank type over batches of banks."""
+
+    def __init__(self, module, columns):
+        self.module = module
+        self.columns = columns
+
+    def parse_many(self, buffers, start_offset=8) -> ak.Array | None:
+        """
+        One RecordArray for `buffers`, equal to the Python parse_many result,
+        or None if some bank needs the Python path.
+        """
+        if not buffers:
+            return None
+        lengths = np.fromiter(map(len, buffers), dtype=np.int64, count=len(buffers))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths + start_offset
+        data = np.frombuffer(b"".join(buffers), dtype=np.uint8)
+
+        empty = np.empty(0, np.uint8)
+        pc, pl, bad = self.module.measure(data, starts, ends, empty, np.empty(0, np.int64))
+        if bad >= 0:
+            return None
+
+        # Content regions are 8-byte aligned so that they can be viewed as any dtype
+        pos_c, base_c, size_c = _regions(pc, 8)
+        pos_l, base_l, size_l = _regions(pl, 1)
+        cont = np.empty(size_c, np.uint8)
+        lev = np.empty(size_l, np.int64)
+        self.module.fill(data, starts, ends, pos_c, pos_l, cont, lev)
+
+        n_banks = len(buffers)
+        total_c = pc.sum(axis=0)
+        total_l = pl.sum(axis=0)
+        contents = []
+        for col in self.columns:
+            c = col.content
+            content = cont[base_c[c] : base_c[c] + total_c[c]]
+            levels = [lev[base_l[k] : base_l[k] + total_l[k]] for k in col.levels]
+            contents.append(col.layout(n_banks, content, levels))
+        fields = [col.name for col in self.columns]
+        return ak.Array(ak.contents.RecordArray(contents, fields, length=n_banks))
+
+
+def _load_module(name, source, path):
+    """
+    Import the generated module from `path`, writing it first if needed.
+    Numba can only cache functions that live in a file.
+    """
+    try:
+        if not path.exists() or path.read_text() != source:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(source)
+            os.replace(tmp, path)
+    except OSError:
+        # No cache directory: compile in memory, without Numba's cache
+        namespace = {"CACHE": False}
+        exec(compile(source, f"<{name}>", "exec"), namespace)
+        return types.SimpleNamespace(**namespace)
+
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.CACHE = True
+    # Numba's cache re-imports the module by name when loading a kernel
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_batch_parser(plan, schema: dict) -> NumbaBatchParser | None:
+    """
+    Numba batch parser for `plan`, or None when Numba is not installed or the
+    plan uses layouts the kernel does not cover.
+    """
+    if numba is None:
+        return None
+    try:
+        source, columns = generate_kernel_source(plan)
+    except _Unsupported:
+        return None
+
+    bank = schema.get("name", "bank")
+    tag = f"{bank}-{schema_hash(schema, plan.fields)}-nb{KERNEL_VERSION}"
+    module = _load_module(f"dst_awkward_kernel_{tag.replace('-', '_')}", source,
+                          cache_dir() / f"{tag}.py")
+    return NumbaBatchParser(module, columns)
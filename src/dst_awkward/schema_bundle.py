@@ -0,0 +1,138 @@
+"""
+Precompiled bundle of all bank schemas.
+
+Parsing the YAML schemas is most of the startup time of the CLI tools. The
+bundle holds, for every file in `schemas/`, the parsed schema, its bank_id
+and its compiled read-plan ops. It is built on first use and pickled to
+
+    $DST_AWKWARD_CACHE/schemas-<dir hash>.pickle   (default ~/.cache/dst_awkward)
+
+Later runs only stat the YAML files and unpickle the bundle. The bundle
+records the name, size and modification time of every YAML file and a hash
+of the source of every module whose objects it pickles (PICKLED_MODULES); if
+any of them changes (or a file is added or removed), the bundle is rebuilt.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from dst_awkward import columnar, conditional_bank_utils, jagged, schema_codegen, schema_compiler
+from dst_awkward.schema_codegen import cache_dir
+from dst_awkward.schema_compiler import compile_ops, schema_dtypes, schema_for_version
+
+SCHEMAS_DIR = Path(__file__).parent / "schemas"
+
+# Bump when the bundle contents change, to invalidate cached bundles
+BUNDLE_VERSION = 2
+
+# Modules defining (or used by) the pickled ops: an edit to any of them must
+# rebuild the ops even when no YAML file changed
+PICKLED_MODULES = (schema_compiler, conditional_bank_utils, jagged, columnar, schema_codegen)
+
+# libyaml's loader when PyYAML was built with it
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_bundle = None
+
+
+@dataclass
+class SchemaBundle:
+    """
+    Attributes:
+        fingerprint: Identifies the YAML files the bundle was built from.
+        schemas: Bank name (file stem) -> parsed schema.
+        bank_ids: Bank name -> bank_id (None if the schema has none).
+        ops: Bank name -> compiled read-plan ops.
+        errors: Bank name -> message for files that failed to load or compile.
+    """
+
+    fingerprint: str
+    schemas: dict = field(default_factory=dict)
+    bank_ids: dict = field(default_factory=dict)
+    ops: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+
+def schema_files(schemas_dir: Path = SCHEMAS_DIR) -> list[Path]:
+    return sorted(list(schemas_dir.glob("*.yml")) + list(schemas_dir.glob("*.yaml")))
+
+
+def fingerprint(files: list[Path]) -> str:
+    """
+    Hash of the names, sizes and modification times of `files`, and of the
+    sources of PICKLED_MODULES.
+    """
+    h = hashlib.sha256(f"bundle {BUNDLE_VERSION}".encode())
+    for module in PICKLED_MODULES:
+        h.update(Path(module.__file__).read_bytes())
+    for path in files:
+        st = path.stat()
+        h.update(f"{path.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def build_bundle(schemas_dir: Path = SCHEMAS_DIR) -> SchemaBundle:
+    """Parse and compile every schema in `schemas_dir`."""
+    files = schema_files(schemas_dir)
+    bundle = SchemaBundle(fingerprint(files))
+    for path in files:
+        name = path.stem
+        try:
+            with open(path, "r") as f:
+                schema = yaml.load(f, Loader=_Loader)
+            bundle.bank_ids[name] = schema.get("bank_id")
+            # The plan for banks of unknown version (see BankReader.plan)
+            bundle.ops[name] = compile_ops(schema_for_version(schema, None), schema_dtypes(schema))
+            bundle.schemas[name] = schema
+        except Exception as e:
+            bundle.errors[name] = str(e)
+    return bundle
+
+
+def bundle_path(schemas_dir: Path = SCHEMAS_DIR) -> Path:
+    # One bundle per installation, so that several environments can share the cache
+    tag = hashlib.sha256(str(schemas_dir.resolve()).encode()).hexdigest()[:12]
+    return cache_dir().parent / f"schemas-{tag}.pickle"
+
+
+def load_bundle() -> SchemaBundle:
+    """
+    The schema bundle for this installation: from memory, from the on-disk
+    cache if it is still current, or freshly built (and cached). The YAML
+    files are checked once per process.
+    """
+    global _bundle
+    if _bundle is not None:
+        return _bundle
+
+    current = fingerprint(schema_files())
+
+    path = bundle_path()
+    bundle = None
+    try:
+        with open(path, "rb") as f:
+            bundle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+
+    if not isinstance(bundle, SchemaBundle) or bundle.fingerprint != current:
+        bundle = build_bundle()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp, "wb") as f:
+                pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            # Read-only or missing cache directory: just don't cache
+            pass
+
+    _bundle = bundle
+    return bundle
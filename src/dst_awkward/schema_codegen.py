@@ -0,0 +1,148 @@
+"""
+Generated Python parsers for compiled read plans.
+
+`generate_source` turns a `ReadPlan` into the source of one straight-line
+function. Fixed runs and data-dependent primitive fields are inlined: their
+record/field dtypes, byte sizes, dict keys and shape expressions are written
+into the code as constants. The composite layouts (sequences, bulk_jagged,
+mixed loops) call their compiled ops directly. Nothing is dispatched per
+field at parse time.
+
+The compiled code object is cached on disk, keyed by a hash of the schema
+contents (plus the generator and Python versions) and of the generated source,
+so the next process only unmarshals it:
+
+    $DST_AWKWARD_CACHE/parsers/<bank>-<hash>-<source hash>.code   (default ~/.cache/dst_awkward)
+
+A `.py` file with the generated source is written alongside for inspection.
+Set DST_AWKWARD_CODEGEN=0 to use the plan interpreter instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from dst_awkward.schema_compiler import DynamicField, FixedRun
+
+# Bump when the generated code changes shape, to invalidate cached parsers
+CODEGEN_VERSION = 1
+
+
+def codegen_enabled() -> bool:
+    return os.environ.get("DST_AWKWARD_CODEGEN", "1") != "0"
+
+
+def cache_dir() -> Path:
+    root = os.environ.get("DST_AWKWARD_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "dst_awkward"
+    )
+    return Path(root) / "parsers"
+
+
+def schema_hash(schema: dict, fields=None) -> str:
+    """
+    Content hash of a schema, independent of YAML formatting, and of the
+    projected `fields` (ReadPlan.fields) if any.
+    """
+    key = {"codegen": CODEGEN_VERSION, "python": sys.version, "schema": schema}
+    if fields is not None:
+        key["fields"] = list(fields)
+    key = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode()).hexdigest()[:20]
+
+
+def generate_source(plan) -> tuple[str, dict]:
+    """
+    Source of `parse(buffer, cursor) -> (results, cursor)` for `plan`, and the
+    constants (dtypes, ops) it refers to by name.
+    """
+    constants = {"_frombuffer": np.frombuffer}
+    lines = ["def parse(buffer, cursor):", "    ctx = {}", "    results = {}"]
+
+    for i, op in enumerate(plan.ops):
+        if isinstance(op, FixedRun):
+            rec = f"_rec{i}"
+            constants[rec] = op.record
+            lines.append(f"    # fixed run: {len(op.fields)} fields, {op.nbytes} bytes")
+            lines.append(f"    rec = _frombuffer(buffer, {rec}, 1, cursor)")
+            for key, name, _, keep in op.fields:
+                lines.append(f"    v = rec[{key!r}][0]")
+                lines.append(f"    results[{name!r}] = v")
+                if keep:
+                    lines.append(f"    ctx[{name!r}] = v")
+            for key, name, _ in op.ctx_only:
+                lines.append(f"    ctx[{name!r}] = rec[{key!r}][0]")
+            lines.append(f"    cursor += {op.nbytes}")
+
+        elif isinstance(op, DynamicField):
+            dt = f"_dt{i}"
+            constants[dt] = op.dtype
+            dims = []
+            lines.append(f"    # {op.name}: shape {list(op.dims)}")
+            for j, d in enumerate(op.dims):
+                if isinstance(d, str):
+                    lines.append(f"    d{j} = int(ctx[{d!r}])")
+                    dims.append(f"d{j}")
+                else:
+                    dims.append(repr(d))
+            lines.append(f"    n = {' * '.join(dims) or '1'}")
+            if op.out or op.keep:
+                lines.append(f"    v = _frombuffer(buffer, {dt}, n, cursor).reshape(({', '.join(dims)},))")
+            else:
+                lines.append(f"    _frombuffer(buffer, {dt}, n, cursor)")
+            if op.out:
+                lines.append(f"    results[{op.name!r}] = v")
+            if op.keep:
+                lines.append(f"    ctx[{op.name!r}] = v")
+            lines.append(f"    cursor += n * {op.dtype.itemsize}")
+
+        else:
+            name = f"_op{i}"
+            constants[name] = op.read
+            lines.append(f"    # {type(op).__name__}")
+            lines.append(f"    cursor = {name}(buffer, cursor, ctx, results)")
+
+    lines.append("    return results, cursor")
+    return "\n".join(lines) + "\n", constants
+
+
+def build_parser(plan, schema: dict):
+    """
+    Generated parse function for `plan`, loaded from the on-disk cache when
+    possible and compiled (and cached) otherwise.
+    """
+    source, constants = generate_source(plan)
+    name = schema.get("name", "bank")
+    # The source is part of the key: a change to the generator or the op
+    # classes changes the code even when the schema and CODEGEN_VERSION don't
+    source_key = hashlib.sha256(source.encode()).hexdigest()[:12]
+    path = cache_dir() / f"{name}-{schema_hash(schema, plan.fields)}-{source_key}.code"
+
+    code = None
+    try:
+        code = marshal.loads(path.read_bytes())
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+
+    if code is None:
+        code = compile(source, f"<dst_awkward generated parser: {name}>", "exec")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_bytes(marshal.dumps(code))
+            os.replace(tmp, path)
+            path.with_suffix(".py").write_text(source)
+        except OSError:
+            # Read-only or missing cache directory: just don't cache
+            pass
+
+    namespace = dict(constants)
+    exec(code, namespace)
+    return namespace["parse"]
@@ -0,0 +1,1090 @@
+"""
+Compile YAML bank schemas into read plans.
+
+`BankReader` used to walk `schema['layout']` for every bank it parsed,
+re-checking type strings, looking up dtypes and resolving shapes each time.
+`compile_schema` does that work once per bank type. The result is a
+`ReadPlan`, a flat list of ops that `BankReader.parse_buffer` runs per bank:
+
+- `FixedRun`: consecutive primitive fields whose shapes are all literal
+  integers, decoded together through one structured dtype.
+- `DynamicField`: a primitive field whose shape refers to earlier fields.
+- `SequenceOp`, `BulkJaggedOp`, `MixedOp`: the `interleaved_sequence`,
+  `bulk_jagged` and `interleaved_mixed` layouts. `bulk_jagged` fields are
+  produced as `JaggedBuffers` (see the jagged module).
+- `GatedOp`: the `gated_sequence` layout of conditional banks, whose
+  iterations are present or not according to a flag array (`if_eye`) or a
+  bitmask, and may end early on a failmode check. Output as NumPy columns
+  with an entry per iteration (and JaggedBuffers for varying lengths).
+- `MaskBitsField`: the `mask_bits` type, the decoded bits of a mask field.
+- `VersionField`: the `bank_version` type, the version word of the header.
+- `SparseFits`: appended by `compile_schema(..., sparse=True)`; keeps only
+  the iterations read by the gated sequences, listed in `fit_index`.
+
+Fields (and items of `interleaved_sequence` / `interleaved_mixed` layouts)
+may carry `min_version` and/or `max_version` (inclusive) for layouts that
+changed between bank versions. `compile_schema(..., version=v)` compiles the
+layout of version `v` only; without a version every field is read. A field
+whose shape changed is listed once per version range under the same name;
+without a version only its open-ended (no `max_version`) entry is read. A
+field with a `default` is not dropped from the versions it is missing from
+but output as that value (`FillField`), without reading any bytes.
+
+`compile_schema(..., fields=[...])` compiles a projection: fields that
+are not requested are not decoded into the output, and only advance the
+cursor (fields used as sizes are still read into the parse context).
+
+Only fields referenced as sizes by later fields are kept in the parse
+context. Output (values, dict order, cursor, and errors on malformed banks)
+matches the original interpreter.
+"""
+
+from __future__ import annotations
+
+import sys
+
+import awkward as ak
+import numpy as np
+
+from dst_awkward.conditional_bank_utils import decode_mask_msb_first
+from dst_awkward.jagged import JaggedBuffers, jagged_from_counts
+
+PRIMITIVE_TYPES = ("int8", "int16", "int32", "float32", "float64")
+
+# Parse-context key of the iterations read by the gated sequences so far
+# (see SparseFits); not a field name
+PRESENT_KEY = "gated_sequence: present"
+
+# Layout types that are accepted but produce no output
+_IGNORED_TYPES = ("interleaved_jagged",)
+
+# Layout types with their own op (the rest are primitive fields)
+_COMPOSITE_TYPES = ("interleaved_sequence", "bulk_jagged", "interleaved_mixed", "gated_sequence",
+                    "bank_version", "mask_bits", *_IGNORED_TYPES)
+
+
+def referenced_names(layout: list) -> set[str]:
+    """Names of fields used as counts, sizes or shape dimensions in `layout`."""
+    names = set()
+
+    def add_dims(shape):
+        names.update(d for d in shape if isinstance(d, str))
+
+    for fld in layout:
+        add_dims(fld.get("shape", []))
+        for key in ("count", "size_ref", "outer_counts", "inner_counts", "gate", "mask"):
+            if isinstance(fld.get(key), str):
+                names.add(fld[key])
+        counts = fld.get("counts")
+        if counts:
+            names.update(counts if isinstance(counts, list) else [counts])
+        for item in fld.get("items", []):
+            if "size_from" in item:
+                names.add(item["size_from"])
+            add_dims(item.get("shape", []))
+    return names
+
+
+def layout_names(layout: list) -> list[str]:
+    """Names of the output fields of `layout`, in order of first appearance."""
+    names = {}
+    for fld in layout:
+        if fld.get("type") in _IGNORED_TYPES:
+            continue
+        if "items" in fld:
+            items = [item["name"] for item in fld["items"]]
+            if "valid" in fld:
+                # Output after the last check (see GatedOp)
+                checks = [j for j, item in enumerate(fld["items"]) if "continue_if" in item]
+                items.insert(checks[-1] + 1 if checks else len(items), fld["valid"])
+            names.update((name, None) for name in items)
+        else:
+            names[fld["name"]] = None
+    return list(names)
+
+
+def leading_fields(schema: dict, dtypes: dict) -> dict[str, tuple[int, np.dtype, tuple]]:
+    """
+    Fields at a fixed position in every bank: name -> (byte offset from the
+    start of the bank, header included; dtype; shape). Covers the leading
+    primitive fields with literal shapes, up to the first field whose size
+    depends on the data or whose presence depends on the bank version. The
+    first occurrence of a repeated name is the one recorded.
+    """
+    fields = {}
+    cursor = 8  # [BankID (4b), BankVersion (4b)]
+    for fld in schema.get("layout", []):
+        f_type = fld.get("type")
+        if f_type == "bank_version":
+            continue  # Taken from the header, no bytes in the layout
+        shape = tuple(fld.get("shape", []))
+        if (f_type not in PRIMITIVE_TYPES or any(isinstance(d, str) for d in shape)
+                or _tagged(fld)):
+            break
+        dtype = dtypes[f_type]
+        fields.setdefault(fld["name"], (cursor, dtype, shape))
+        cursor += int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    return fields
+
+
+def _gather(raw, starts, lengths):
+    """Concatenate the byte runs raw[starts[i] : starts[i] + lengths[i]]."""
+    out_starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=out_starts[1:])
+    index = np.repeat(starts - out_starts, lengths)
+    index += np.arange(len(index), dtype=np.int64)
+    return raw[index]
+
+
+def _check_sizes(sizes, loop_count):
+    """True if `sizes` is a usable per-iteration count array for vectorized reads."""
+    return (isinstance(sizes, np.ndarray) and sizes.ndim == 1 and len(sizes) >= loop_count
+            and (loop_count == 0 or sizes[:loop_count].min() >= 0))
+
+
+class FixedRun:
+    """
+    Consecutive primitive fields with literal shapes.
+
+    The run is decoded with a single structured-dtype `np.frombuffer`, and
+    each field is a zero-copy view of that one record. Record fields are
+    named f0..fN internally because schemas may repeat a field name (the
+    last occurrence wins in the output, as with separate reads).
+
+    Fields left out of a projection are not part of the record; the ones
+    still needed as sizes are listed in `ctx_only`.
+    """
+
+    __slots__ = ("fields", "ctx_only", "nbytes", "record")
+
+    def __init__(self):
+        # (name, dtype, offset within run, shape or None for scalars, keep in ctx, output)
+        self.fields = []
+        self.ctx_only = []
+        self.nbytes = 0
+        self.record = None
+
+    def add(self, name, dtype, shape, keep, out=True):
+        count = int(np.prod(shape, dtype=np.int64)) if shape is not None else 1
+        self.fields.append((name, dtype, self.nbytes, shape, keep, out))
+        self.nbytes += count * dtype.itemsize
+
+    def finish(self):
+        """Build the record dtype once all fields are added."""
+        used = [(f"f{i}", fld) for i, fld in enumerate(self.fields) if fld[4] or fld[5]]
+        self.record = np.dtype({
+            "names": [key for key, _ in used],
+            "formats": [dtype if shape is None else (dtype, shape)
+                        for _, (_, dtype, _, shape, _, _) in used],
+            "offsets": [offset for _, (_, _, offset, _, _, _) in used],
+            "itemsize": self.nbytes,
+        })
+        # Output fields: (key, name, shape, keep); kept-only fields: (key, name, shape)
+        self.fields, self.ctx_only = (
+            [(key, name, shape, keep) for key, (name, _, _, shape, keep, out) in used if out],
+            [(key, name, shape) for key, (name, _, _, shape, _, out) in used if not out],
+        )
+
+    def read(self, buffer, cursor, ctx, results):
+        record = np.frombuffer(buffer, dtype=self.record, count=1, offset=cursor)
+        for key, name, shape, keep in self.fields:
+            value = record[key][0]
+            results[name] = value
+            if keep:
+                ctx[name] = value
+        for key, name, _ in self.ctx_only:
+            ctx[name] = record[key][0]
+        return cursor + self.nbytes
+
+    def templates(self):
+        return {name: shape for _, name, shape, _ in self.fields if shape is not None}
+
+
+class DynamicField:
+    """Primitive field with at least one shape dimension taken from an earlier field."""
+
+    __slots__ = ("name", "dtype", "dims", "keep", "out")
+
+    def __init__(self, name, dtype, dims, keep, out=True):
+        self.name = name
+        self.dtype = dtype
+        self.dims = tuple(dims)
+        self.keep = keep
+        self.out = out
+
+    def read(self, buffer, cursor, ctx, results):
+        shape = tuple(int(ctx[d]) if isinstance(d, str) else d for d in self.dims)
+        count = 1
+        for d in shape:
+            count *= d
+        data = np.frombuffer(buffer, dtype=self.dtype, count=count, offset=cursor)
+        if self.out or self.keep:
+            data = data.reshape(shape)
+            if self.out:
+                results[self.name] = data
+            if self.keep:
+                ctx[self.name] = data
+        return cursor + count * self.dtype.itemsize
+
+    def templates(self):
+        if not self.out:
+            return {}
+        return {self.name: tuple(d if isinstance(d, int) else None for d in self.dims)}
+
+
+class SequenceOp:
+    """
+    `interleaved_sequence`: items read in turn `count` times, optionally
+    scaled by `size_ref`.
+
+    Without `size_ref` every iteration has the same layout, so the sequence
+    is an array of identical records. It is decoded with one structured-dtype
+    read of length `count`, and each item becomes a regular column.
+
+    Items named in `skip` are stepped over but not output.
+    """
+
+    __slots__ = ("count", "size_ref", "items", "names", "records", "skip")
+
+    def __init__(self, count, size_ref, items, skip=frozenset()):
+        self.count = count        # int or name of an earlier field
+        self.size_ref = size_ref  # None or name of an earlier array field
+        self.items = items        # (name, dtype, dims or None)
+        self.names = [name for name, _, _ in items]
+        self.records = {}         # Resolved item dims -> record dtype
+        self.skip = frozenset(skip)
+
+    def read(self, buffer, cursor, ctx, results):
+        loop_count = int(ctx[self.count]) if isinstance(self.count, str) else self.count
+
+        unique = len(set(self.names)) == len(self.names)
+        if self.size_ref is None and unique:
+            return self._read_records(buffer, cursor, ctx, results, loop_count)
+
+        sizes = ctx[self.size_ref] if self.size_ref is not None else None
+
+        if (sizes is not None and unique and loop_count >= 0
+                and not any(dims for _, _, dims in self.items)
+                and _check_sizes(sizes, loop_count)):
+            return self._read_offsets(buffer, cursor, results, sizes[:loop_count])
+
+        storage = {name: [] for name in self.names}
+        for i in range(loop_count):
+            base = int(sizes[i]) if sizes is not None else 1
+            for name, dtype, dims in self.items:
+                count = base
+                if dims:
+                    fixed = [int(ctx[d]) if isinstance(d, str) else d for d in dims]
+                    for d in fixed:
+                        count *= d
+                data = np.frombuffer(buffer, dtype=dtype, count=count, offset=cursor)
+                cursor += count * dtype.itemsize
+                if dims:
+                    shape = tuple(fixed)
+                    if base > 1:
+                        shape = (base,) + shape
+                    data = data.reshape(shape)
+                storage[name].append(data)
+
+        for name, values in storage.items():
+            if name not in self.skip:
+                results[name] = ak.Array(values)
+        return cursor
+
+    def _record_dtype(self, ctx):
+        """Structured dtype of one iteration (item dims may refer to earlier fields)."""
+        # Items without a shape are read as 1-element arrays per iteration
+        shapes = tuple(
+            tuple(int(ctx[d]) if isinstance(d, str) else d for d in dims) if dims else (1,)
+            for _, _, dims in self.items
+        )
+        record = self.records.get(shapes)
+        if record is None:
+            record = np.dtype([(f"f{i}", dtype, shape)
+                               for i, ((_, dtype, _), shape) in enumerate(zip(self.items, shapes))])
+            self.records[shapes] = record
+        return record
+
+    def _read_records(self, buffer, cursor, ctx, results, loop_count):
+        if loop_count <= 0:
+            # Item dims are not evaluated for an empty sequence
+            for name, dtype, dims in self.items:
+                if name not in self.skip:
+                    inner = tuple(d if isinstance(d, int) else 0 for d in dims) if dims else (1,)
+                    results[name] = np.empty((0,) + inner, dtype=dtype)
+            return cursor
+
+        record = self._record_dtype(ctx)
+        data = np.frombuffer(buffer, dtype=record, count=loop_count, offset=cursor)
+        for i, name in enumerate(self.names):
+            if name not in self.skip:
+                results[name] = data[f"f{i}"]
+        return cursor + loop_count * record.itemsize
+
+    def templates(self):
+        """Output shapes of the record-array columns (None for data-dependent dims)."""
+        if self.size_ref is not None:
+            return {}
+        count = self.count if isinstance(self.count, int) else None
+        return {
+            name: (count,) + (tuple(d if isinstance(d, int) else None for d in dims) if dims else (1,))
+            for name, _, dims in self.items if name not in self.skip
+        }
+
+
+    def _read_offsets(self, buffer, cursor, results, sizes):
+        """
+        size_ref sequence of shapeless items: iteration i holds sizes[i]
+        values of each item in turn. Iteration and item byte offsets follow
+        from a cumulative sum of the sizes, so every item column is gathered
+        from the raw bytes at once and wrapped as a ListOffsetArray.
+        """
+        sizes = sizes.astype(np.int64)
+        itemsizes = np.array([dtype.itemsize for _, dtype, _ in self.items], dtype=np.int64)
+        row_bytes = int(itemsizes.sum())
+
+        total_bytes = int(sizes.sum()) * row_bytes
+        if cursor + total_bytes > len(buffer):
+            raise ValueError("buffer is smaller than requested size")
+        raw = np.frombuffer(buffer, dtype=np.uint8, count=total_bytes, offset=cursor)
+
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        iter_start = offsets[:-1] * row_bytes   # Byte offset of each iteration
+
+        item_start = 0  # Bytes of earlier items per unit of size
+        for (name, dtype, _), itemsize in zip(self.items, itemsizes):
+            if name not in self.skip:
+                content = _gather(raw, iter_start + sizes * item_start, sizes * itemsize).view(dtype)
+                results[name] = JaggedBuffers((offsets,), content)
+            item_start += int(itemsize)
+
+        return cursor + total_bytes
+
+
+class BulkJaggedOp:
+    """`bulk_jagged`: one contiguous payload split by (possibly nested) count arrays."""
+
+    __slots__ = ("name", "dtype", "count_names", "item_shape", "items_per_row", "out")
+
+    def __init__(self, name, dtype, count_names, item_shape, out=True):
+        self.name = name
+        self.out = out
+        self.dtype = dtype
+        self.count_names = count_names
+        self.item_shape = tuple(item_shape)
+        self.items_per_row = int(np.prod(item_shape, dtype=np.int64)) if item_shape else 1
+
+    def read(self, buffer, cursor, ctx, results):
+        count_arrays = []
+        for c_name in self.count_names:
+            c_arr = ctx[c_name]
+            if isinstance(c_arr, ak.Array) and c_arr.ndim > 1:
+                c_arr = ak.flatten(c_arr, axis=None)
+            count_arrays.append(c_arr)
+
+        total_elements = int(np.sum(count_arrays[-1])) if count_arrays else 0
+
+        count = total_elements * self.items_per_row
+        raw = np.frombuffer(buffer, dtype=self.dtype, count=count, offset=cursor)
+        cursor += int(count * self.dtype.itemsize)
+        if not self.out:
+            return cursor
+        if self.item_shape:
+            raw = raw.reshape((total_elements,) + self.item_shape)
+
+        # Offsets are built directly from the counts; ReadPlan.execute turns
+        # them into an Awkward array unless raw buffers were requested
+        buffers = jagged_from_counts(raw, count_arrays)
+        if buffers is None:
+            # Negative counts: keep Awkward's own interpretation
+            current_data = raw
+            for cnt in reversed(count_arrays):
+                current_data = ak.unflatten(current_data, cnt)
+            buffers = current_data[0]
+
+        results[self.name] = buffers
+        return cursor
+
+    def templates(self):
+        return {}
+
+
+class MixedOp:
+    """
+    `interleaved_mixed`: per-iteration items sized by `size_from[i]` and/or a
+    literal shape.
+
+    The byte length of every (iteration, item) pair follows from the
+    `size_from` arrays, so a cumulative sum gives all offsets up front. Each
+    item is then extracted with one gather: `size_from` items become
+    ListOffsetArrays over those counts, and fixed items become regular columns.
+    Items named in `skip` are stepped over but not output.
+    """
+
+    __slots__ = ("count", "items", "names", "skip")
+
+    def __init__(self, count, items, skip=frozenset()):
+        self.count = count
+        self.items = items  # (name, dtype, size_from or None, fixed shape, fixed count)
+        self.names = [item[0] for item in items]
+        self.skip = frozenset(skip)
+
+    def read(self, buffer, cursor, ctx, results):
+        loop_count = int(ctx[self.count]) if isinstance(self.count, str) else self.count
+
+        if loop_count >= 0 and len(set(self.names)) == len(self.names):
+            sizes = {item[2]: ctx.get(item[2]) for item in self.items if item[2] is not None}
+            if all(_check_sizes(v, loop_count) for v in sizes.values()):
+                return self._read_offsets(buffer, cursor, results, loop_count, sizes)
+
+        storage = {name: [] for name in self.names}
+        for i in range(loop_count):
+            for name, dtype, size_from, shape, fixed_count in self.items:
+                count = fixed_count
+                target_shape = shape
+                if size_from is not None:
+                    n = int(ctx[size_from][i])
+                    count *= n
+                    target_shape = (n,) + shape
+                data = np.frombuffer(buffer, dtype=dtype, count=count, offset=cursor)
+                cursor += count * dtype.itemsize
+                if target_shape:
+                    data = data.reshape(target_shape)
+                storage[name].append(data)
+
+        for name, values in storage.items():
+            if name not in self.skip:
+                results[name] = ak.Array(values)
+        return cursor
+
+    def _read_offsets(self, buffer, cursor, results, loop_count, sizes):
+        counts = {k: v[:loop_count].astype(np.int64) for k, v in sizes.items()}
+
+        # Bytes of each item in each iteration: (loop_count, n_items)
+        nbytes = np.empty((loop_count, len(self.items)), dtype=np.int64)
+        for j, (_, dtype, size_from, _, fixed_count) in enumerate(self.items):
+            per = fixed_count * dtype.itemsize
+            nbytes[:, j] = counts[size_from] * per if size_from is not None else per
+
+        starts = np.zeros(nbytes.size, dtype=np.int64)
+        np.cumsum(nbytes.ravel()[:-1], out=starts[1:])
+        starts = starts.reshape(nbytes.shape)
+
+        total_bytes = int(nbytes.sum())
+        if cursor + total_bytes > len(buffer):
+            raise ValueError("buffer is smaller than requested size")
+        raw = np.frombuffer(buffer, dtype=np.uint8, count=total_bytes, offset=cursor)
+
+        for j, (name, dtype, size_from, shape, _) in enumerate(self.items):
+            if name in self.skip:
+                continue
+            content = _gather(raw, starts[:, j], nbytes[:, j]).view(dtype)
+            if size_from is None:
+                # One value (or one fixed-shape block) per iteration
+                results[name] = content.reshape((loop_count,) + (shape or (1,)))
+                continue
+            offsets = np.zeros(loop_count + 1, dtype=np.int64)
+            np.cumsum(counts[size_from], out=offsets[1:])
+            content = content.reshape((int(offsets[-1]),) + shape)
+            results[name] = JaggedBuffers((offsets,), content)
+
+        return cursor + total_bytes
+
+    def templates(self):
+        """Output shapes of the fixed-size items (None for data-dependent dims)."""
+        count = self.count if isinstance(self.count, int) else None
+        return {name: (count,) + (shape or (1,))
+                for name, _, size_from, shape, _ in self.items
+                if size_from is None and name not in self.skip}
+
+
+def _fill(dtype: np.dtype, length: int) -> np.ndarray:
+    """`length` records of `dtype`, NaN in float fields and 0 elsewhere."""
+    out = np.zeros(length, dtype=dtype)
+    for name in dtype.names:
+        if dtype[name].base.kind == "f":
+            out[name] = np.nan
+    return out
+
+
+def _scalar_read(offset: int, dtype: np.dtype):
+    """(start, stop, byte order, signed) reading an integer with `int.from_bytes`; dtype for others."""
+    if dtype.kind not in "iu":
+        return offset, offset + dtype.itemsize, None, dtype
+    byteorder = "big" if dtype.byteorder == ">" or (dtype.byteorder == "=" and sys.byteorder == "big") else "little"
+    return offset, offset + dtype.itemsize, byteorder, dtype.kind == "i"
+
+
+class GatedOp:
+    """
+    `gated_sequence`: items read in turn for each of `count` iterations whose
+    gate is set, such as the fits of a PRFC/HCBIN/HCTIM bitmask or the eyes
+    flagged in `if_eye`.
+
+    The gate is either `gate`, an earlier array field (iteration i is read
+    when gate[i] == gate_value), or `mask`, an earlier integer field whose
+    `count` low bits are decoded MSB-first (decode_mask_msb_first).
+
+    Item dims may name earlier fields or earlier items of the same iteration
+    (a per-fit bin count, say). Only the leading dim may vary; it is capped
+    at `max_count` if given, and a negative count reads nothing. An item with
+    `continue_if` ends its iteration unless its value equals `continue_if`
+    (the failmode checks). `valid`, if given, names a boolean output (after
+    the last `continue_if` item) set for the iterations read to the end.
+
+    Every item is output as one NumPy column with an entry per iteration:
+    fixed-shape items as (count, *shape) arrays holding NaN (floats) or 0
+    (integers) for the iterations not read, variable-length ones as
+    JaggedBuffers, empty there. The loop over the present iterations only
+    locates the blocks: each run of fixed-shape items is then decoded for
+    every iteration at once through one structured dtype, and each
+    variable-length item with one gather (consecutive ones sharing a count
+    are located as one block). Items named in `skip` are stepped
+    over but not output.
+    """
+
+    __slots__ = ("count", "gate", "mask", "gate_value", "items", "names", "valid", "valid_at",
+                 "segments", "record", "skip", "blanks")
+
+    def __init__(self, count, gate, mask, gate_value, items, skip=frozenset(), valid=None):
+        self.count = count            # int or name of an earlier field
+        self.gate = gate              # None or name of an earlier array field
+        self.mask = mask              # None or name of an earlier integer field
+        self.gate_value = gate_value
+        self.items = items            # (name, dtype, dims or None, max_count, continue_if)
+        self.names = [item[0] for item in items]
+        self.valid = valid            # None or name of the validity output
+        self.skip = frozenset(skip)
+        self.blanks = {}              # (segment, count) -> filled block, copied per read
+
+        # Items used within an iteration: the sizes of later items and the checks
+        local = {d for _, _, dims, _, _ in items for d in dims or () if isinstance(d, str)}
+        local &= set(self.names)
+
+        # Consecutive fixed-shape items form one record, and a check ends its
+        # record. Consecutive variable-length items with the same count form
+        # one block: n entries of the first item, then of the second, ...
+        self.segments = []
+        run = []
+
+        def close():
+            if run:
+                record = np.dtype([(f"f{j}", dtype, dims or ()) for j, (_, dtype, dims, _, _) in enumerate(run)])
+                reads = [(name, *_scalar_read(record.fields[f"f{j}"][1], dtype))
+                         for j, (name, dtype, dims, _, check) in enumerate(run)
+                         if dims is None and (name in local or check is not None)]
+                name, _, _, _, check = run[-1]
+                stop = (name, check) if check is not None else None
+                fields = [(f"f{j}", item[0]) for j, item in enumerate(run)]
+                self.segments.append((record, fields, reads, stop))
+                run.clear()
+
+        for item in items:
+            name, dtype, dims, max_count, check = item
+            if dims is not None and any(isinstance(d, str) for d in dims[1:]):
+                raise ValueError(f"gated item {name}: only the leading dim may vary")
+            if dims is not None and (isinstance(dims[0], str) or max_count is not None):
+                close()
+                inner = tuple(dims[1:])
+                entry = int(np.prod(inner, dtype=np.int64)) * dtype.itemsize
+                last = self.segments[-1] if self.segments else None
+                if isinstance(last, list) and last[1:3] == [dims[0], max_count]:
+                    last[0].append((name, dtype, inner, entry, last[3]))
+                    last[3] += entry
+                else:
+                    self.segments.append([[(name, dtype, inner, entry, 0)], dims[0], max_count, entry])
+            else:
+                run.append(item)
+                if check is not None:
+                    close()
+        close()
+
+        # Segment after which `valid` is output: the one ending in the last check
+        self.valid_at = len(self.segments) - 1
+        for k, segment in enumerate(self.segments):
+            if isinstance(segment, tuple) and segment[3] is not None:
+                self.valid_at = k
+
+        # Fixed layout without checks: the present iterations are contiguous
+        self.record = None
+        if len(self.segments) == 1 and isinstance(self.segments[0], tuple) and self.segments[0][3] is None:
+            self.record = self.segments[0][0]
+
+    def _blank(self, k, record, loop_count):
+        """`loop_count` records of segment k, NaN in float fields and 0 elsewhere."""
+        key = (k, loop_count)
+        if key not in self.blanks:
+            self.blanks[key] = _fill(record, loop_count)
+        return self.blanks[key].copy()
+
+    def _present(self, ctx, loop_count):
+        """Whether each iteration is read."""
+        if self.mask is not None:
+            return np.array(decode_mask_msb_first(ctx[self.mask], bits=loop_count), dtype=bool)
+        gate = np.asarray(ctx[self.gate])
+        if len(gate) < loop_count:
+            raise IndexError(f"{self.gate} has {len(gate)} entries, fewer than {loop_count}")
+        return gate[:loop_count] == self.gate_value
+
+    def read(self, buffer, cursor, ctx, results):
+        loop_count = max(int(ctx[self.count]) if isinstance(self.count, str) else self.count, 0)
+        present = self._present(ctx, loop_count)
+        seen = ctx.get(PRESENT_KEY)
+        ctx[PRESENT_KEY] = present if seen is None else seen | present
+
+        if self.record is not None:
+            rows = np.flatnonzero(present)
+            block = self._blank(0, self.record, loop_count)
+            if len(rows):
+                block[rows] = np.frombuffer(buffer, dtype=self.record, count=len(rows), offset=cursor)
+                cursor += len(rows) * self.record.itemsize
+            for key, name in self.segments[0][1]:
+                if name not in self.skip:
+                    results[name] = block[key]
+            if self.valid is not None and self.valid not in self.skip:
+                results[self.valid] = present
+            return cursor
+
+        # Locate the blocks: per segment, the iterations and start offsets
+        # (and entry counts of variable-length blocks)
+        size = len(buffer)
+        rows = [[] for _ in self.segments]
+        starts = [[] for _ in self.segments]
+        counts = [[] for _ in self.segments]
+        valid = np.zeros(loop_count, dtype=bool)
+        for i in np.flatnonzero(present).tolist():
+            local = {}
+            for k, segment in enumerate(self.segments):
+                if isinstance(segment, tuple):
+                    record, _, reads, stop = segment
+                    if cursor + record.itemsize > size:
+                        raise ValueError("buffer is smaller than requested size")
+                    for name, lo, hi, byteorder, signed in reads:
+                        if byteorder is None:
+                            local[name] = np.frombuffer(buffer, dtype=signed, count=1, offset=cursor + lo)[0].item()
+                        else:
+                            local[name] = int.from_bytes(buffer[cursor + lo : cursor + hi], byteorder, signed=signed)
+                    rows[k].append(i)
+                    starts[k].append(cursor)
+                    cursor += record.itemsize
+                    if stop is not None and local[stop[0]] != stop[1]:
+                        break
+                else:
+                    _, dim, max_count, entry = segment
+                    n = dim if isinstance(dim, int) else int(local[dim] if dim in local else ctx[dim])
+                    if max_count is not None:
+                        n = min(n, max_count)
+                    n = max(n, 0)
+                    if cursor + n * entry > size:
+                        raise ValueError("buffer is smaller than requested size")
+                    rows[k].append(i)
+                    starts[k].append(cursor)
+                    counts[k].append(n)
+                    cursor += n * entry
+            else:
+                valid[i] = True
+
+        # Decode each segment for all its iterations at once
+        raw = np.frombuffer(buffer, dtype=np.uint8)
+        for k, segment in enumerate(self.segments):
+            if isinstance(segment, tuple):
+                record, fields, _, _ = segment
+                fields = [(key, name) for key, name in fields if name not in self.skip]
+                if fields:
+                    block = self._blank(k, record, loop_count)
+                    if rows[k]:
+                        index = np.add.outer(np.asarray(starts[k], dtype=np.int64), np.arange(record.itemsize))
+                        block[rows[k]] = raw[index].view(record)[:, 0]
+                    for key, name in fields:
+                        results[name] = block[key]
+            else:
+                block_items = [item for item in segment[0] if item[0] not in self.skip]
+                if block_items:
+                    n = np.asarray(counts[k], dtype=np.int64)
+                    block_starts = np.asarray(starts[k], dtype=np.int64)
+                    per_iteration = np.zeros(loop_count, dtype=np.int64)
+                    per_iteration[rows[k]] = n
+                    offsets = np.zeros(loop_count + 1, dtype=np.int64)
+                    np.cumsum(per_iteration, out=offsets[1:])
+                for name, dtype, inner, entry, before in block_items:
+                    content = _gather(raw, block_starts + n * before, n * entry) if rows[k] else raw[:0]
+                    results[name] = JaggedBuffers((offsets,), content.view(dtype).reshape((-1, *inner)))
+            if k == self.valid_at and self.valid is not None and self.valid not in self.skip:
+                results[self.valid] = valid
+        return cursor
+
+    def templates(self):
+        count = self.count if isinstance(self.count, int) else None
+        out = {}
+        for segment in self.segments:
+            if isinstance(segment, tuple):
+                record, fields, _, _ = segment
+                out.update((name, (count,) + record[key].shape) for key, name in fields if name not in self.skip)
+        if self.valid is not None and self.valid not in self.skip:
+            out[self.valid] = (count,)
+        return out
+
+
+class MaskBitsField:
+    """`mask_bits`: the `bits` low bits of an earlier integer field, MSB first, as a boolean array. Reads no bytes."""
+
+    __slots__ = ("name", "mask", "bits", "out")
+
+    def __init__(self, name, mask, bits, out=True):
+        self.name = name
+        self.mask = mask
+        self.bits = bits
+        self.out = out
+
+    def read(self, buffer, cursor, ctx, results):
+        if self.out:
+            results[self.name] = np.array(decode_mask_msb_first(ctx[self.mask], bits=self.bits), dtype=bool)
+        return cursor
+
+    def templates(self):
+        return {self.name: (self.bits,)} if self.out else {}
+
+
+class SparseFits:
+    """
+    Sparse layout of the gated sequences, for schemas with `sparse_fits`
+    compiled with `sparse=True`. Runs after the other ops: the per-iteration
+    outputs (gated items, their `valid` flags and `mask_bits` fields) keep
+    only the iterations read by any gated sequence, and `fit_index`, inserted
+    before the first of them, lists those. Reads no bytes.
+    """
+
+    __slots__ = ("names", "shapes")
+
+    def __init__(self, names, shapes):
+        self.names = frozenset(names)   # per-iteration outputs
+        self.shapes = shapes            # name -> trailing shape of the fixed-shape ones
+
+    def read(self, buffer, cursor, ctx, results):
+        present = ctx.get(PRESENT_KEY)
+        fits = np.flatnonzero(present).astype(np.int32) if present is not None else np.zeros(0, dtype=np.int32)
+        # The iterations left out read nothing: the jagged contents stay as they are
+        ends = np.append(fits, -1)
+        out = {}
+        for name, value in results.items():
+            if name in self.names:
+                out.setdefault("fit_index", fits)
+                if isinstance(value, JaggedBuffers):
+                    value = JaggedBuffers((value.offsets[0][ends],), value.content)
+                else:
+                    value = value[fits]
+            out[name] = value
+        out.setdefault("fit_index", fits)
+        results.clear()
+        results.update(out)
+        return cursor
+
+    def templates(self):
+        out = {name: (None,) + shape for name, shape in self.shapes.items()}
+        out["fit_index"] = (None,)
+        return out
+
+
+class VersionField:
+    """`bank_version`: the version word of the bank header, ahead of the layout. Reads no bytes."""
+
+    __slots__ = ("name", "dtype", "out")
+
+    def __init__(self, name, dtype, out=True):
+        self.name = name
+        self.dtype = dtype
+        self.out = out
+
+    def read(self, buffer, cursor, ctx, results):
+        if self.out:
+            # [BankID (4b), BankVersion (4b)]
+            results[self.name] = np.frombuffer(buffer, dtype=self.dtype, count=1, offset=4)[0]
+        return cursor
+
+    def templates(self):
+        return {}
+
+
+class FillField:
+    """Field missing from this bank version, output as its `default` value. Reads no bytes."""
+
+    __slots__ = ("name", "dtype", "dims", "value", "keep", "out")
+
+    def __init__(self, name, dtype, dims, value, keep, out=True):
+        self.name = name
+        self.dtype = dtype
+        self.dims = tuple(dims) if dims is not None else None
+        self.value = value
+        self.keep = keep
+        self.out = out
+
+    def read(self, buffer, cursor, ctx, results):
+        if self.dims is None:
+            data = self.dtype.type(self.value)
+        else:
+            # Negative counts give empty arrays
+            shape = tuple(max(int(ctx[d]), 0) if isinstance(d, str) else d for d in self.dims)
+            data = np.full(shape, self.value, dtype=self.dtype)
+        if self.out:
+            results[self.name] = data
+        if self.keep:
+            ctx[self.name] = data
+        return cursor
+
+    def templates(self):
+        if not self.out or self.dims is None:
+            return {}
+        return {self.name: tuple(d if isinstance(d, int) else None for d in self.dims)}
+
+
+class ReadPlan:
+    """
+    Compiled form of one schema layout.
+
+    Ops produce NumPy values: scalars, arrays, and JaggedBuffers for
+    variable-length fields. `execute` wraps them as Awkward arrays unless
+    raw output is requested.
+    """
+
+    __slots__ = ("ops", "templates", "parse", "fields")
+
+    def __init__(self, ops, fields=None):
+        self.ops = ops
+        # Requested field names (sorted) for a projection, None for all
+        self.fields = tuple(sorted(fields)) if fields is not None else None
+        # parse(buffer, cursor) -> (raw results, cursor); replaced by the
+        # generated function when code generation is enabled
+        self.parse = self.interpret
+        # Field name -> shape of its NumPy array output, None marking the
+        # dims that vary from bank to bank (see columnar.ColumnAssembler)
+        self.templates = {}
+        for op in ops:
+            self.templates.update(op.templates())
+
+    def execute(self, buffer, cursor, raw_jagged=False, raw=False):
+        """
+        Parse `buffer` from `cursor`; returns (results, end cursor).
+
+        Args:
+            raw_jagged: Leave variable-length fields as JaggedBuffers.
+            raw: Leave every field as NumPy values / JaggedBuffers.
+        """
+        results, cursor = self.parse(buffer, cursor)
+        if not raw:
+            for name, value in results.items():
+                if isinstance(value, np.ndarray):
+                    # Same layout as ak.Array(value), without its type dispatch
+                    results[name] = ak.Array(ak.contents.NumpyArray(value)) if value.ndim else ak.Array(value)
+                elif isinstance(value, JaggedBuffers) and not raw_jagged:
+                    results[name] = value.to_awkward()
+        return results, cursor
+
+    def interpret(self, buffer, cursor):
+        """Run the ops one by one; returns raw (results, cursor)."""
+        ctx = {}
+        results = {}
+        for op in self.ops:
+            cursor = op.read(buffer, cursor, ctx, results)
+        return results, cursor
+
+
+def schema_dtypes(schema: dict) -> dict:
+    """Map from YAML type names to numpy dtypes in the schema's byte order."""
+    endian = schema.get("endian", "<")
+    return {
+        "int8": np.dtype(f"{endian}i1"),
+        "int16": np.dtype(f"{endian}i2"),
+        "int32": np.dtype(f"{endian}i4"),
+        "float32": np.dtype(f"{endian}f4"),
+        "float64": np.dtype(f"{endian}f8"),
+    }
+
+
+def in_version(fld: dict, version: int | None) -> bool:
+    """Whether a layout field (or item) is present in banks of `version`."""
+    if version is None:
+        return True
+    lo = fld.get("min_version")
+    hi = fld.get("max_version")
+    return (lo is None or version >= lo) and (hi is None or version <= hi)
+
+
+def _tagged(fld: dict) -> bool:
+    return "min_version" in fld or "max_version" in fld
+
+
+def is_versioned(schema: dict) -> bool:
+    """Whether any field or item of `schema` is tagged with a version range."""
+    return any(
+        _tagged(fld) or any(_tagged(sub) for sub in fld.get("items", ()))
+        for fld in schema.get("layout", [])
+    )
+
+
+def _current_layout(layout: list) -> list:
+    """`layout` without the entries superseded by a later one of the same name."""
+    open_ended = {fld["name"] for fld in layout if "name" in fld and "max_version" not in fld}
+    return [fld for fld in layout if "max_version" not in fld or fld.get("name") not in open_ended]
+
+
+def schema_for_version(schema: dict, version: int | None) -> dict:
+    """
+    `schema` with its layout reduced to the fields present in `version`.
+    Without a version, every field but the superseded entries of repeated
+    names (see _current_layout).
+    """
+    if not is_versioned(schema):
+        return schema
+    if version is None:
+        layout = []
+        for fld in _current_layout(schema.get("layout", [])):
+            if "items" in fld:
+                fld = dict(fld, items=_current_layout(fld["items"]))
+            layout.append(fld)
+        return dict(schema, layout=layout)
+    layout = []
+    for fld in schema.get("layout", []):
+        if not in_version(fld, version):
+            if "default" in fld:
+                layout.append(dict(fld, fill=fld["default"]))
+            continue
+        if "items" in fld:
+            fld = dict(fld, items=[sub for sub in fld["items"] if in_version(sub, version)])
+        layout.append(fld)
+    return dict(schema, layout=layout)
+
+
+def compile_schema(schema: dict, dtypes: dict, codegen: bool | None = None, ops: list | None = None,
+                   version: int | None = None, fields=None, sparse: bool = False) -> ReadPlan:
+    """
+    Compile `schema['layout']` into a ReadPlan.
+
+    Args:
+        schema: Parsed YAML schema.
+        dtypes: Map from YAML type names to numpy dtypes (BankReader.dtypes).
+        codegen: Attach a generated parser (see schema_codegen). Defaults to
+            on unless DST_AWKWARD_CODEGEN=0.
+        ops: Ops from an earlier `compile_ops` of the same schema (e.g. from
+            the schema bundle), to skip compiling them again.
+        version: Bank version to compile the layout for (see
+            schema_for_version); None reads every field.
+        fields: Names of the fields to output; None for all of them.
+        sparse: Output the gated sequences in the sparse layout (see SparseFits).
+    """
+    schema = schema_for_version(schema, version)
+    plan = ReadPlan(ops if ops is not None else compile_ops(schema, dtypes, fields, sparse), fields)
+
+    from dst_awkward.schema_codegen import build_parser, codegen_enabled
+
+    if codegen if codegen is not None else codegen_enabled():
+        plan.parse = build_parser(plan, schema)
+    return plan
+
+
+def compile_ops(schema: dict, dtypes: dict, fields=None, sparse: bool = False) -> list:
+    """The ops of `schema['layout']`, in order (see compile_schema)."""
+    layout = schema.get("layout", [])
+    keep = referenced_names(layout)
+    wanted = set(fields) if fields is not None else set(layout_names(layout))
+
+    def dtype_of(type_name):
+        try:
+            return dtypes[type_name]
+        except KeyError:
+            raise ValueError(f"{schema.get('name', '?')}: unknown field type {type_name!r}") from None
+
+    ops = []
+    run = None
+
+    for fld in layout:
+        f_type = fld.get("type")
+
+        if f_type in PRIMITIVE_TYPES or f_type not in _COMPOSITE_TYPES:
+            dtype = dtype_of(f_type)
+            name = fld["name"]
+            shape = fld.get("shape")
+            if "fill" in fld:
+                run = None
+                ops.append(FillField(name, dtype, shape, fld["fill"], name in keep, name in wanted))
+                continue
+            if shape is not None and any(isinstance(d, str) for d in shape):
+                run = None
+                ops.append(DynamicField(name, dtype, shape, name in keep, name in wanted))
+                continue
+            if run is None:
+                run = FixedRun()
+                ops.append(run)
+            run.add(name, dtype, tuple(shape) if shape is not None else None, name in keep, name in wanted)
+            continue
+
+        run = None
+
+        if f_type == "interleaved_sequence":
+            items = [
+                (sub["name"], dtype_of(sub["type"]), tuple(sub["shape"]) if "shape" in sub else None)
+                for sub in fld["items"]
+            ]
+            ops.append(SequenceOp(fld["count"], fld.get("size_ref"), items,
+                                  {name for name, _, _ in items} - wanted))
+
+        elif f_type == "bulk_jagged":
+            if "counts" in fld:
+                c = fld["counts"]
+                count_names = c if isinstance(c, list) else [c]
+            elif "outer_counts" in fld:
+                count_names = [fld["outer_counts"]]
+                if "inner_counts" in fld:
+                    count_names.append(fld["inner_counts"])
+            else:
+                count_names = []
+            ops.append(BulkJaggedOp(fld["name"], dtype_of(fld["dtype"]), count_names,
+                                    fld.get("item_shape", []), fld["name"] in wanted))
+
+        elif f_type == "interleaved_mixed":
+            items = []
+            for sub in fld["items"]:
+                shape = tuple(sub.get("shape", ()))
+                fixed_count = 1
+                for d in shape:
+                    fixed_count *= d
+                items.append((sub["name"], dtype_of(sub["type"]), sub.get("size_from"),
+                              shape, fixed_count))
+            ops.append(MixedOp(fld["count"], items, {item[0] for item in items} - wanted))
+
+        elif f_type == "gated_sequence":
+            if ("gate" in fld) == ("mask" in fld):
+                raise ValueError(f"{schema.get('name', '?')}: gated_sequence needs one of gate or mask")
+            items = [
+                (sub["name"], dtype_of(sub["type"]), tuple(sub["shape"]) if "shape" in sub else None,
+                 sub.get("max_count"), sub.get("continue_if"))
+                for sub in fld["items"]
+            ]
+            valid = fld.get("valid")
+            outputs = {item[0] for item in items} | ({valid} if valid is not None else set())
+            ops.append(GatedOp(fld["count"], fld.get("gate"), fld.get("mask"), fld.get("gate_value", 1),
+                               items, outputs - wanted, valid))
+
+        elif f_type == "bank_version":
+            ops.append(VersionField(fld["name"], dtypes["int32"], fld["name"] in wanted))
+
+        elif f_type == "mask_bits":
+            ops.append(MaskBitsField(fld["name"], fld["mask"], fld.get("bits", 16), fld["name"] in wanted))
+
+    for op in ops:
+        if isinstance(op, FixedRun):
+            op.finish()
+
+    if sparse:
+        names = set()
+        shapes = {}
+        for op in ops:
+            if isinstance(op, GatedOp):
+                names.update(name for name in (*op.names, op.valid) if name is not None and name not in op.skip)
+            elif isinstance(op, MaskBitsField) and op.out:
+                names.add(op.name)
+            else:
+                continue
+            shapes.update((name, shape[1:]) for name, shape in op.templates().items())
+        ops.append(SparseFits(names, shapes))
+    return ops
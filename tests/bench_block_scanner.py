@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the DST block scanner.
+
+Compares `DSTFile.banks()` (which uses `dst_io.scan_block`) against the original
+byte-at-a-time framing loop, checks that both produce the identical
+(bank_id, bank_version, payload) stream, and reports MB/s of block data framed.
+
+Usage:
+    python bench_block_scanner.py <dst_file> [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import time
+
+from dst_awkward.dst_io import (
+    BLOCK_LEN,
+    CONTINUE,
+    END_BANK,
+    END_BLOCK_LOGICAL,
+    END_BLOCK_PHYSICAL,
+    OPCODE,
+    START_BANK,
+    START_BLOCK,
+    TO_BE_CONTD,
+    DSTFile,
+)
+
+
+def _read_all_blocks(filename: str) -> list[bytes]:
+    """Decompress the file up front so only the framing loop is timed."""
+    blocks = []
+    with DSTFile(filename) as dst:
+        while dst._read_next_block():
+            blocks.append(dst.block_buffer)
+    return blocks
+
+
+def bytewise_banks(blocks: list[bytes]):
+    """The original per-byte framing loop, kept here as the reference."""
+    current_bank_data = bytearray()
+    building_bank = False
+
+    for block in blocks:
+        cursor = 0
+        while cursor < BLOCK_LEN:
+            if block[cursor] != OPCODE:
+                cursor += 1
+                continue
+            if cursor + 1 >= BLOCK_LEN:
+                cursor += 1
+                continue
+
+            cmd = block[cursor + 1]
+            cursor += 2
+
+            if cmd == START_BLOCK:
+                cursor += 4
+            elif cmd == END_BLOCK_LOGICAL or cmd == END_BLOCK_PHYSICAL:
+                cursor = BLOCK_LEN
+            elif cmd == START_BANK:
+                if building_bank:
+                    current_bank_data = bytearray()
+                seg_len = struct.unpack_from("<i", block, cursor)[0]
+                cursor += 4
+                current_bank_data.extend(block[cursor : cursor + seg_len])
+                cursor += seg_len
+                building_bank = True
+            elif cmd == CONTINUE:
+                seg_len = struct.unpack_from("<i", block, cursor)[0]
+                cursor += 4
+                if building_bank:
+                    current_bank_data.extend(block[cursor : cursor + seg_len])
+                cursor += seg_len
+            elif cmd == END_BANK:
+                cursor += 4
+                if building_bank:
+                    if len(current_bank_data) >= 8:
+                        bank_id = struct.unpack("<i", current_bank_data[0:4])[0]
+                        bank_ver = struct.unpack("<i", current_bank_data[4:8])[0]
+                        yield bank_id, bank_ver, bytes(current_bank_data)
+                    current_bank_data = bytearray()
+                    building_bank = False
+            elif cmd == TO_BE_CONTD:
+                cursor += 4
+
+
+class _MemoryDSTFile(DSTFile):
+    """DSTFile fed from pre-read blocks, so decompression is not timed."""
+
+    def __init__(self, blocks: list[bytes]):
+        self._blocks = iter(blocks)
+        self.filename = "<memory>"
+        self.f = None
+        self.mmap = None
+        self.block_buffer = b""
+        self.block_start = 0
+        self.block_index = -1
+        self._resume_pos = 0
+        self._after_seek = False
+        self.eof = False
+
+    def _read_next_block(self):
+        chunk = next(self._blocks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        self.block_buffer = chunk
+        self.block_start = 0
+        return True
+
+
+def _time(fn, repeat: int) -> tuple[float, list]:
+    best = float("inf")
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = list(fn())
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark DST block framing throughput.")
+    p.add_argument("dst_file", help="Path to .dst, .dst.gz, or .dst.bz2")
+    p.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = p.parse_args()
+
+    blocks = _read_all_blocks(args.dst_file)
+    mbytes = len(blocks) * BLOCK_LEN / 1e6
+    print(f"{args.dst_file}: {len(blocks)} blocks ({mbytes:.1f} MB uncompressed)")
+
+    t_old, ref = _time(lambda: bytewise_banks(blocks), args.repeat)
+    t_new, new = _time(lambda: _MemoryDSTFile(blocks).banks(), args.repeat)
+
+    if new != ref:
+        raise SystemExit(f"MISMATCH: scanner yielded {len(new)} banks, bytewise loop {len(ref)}")
+
+    print(f"  banks: {len(ref)} (streams identical)")
+    print(f"  bytewise loop : {t_old:8.3f} s  {mbytes / t_old:8.1f} MB/s")
+    print(f"  block scanner : {t_new:8.3f} s  {mbytes / t_new:8.1f} MB/s")
+    print(f"  speedup       : {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
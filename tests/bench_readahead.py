@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DSTFile's background read-ahead on compressed input.
+
+For each file, times:
+  * decompression alone (reading every block),
+  * framing + parsing with everything on one thread (readahead=0),
+  * the same with a read-ahead thread (readahead=N),
+and checks that both modes yield the identical bank stream. With read-ahead the
+total should approach max(decompress, parse) instead of their sum.
+
+Usage:
+    python bench_readahead.py <file.dst.gz> <file.dst.bz2> [--readahead N] [--limit EVENTS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import time
+
+from dst_awkward.dst_events_to_awkward import DSTProcessor
+from dst_awkward.dst_io import DSTFile
+
+
+def _decompress_only(filename: str) -> float:
+    t0 = time.perf_counter()
+    with DSTFile(filename) as dst:
+        while dst._read_next_block():
+            pass
+    return time.perf_counter() - t0
+
+
+def _process(processor: DSTProcessor, filename: str, readahead: int, limit: int | None) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    # Parse errors are not what is being measured here
+    with contextlib.redirect_stdout(io.StringIO()):
+        n_events = sum(1 for _ in processor.process_file(filename, limit=limit, readahead=readahead))
+    return time.perf_counter() - t0, n_events
+
+
+def _bank_stream(filename: str, readahead: int) -> list:
+    with DSTFile(filename, readahead=readahead) as dst:
+        return [(bank_id, ver, bytes(raw)) for bank_id, ver, raw in dst.banks()]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark read-ahead decompression overlap.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst.gz / .dst.bz2 files")
+    p.add_argument("--readahead", type=int, default=64, help="Blocks to read ahead")
+    p.add_argument("--limit", type=int, default=None, help="Max events to parse per file")
+    args = p.parse_args()
+
+    processor = DSTProcessor(verbose=False)
+
+    for filename in args.dst_files:
+        if _bank_stream(filename, 0) != _bank_stream(filename, args.readahead):
+            raise SystemExit(f"MISMATCH: {filename} bank streams differ with read-ahead")
+
+        t_dec = _decompress_only(filename)
+        t_serial, n_serial = _process(processor, filename, 0, args.limit)
+        t_ahead, n_ahead = _process(processor, filename, args.readahead, args.limit)
+        if n_serial != n_ahead:
+            raise SystemExit(f"MISMATCH: {filename} {n_serial} events serial, {n_ahead} with read-ahead")
+
+        print(f"{filename}: {n_serial} events (bank streams identical)")
+        print(f"  decompress only       : {t_dec:8.3f} s")
+        print(f"  parse, readahead=0    : {t_serial:8.3f} s")
+        print(f"  parse, readahead={args.readahead:<4d} : {t_ahead:8.3f} s")
+        print(f"  speedup               : {t_serial / t_ahead:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
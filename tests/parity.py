@@ -0,0 +1,89 @@
+"""
+Shared helpers for the parity-check scripts in this directory.
+
+The scripts are run directly (`python tests/test_x.py <dst_file> ...`), so
+this directory is on `sys.path` and they import it as `parity`.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+
+import awkward as ak
+import numpy as np
+
+from dst_awkward.dst_events_to_awkward import START_BANKID, STOP_BANKID, DSTProcessor
+from dst_awkward.dst_io import DSTFile
+from dst_awkward.dst_reader import BankReader
+from dst_awkward.jagged import JaggedBuffers
+
+
+def plain(value):
+    """Python objects with NaN replaced by a marker, so that == compares them."""
+    if isinstance(value, (ak.Array, ak.Record)):
+        value = value.to_list()
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, float) and math.isnan(value):
+        return "nan"
+    return value
+
+
+def same(a, b) -> bool:
+    """
+    Whether two parse results are identical: same dict keys in the same
+    order, NumPy values of the same dtype and shape, NaN equal to NaN.
+    Awkward arrays and records are compared as Python lists.
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, (ak.Array, ak.Record)):
+        return same(a.to_list(), b.to_list())
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, JaggedBuffers):
+        return (len(a.offsets) == len(b.offsets)
+                and all(np.array_equal(x, y) for x, y in zip(a.offsets, b.offsets))
+                and same(a.content, b.content))
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (np.ndarray, np.generic)):
+        return (a.dtype == b.dtype and np.shape(a) == np.shape(b)
+                and np.array_equal(a, b, equal_nan=a.dtype.kind in "fc"))
+    if isinstance(a, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+def read_banks(dst_files, names=None) -> dict[str, list[bytes]]:
+    """
+    Payloads of the banks in `dst_files`, in file order, grouped by bank
+    name: the banks in `names`, or every bank with a schema.
+    """
+    if names is None:
+        processor = DSTProcessor(verbose=False)
+        ids = {bank_id: name for bank_id, name in processor.bank_names.items()
+               if bank_id not in (START_BANKID, STOP_BANKID)}
+    else:
+        ids = {BankReader(name).bank_id: name for name in names}
+
+    groups = {name: [] for name in names or ()}
+    for filename in dst_files:
+        with DSTFile(filename) as dst:
+            for bank_id, ver, raw_bytes in dst.banks(wanted=set(ids)):
+                groups.setdefault(ids[bank_id], []).append(bytes(raw_bytes))
+    return groups
+
+
+def report(checked: Counter, failures: Counter, names=None, unit="banks") -> None:
+    """One line per bank type: the number checked and the failures."""
+    names = list(names) if names is not None else sorted(checked)
+    width = max([8, *(len(name) for name in names)])
+    for name in names:
+        status = "ok" if not failures[name] else f"{failures[name]} MISMATCHES"
+        print(f"  {name:{width}s} {checked[name]:6d} {unit}  {status}")
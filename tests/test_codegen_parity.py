@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Parity check: generated parsers vs. the read-plan interpreter.
+
+For every bank in the given DST files, runs both `ReadPlan.interpret` and the
+generated function from `dst_awkward.schema_codegen` on the same payload and
+checks that they return identical fields, values and cursor (or raise the
+same exception type).
+
+Usage:
+    python test_codegen_parity.py <dst_file> [<dst_file> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+
+from dst_awkward.dst_reader import BankReader
+from dst_awkward.schema_codegen import build_parser
+
+from parity import read_banks, report, same
+
+
+def _run(parse, raw_bytes):
+    try:
+        return parse(raw_bytes, 8)
+    except Exception as e:
+        return ("ERR", type(e).__name__)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check generated parsers against the interpreter.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    args = p.parse_args()
+
+    checked = Counter()
+    failures = Counter()
+
+    for name, buffers in sorted(read_banks(args.dst_files).items()):
+        reader = BankReader(name)
+        plan = reader.plan
+        generated = build_parser(plan, reader.schema)
+
+        for raw_bytes in buffers:
+            ref = _run(plan.interpret, raw_bytes)
+            new = _run(generated, raw_bytes)
+
+            checked[name] += 1
+            if isinstance(ref, tuple) and ref and ref[0] == "ERR":
+                ok = ref == new
+            else:
+                ok = (not (isinstance(new, tuple) and new[0] == "ERR")
+                      and ref[1] == new[1]
+                      and same(ref[0], new[0]))
+            if not ok:
+                failures[name] += 1
+                if failures[name] == 1:
+                    print(f"MISMATCH in {name} (bank #{checked[name]} of this type)")
+
+    report(checked, failures)
+
+    if not checked:
+        raise SystemExit("No schema-driven banks found")
+    if failures:
+        raise SystemExit(f"{sum(failures.values())} banks differ between generated and interpreted parsers")
+    print(f"All {sum(checked.values())} banks identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Parity check: DSTProcessor cuts vs. filtering the full event stream.
+
+Reads each DST file once without cuts and once per cut set, and checks that
+the events kept by `DSTProcessor(cuts=...)` are exactly the events of the
+full read that pass the cuts (and contain every cut bank).
+
+Usage:
+    python test_cuts.py <dst_file> [<dst_file> ...] [--cut CUT ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from dst_awkward.cuts import Cut
+from dst_awkward.dst_events_to_awkward import DSTProcessor
+
+from parity import same
+
+DEFAULT_CUTS = [
+    ["rusdraw.nofwf >= 2"],
+    ["rufldf.energy[0] > 0"],
+    ["hcbin.failmode[0] == 0"],
+    ["fdplane.rp > 0"],
+    ["rusdraw.nofwf >= 2", "fdplane.rp > 0"],
+]
+
+
+def _passes(event: dict, cuts: list[Cut]) -> bool:
+    for cut in cuts:
+        data = event.get(cut.bank)
+        if data is None or cut.field not in data or not cut.test(data[cut.field]):
+            return False
+    return True
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check event cuts against filtering a full read.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    p.add_argument("--cut", action="append", metavar="CUT",
+                   help="Cut to check (repeatable, checked as one set); default: a few built-in sets")
+    args = p.parse_args()
+
+    cut_sets = [args.cut] if args.cut else DEFAULT_CUTS
+    failures = 0
+    for filename in args.dst_files:
+        events = list(DSTProcessor(verbose=False).process_file(filename))
+        print(f"{filename}: {len(events)} events")
+        for texts in cut_sets:
+            cuts = [Cut.parse(text) for text in texts]
+            expected = [event for event in events if _passes(event, cuts)]
+            got = list(DSTProcessor(verbose=False, cuts=texts).process_file(filename))
+            ok = len(got) == len(expected) and all(same(g, e) for g, e in zip(got, expected))
+            status = "ok" if ok else "MISMATCH"
+            print(f"  {' and '.join(texts):50s} kept {len(got):6d} / {len(expected):6d}  {status}")
+            failures += not ok
+
+    if failures:
+        raise SystemExit(f"{failures} cut sets differ from filtering the full read")
+    print("All cut sets identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Parity check: the DSTFile reading modes vs. a plain sequential read.
+
+For each given DST file, writes its (uncompressed) contents to a temporary
+.dst file and checks that memory-mapped reading (`use_mmap=True`)
+
+  - yields the same banks as a plain read, single-segment ones as
+    memoryviews of the mapping,
+  - yields the same banks after seeks to bank starts,
+  - on copies whose last block is cut short, yields the same banks (those
+    of the complete blocks) and the same warning as a plain read,
+  - keeps yielded banks readable when the file is closed under them,
+
+and that reading with a read-ahead thread (`readahead=N`), of the temporary
+file and of the given one (compressed or not),
+
+  - yields the same banks, also after seeks to bank starts,
+  - stops its thread when the file is closed after an early `break`, with
+    the thread blocked on a full queue or not,
+
+and that `banks(wanted=...)`, in every mode, yields exactly the wanted banks
+of the plain read, with their START_BANK positions, for sets of one bank
+type, of the type with the largest (split) banks, of several types, of an
+ID not in the file, and the empty set.
+
+Finally, `scan()` must list every bank of the plain read with its ID, version,
+START_BANK offset and payload length, and as many segments as it has (one
+exactly for the banks mmap mode yields as memoryviews), and `read_bank` at
+the offsets of a sample of banks, including all the split ones, must return
+those banks. Both are checked on the plain copy, in mmap mode, and on the
+given file.
+
+Usage:
+    python test_dst_file.py <dst_file> [<dst_file> ...] [--seed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import contextlib
+import gzip
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from dst_awkward.dst_io import BLOCK_LEN, DSTFile
+
+# Bank starts seeked to per file
+SEEKS = 20
+
+# Banks compared after each seek
+RUN = 5
+
+# Queue sizes of the read-ahead thread
+READAHEADS = (1, 4)
+
+# Banks read before breaking out of banks()
+BREAKS = (0, 1, 50)
+
+# Seconds a stopped read-ahead thread may take to exit
+STOP_TIMEOUT = 5.0
+
+# Banks read back with read_bank per file, besides the split ones
+READ_BACK = 30
+
+# Bytes left of the last block in the truncated copies
+TRUNCATIONS = (1, 6, BLOCK_LEN // 2, BLOCK_LEN - 1)
+
+
+def _contents(filename: str) -> bytes:
+    opener = gzip.open if filename.endswith(".gz") else bz2.open if filename.endswith(".bz2") else open
+    with opener(filename, "rb") as f:
+        return f.read()
+
+
+def _read(dst: DSTFile, limit=None, wanted=None) -> tuple[list, list]:
+    """(bank_id, version, payload bytes) of the banks read, and their START_BANK positions."""
+    banks, positions = [], []
+    for bank_id, ver, raw_bytes in dst.banks(wanted=wanted):
+        banks.append((bank_id, ver, bytes(raw_bytes)))
+        positions.append((dst.bank_block, dst.bank_pos))
+        if limit is not None and len(banks) >= limit:
+            break
+    return banks, positions
+
+
+def _read_file(path: str, **options) -> tuple[list, str]:
+    """Banks of `path` and the warnings printed while reading it."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out), DSTFile(path, **options) as dst:
+        banks, _ = _read(dst)
+    return banks, out.getvalue()
+
+
+def check_mmap(path: str, expected: list, positions: list, rng: random.Random) -> int:
+    bad = 0
+    with DSTFile(path, use_mmap=True) as dst:
+        got = []
+        views = 0
+        for bank_id, ver, raw_bytes in dst.banks():
+            got.append((bank_id, ver, bytes(raw_bytes)))
+            views += isinstance(raw_bytes, memoryview)
+    ok = got == expected and views > 0
+    print(f"  mmap read          {len(got):6d} banks  {views:6d} memoryviews  {'ok' if ok else 'MISMATCH'}")
+    bad += not ok
+
+    starts = rng.sample(range(len(positions)), min(SEEKS, len(positions)))
+    seek_bad = 0
+    with DSTFile(path, use_mmap=True) as dst:
+        for k in starts:
+            dst.seek(*positions[k])
+            got, _ = _read(dst, limit=RUN)
+            seek_bad += got != expected[k : k + RUN]
+    print(f"  mmap seeks         {len(starts):6d} seeks  {'ok' if not seek_bad else f'{seek_bad} MISMATCHES'}")
+    return bad + seek_bad
+
+
+def check_truncated(path: str, data: bytes, expected: list) -> int:
+    bad = 0
+    n_blocks = len(data) // BLOCK_LEN
+    truncated = os.path.join(os.path.dirname(path), "truncated.dst")
+    for keep in TRUNCATIONS:
+        with open(truncated, "wb") as f:
+            f.write(data[: (n_blocks - 1) * BLOCK_LEN + keep])
+        plain, plain_warnings = _read_file(truncated)
+        got, warnings = _read_file(truncated, use_mmap=True)
+        ok = (got == plain and warnings == plain_warnings and got == expected[: len(got)]
+              and "Last block incomplete" in warnings)
+        print(f"  mmap, last block {keep:5d} bytes  {len(got):6d} banks  {'ok' if ok else 'MISMATCH'}")
+        bad += not ok
+    os.remove(truncated)
+    return bad
+
+
+def check_close(path: str, expected: list) -> int:
+    # Banks still referenced when the file is closed keep the mapping alive
+    dst = DSTFile(path, use_mmap=True)
+    kept = list(dst.banks())
+    dst.close()
+    ok = [(bank_id, ver, bytes(raw_bytes)) for bank_id, ver, raw_bytes in kept] == expected
+    del kept
+    print(f"  mmap, closed under yielded banks       {'ok' if ok else 'MISMATCH'}")
+    return not ok
+
+
+def _stopped(thread: threading.Thread) -> bool:
+    thread.join(STOP_TIMEOUT)
+    return not thread.is_alive()
+
+
+def check_readahead(path: str, expected: list, positions: list, rng: random.Random) -> int:
+    bad = 0
+    name = os.path.basename(path)
+    starts = rng.sample(range(len(positions)), min(SEEKS, len(positions)))
+    for readahead in READAHEADS:
+        got, _ = _read_file(path, readahead=readahead)
+        seek_bad = 0
+        with DSTFile(path, readahead=readahead) as dst:
+            for k in starts:
+                dst.seek(*positions[k])
+                banks, _ = _read(dst, limit=RUN)
+                seek_bad += banks != expected[k : k + RUN]
+        ok = got == expected and not seek_bad
+        print(f"  {name}, readahead {readahead}  {len(got):6d} banks  {len(starts):3d} seeks  "
+              f"{'ok' if ok else 'MISMATCH'}")
+        bad += not ok
+
+        for limit in BREAKS:
+            with DSTFile(path, readahead=readahead) as dst:
+                reader = dst._reader
+                banks = []
+                for bank_id, ver, raw_bytes in dst.banks():
+                    if len(banks) >= limit:
+                        break
+                    banks.append((bank_id, ver, bytes(raw_bytes)))
+                # Let the thread fill the queue and block on it
+                time.sleep(0.05)
+            ok = banks == expected[:limit] and _stopped(reader) and dst._reader is None
+            print(f"  {name}, readahead {readahead}, break after {limit:3d} banks  "
+                  f"{'ok' if ok else 'THREAD NOT STOPPED' if reader.is_alive() else 'MISMATCH'}")
+            bad += not ok
+    return bad
+
+
+def _wanted_sets(expected: list, rng: random.Random) -> list[set]:
+    counts = Counter(bank_id for bank_id, _, _ in expected)
+    largest = max(expected, key=lambda bank: len(bank[2]))[0]
+    common = counts.most_common(1)[0][0]
+    several = set(rng.sample(sorted(counts), min(3, len(counts))))
+    return [{common}, {largest}, several, {max(counts) + 1}, set()]
+
+
+def check_wanted(path: str, expected: list, positions: list, rng: random.Random) -> int:
+    bad = 0
+    for wanted in _wanted_sets(expected, rng):
+        keep = [k for k, (bank_id, _, _) in enumerate(expected) if bank_id in wanted]
+        want = ([expected[k] for k in keep], [positions[k] for k in keep])
+        results = []
+        for options in ({}, {"use_mmap": True}, {"readahead": 4}):
+            with DSTFile(path, **options) as dst:
+                results.append(_read(dst, wanted=wanted) == want)
+        label = ",".join(map(str, sorted(wanted))) or "none"
+        print(f"  wanted {label:28s} {len(keep):6d} banks  {'ok' if all(results) else 'MISMATCH'}")
+        bad += not all(results)
+    return bad
+
+
+def _single_segment(path: str) -> list[bool]:
+    """Whether each bank of the plain file `path` is stored in one segment."""
+    with DSTFile(path, use_mmap=True) as dst:
+        return [isinstance(raw_bytes, memoryview) for _, _, raw_bytes in dst.banks()]
+
+
+def check_scan(path: str, expected: list, positions: list, single: list, rng: random.Random,
+               **options) -> int:
+    with DSTFile(path, **options) as dst:
+        scanned = list(dst.scan())
+    ok = (len(scanned) == len(expected)
+          and all(header[:4] == (bank_id, ver, block * BLOCK_LEN + pos, len(raw_bytes))
+                  and (header[4] == 1) == one
+                  for header, (bank_id, ver, raw_bytes), (block, pos), one
+                  in zip(scanned, expected, positions, single)))
+
+    split = [k for k, one in enumerate(single) if not one]
+    sample = sorted(set(split) | set(rng.sample(range(len(expected)), min(READ_BACK, len(expected)))))
+    read_bad = 0
+    with DSTFile(path, **options) as dst:
+        for k in sample:
+            bank_id, ver, raw_bytes = dst.read_bank(scanned[k][2])
+            read_bad += (bank_id, ver, bytes(raw_bytes)) != expected[k]
+    label = f"{os.path.basename(path)}{', mmap' if options else ''}"
+    print(f"  scan {label:24s} {len(scanned):6d} banks  {len(split):4d} split  "
+          f"{'ok' if ok else 'MISMATCH'}; read_bank {len(sample):4d}  "
+          f"{'ok' if not read_bad else f'{read_bad} MISMATCHES'}")
+    return (not ok) + read_bad
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check the DSTFile reading modes against a plain read.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    p.add_argument("--seed", type=int, default=0, help="Seed for the banks seeked to")
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for filename in args.dst_files:
+            data = _contents(filename)
+            path = os.path.join(tmp, "plain.dst")
+            with open(path, "wb") as f:
+                f.write(data)
+            with DSTFile(path) as dst:
+                expected, positions = _read(dst)
+            print(f"{filename}: {len(expected)} banks in {len(data) // BLOCK_LEN} blocks")
+            if not expected:
+                raise SystemExit(f"No banks found in {filename!r}")
+
+            failures += check_mmap(path, expected, positions, rng)
+            failures += check_truncated(path, data, expected)
+            failures += check_close(path, expected)
+            failures += check_readahead(path, expected, positions, rng)
+            failures += check_wanted(path, expected, positions, rng)
+            single = _single_segment(path)
+            failures += check_scan(path, expected, positions, single, rng)
+            failures += check_scan(path, expected, positions, single, rng, use_mmap=True)
+            if filename.endswith((".gz", ".bz2")):
+                failures += check_readahead(filename, expected, positions, rng)
+                failures += check_scan(filename, expected, positions, single, rng)
+
+    if failures:
+        raise SystemExit(f"{failures} DSTFile checks failed")
+    print("All DSTFile reading modes agree with a plain read.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Parity check: `DSTProcessor.events_to_awkward` vs. `ak.Array` of the events.
+
+`dst-convert` keeps the banks of each event as payloads
+(`process_file(..., raw=True)`) and parses each bank type in one
+`BankReader.parse_many` batch. For a few processor configurations (all banks,
+a bank selection, field projection, cuts, the sparse fit layout, a limit),
+checks that the array it builds equals `ak.Array` of the events
+`process_file` yields when parsing every bank on the way, and that it
+survives a Parquet round trip unchanged.
+
+Usage:
+    python test_events_to_awkward.py <dst_file> [<dst_file> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import awkward as ak
+
+from dst_awkward.dst_events_to_awkward import DSTProcessor
+
+from parity import plain
+
+# Label -> (DSTProcessor options, process_file options)
+CONFIGS = {
+    "all banks": ({}, {}),
+    "rusdraw,fdplane,hcbin": ({"get_banks": ["rusdraw", "fdplane", "hcbin"], "all_banks": False}, {}),
+    "fields rusdraw.nofwf,yymmdd": ({"fields": {"rusdraw": ["nofwf", "yymmdd"]}}, {}),
+    "cut rusdraw.nofwf >= 2": ({"cuts": ["rusdraw.nofwf >= 2"]}, {}),
+    "sparse fits": ({"sparse_fits": True}, {}),
+    "limit 7": ({}, {"limit": 7}),
+}
+
+
+def _events(filename: str, options: dict, file_options: dict, raw: bool) -> ak.Array:
+    processor = DSTProcessor(verbose=False, **options)
+    # Banks that fail to parse are reported by both reads
+    with contextlib.redirect_stdout(io.StringIO()):
+        events = list(processor.process_file(filename, raw=raw, **file_options))
+        if raw:
+            return processor.events_to_awkward(events)
+        return ak.Array(events)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check events_to_awkward against ak.Array of the events.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    args = p.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet = os.path.join(tmp, "events.parquet")
+        for filename in args.dst_files:
+            print(f"{filename}:")
+            for label, (options, file_options) in CONFIGS.items():
+                expected = plain(_events(filename, options, file_options, raw=False))
+                got = _events(filename, options, file_options, raw=True)
+                ak.to_parquet(got, parquet)
+                ok = plain(got) == expected and plain(ak.from_parquet(parquet)) == expected
+                print(f"  {label:32s} {len(got):6d} events  {'ok' if ok else 'MISMATCH'}")
+                failures += not ok
+
+    if failures:
+        raise SystemExit(f"{failures} configurations differ from ak.Array of the events")
+    print("All event arrays identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Parity check: the 16-fit bank readers vs. the original per-fit readers.
+
+PRFC, HCBIN and HCTIM used to be read by loops over their fits that decoded
+every value with its own `BufferReader` call; those readers are kept below
+as the reference. For every such bank in the given DST files, checks that
+`BankReader`
+
+  - ends at the same cursor,
+  - has the reference's fields in the same order, plus the validity masks
+    of PRFC and HCTIM (`profile_valid`, `geometry_valid`),
+  - agrees with the reference on every value it read; the fits it left None
+    hold None, NaN (floats) or 0 (integers), and the validity mask is set for
+    exactly the fits with a decoded block,
+  - gives the same records through `parse_many` as through `parse_buffer`.
+
+Usage:
+    python test_fit_readers.py <dst_file> [<dst_file> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from dst_awkward.conditional_bank_utils import (
+    MAXFIT, BufferReader, decode_mask_msb_first, fit_empty_arrays, fit_list, fit_zeros,
+)
+from dst_awkward.dst_reader import BankReader
+
+from parity import plain, read_banks, report
+
+SUCCESS = 0
+
+# Profile parameters of a PRFC fit, in file order
+PRFC_PROFILE = [prefix + quantity for quantity in ("szmx", "xm", "x0", "lambda", "eng")
+                for prefix in ("", "d", "r", "l", "t")]
+PRFC_BINS = ("dep", "gm", "scin", "rayl", "aero", "crnk", "sigmc", "sig")
+PRFC_MAXMEL = 10
+HCBIN_BINS = ("bvx", "bvy", "bvz", "bsz", "sig", "sigerr", "cfc")
+HCTIM_SCALARS = [bound + q for q in ("chi2", "rp", "psi", "the", "phi") for bound in "mrl"]
+HCTIM_VECTORS = [bound + q for q in ("tkv", "rpv", "rpuv", "shwn", "core") for bound in "mrl"]
+HCTIM_TUBE_INTS = ("tube", "tubemir", "ig")
+HCTIM_TUBE_FLOATS = ("time", "timefit", "thetb", "sgmt", "asx", "asy", "asz")
+
+
+def reference_prfc(buffer: bytes) -> tuple[dict, int]:
+    """The original PRFC reader (prfc_bank_to_common_ in prfc_dst.c)."""
+    reader = BufferReader(buffer, 8)
+    data = {name: reader.read_i2() for name in ("pflinfo_mask", "bininfo_mask", "mtxinfo_mask")}
+    pflinfo, bininfo, mtxinfo = (decode_mask_msb_first(data[name]) for name in list(data))
+    data.update(pflinfo=pflinfo, bininfo=bininfo, mtxinfo=mtxinfo)
+
+    profile = {name: fit_list() for name in ("failmode", *PRFC_PROFILE, "traj_source", "errstat", "ndf", "chi2")}
+    for i in range(MAXFIT):
+        if not pflinfo[i]:
+            continue
+        profile["failmode"][i] = reader.read_i4()
+        if profile["failmode"][i] != SUCCESS:
+            continue
+        for name in PRFC_PROFILE:
+            profile[name][i] = reader.read_f8()
+        for name in ("traj_source", "errstat", "ndf"):
+            profile[name][i] = reader.read_i4()
+        profile["chi2"][i] = reader.read_f8()
+    data.update(profile)
+
+    bins = {"nbin": fit_zeros(), **{name: fit_empty_arrays(reader.f8) for name in PRFC_BINS},
+            "ig": fit_empty_arrays(reader.i2)}
+    for i in range(MAXFIT):
+        if not bininfo[i]:
+            continue
+        nb = bins["nbin"][i] = reader.read_i2()
+        for name in PRFC_BINS:
+            bins[name][i] = reader.read_f8_array(nb)
+        bins["ig"][i] = reader.read_i2_array(nb)
+    data.update(bins)
+
+    matrix = {"nel": fit_zeros(), "mor": fit_zeros(), "mxel": fit_empty_arrays(reader.f8)}
+    for i in range(MAXFIT):
+        if not mtxinfo[i]:
+            continue
+        matrix["nel"][i] = reader.read_i2()
+        matrix["mor"][i] = reader.read_i2()
+        matrix["mxel"][i] = reader.read_f8_array(min(matrix["nel"][i], PRFC_MAXMEL))
+    data.update(matrix)
+    return data, reader.cursor
+
+
+def reference_hcbin(buffer: bytes) -> tuple[dict, int]:
+    """The original HCBIN reader (hcbin_bank_to_common_ in hcbin_dst.c)."""
+    reader = BufferReader(buffer, 8)
+    data = {"bininfo_mask": reader.read_i2()}
+    bininfo = data["bininfo"] = decode_mask_msb_first(data["bininfo_mask"])
+
+    fits = {name: fit_list() for name in ("jday", "jsec", "msec", "failmode")}
+    fits["nbin"] = fit_zeros()
+    fits.update({name: fit_empty_arrays(reader.f8) for name in HCBIN_BINS})
+    fits["ig"] = fit_empty_arrays(reader.i4)
+    for i in range(MAXFIT):
+        if not bininfo[i]:
+            continue
+        for name in ("jday", "jsec", "msec", "failmode"):
+            fits[name][i] = reader.read_i4()
+        if fits["failmode"][i] != SUCCESS:
+            continue
+        nb = fits["nbin"][i] = reader.read_i2()
+        for name in HCBIN_BINS:
+            fits[name][i] = reader.read_f8_array(nb)
+        fits["ig"][i] = reader.read_i4_array(nb)
+    data.update(fits)
+    return data, reader.cursor
+
+
+def reference_hctim(buffer: bytes) -> tuple[dict, int]:
+    """The original HCTIM reader (hctim_bank_to_common_ in hctim_dst.c)."""
+    reader = BufferReader(buffer, 8)
+    data = {"timinfo_mask": reader.read_i2()}
+    timinfo = data["timinfo"] = decode_mask_msb_first(data["timinfo_mask"])
+
+    fits = {name: fit_list() for name in ("jday", "jsec", "msec", "failmode", *HCTIM_SCALARS, *HCTIM_VECTORS)}
+    fits["nmir"] = fit_zeros()
+    fits.update(mir=fit_empty_arrays(reader.i4), mirntube=fit_empty_arrays(reader.i4), ntube=fit_zeros())
+    fits.update({name: fit_empty_arrays(reader.i4) for name in HCTIM_TUBE_INTS})
+    fits.update({name: fit_empty_arrays(reader.f8) for name in HCTIM_TUBE_FLOATS})
+    for i in range(MAXFIT):
+        if not timinfo[i]:
+            continue
+        for name in ("jday", "jsec", "msec", "failmode"):
+            fits[name][i] = reader.read_i4()
+        if fits["failmode"][i] != SUCCESS:
+            continue
+        for name in HCTIM_SCALARS:
+            fits[name][i] = reader.read_f8()
+        for name in HCTIM_VECTORS:
+            fits[name][i] = reader.read_f8_array(3)
+        nm = fits["nmir"][i] = reader.read_i2()
+        for name in ("mir", "mirntube"):
+            fits[name][i] = reader.read_i2_array(nm).astype(np.int32)
+        nt = fits["ntube"][i] = reader.read_i2()
+        for name in HCTIM_TUBE_INTS:
+            fits[name][i] = reader.read_i2_array(nt).astype(np.int32)
+        for name in HCTIM_TUBE_FLOATS:
+            fits[name][i] = reader.read_f8_array(nt)
+    data.update(fits)
+    return data, reader.cursor
+
+
+# Bank name -> (reference reader, {validity mask: a field the reference leaves None without a block})
+REFERENCES = {
+    "prfc": (reference_prfc, {"profile_valid": "chi2"}),
+    "hcbin": (reference_hcbin, {}),
+    "hctim": (reference_hctim, {"geometry_valid": "mchi2"}),
+}
+
+
+def _is_fill(value) -> bool:
+    if isinstance(value, list):
+        return all(_is_fill(v) for v in value)
+    return value is None or value == 0 or value == "nan"
+
+
+def _agrees(expected: dict, data: dict, valid: dict) -> bool:
+    if [name for name in data if name in expected] != list(expected):
+        return False
+    if [name for name in data if name not in expected] != list(valid):
+        return False
+    for name, value in expected.items():
+        value, got = plain(value), plain(data[name])
+        if isinstance(value, list) and len(value) == MAXFIT:
+            if len(got) != MAXFIT or any(not _is_fill(have) if want is None else have != want
+                                         for want, have in zip(value, got)):
+                return False
+        elif got != value:
+            return False
+    return all(plain(data[name]) == [value is not None for value in expected[witness]]
+               for name, witness in valid.items())
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check the 16-fit bank readers against the original ones.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    args = p.parse_args()
+
+    checked = Counter()
+    failures = Counter()
+    for name, buffers in read_banks(args.dst_files, REFERENCES).items():
+        reference, valid = REFERENCES[name]
+        reader = BankReader(name)
+        parsed = []
+        for raw_bytes in buffers:
+            # Well-formed banks only
+            try:
+                expected, cursor = reference(raw_bytes)
+            except Exception:
+                continue
+            data, got_cursor = reader.parse_buffer(raw_bytes)
+            parsed.append((raw_bytes, data))
+            checked[name] += 1
+            if got_cursor != cursor or not _agrees(expected, data, valid):
+                failures[name] += 1
+
+        if parsed:
+            records = reader.parse_many([raw_bytes for raw_bytes, _ in parsed])
+            if plain(records) != [plain(data) for _, data in parsed]:
+                print(f"  {name}: parse_many differs from parse_buffer")
+                failures[name] += 1
+
+    report(checked, failures, REFERENCES)
+
+    if not checked:
+        raise SystemExit(f"No {'/'.join(name.upper() for name in REFERENCES)} banks found")
+    if failures:
+        raise SystemExit(f"{sum(failures.values())} banks differ from the original readers")
+    print(f"All {sum(checked.values())} banks agree with the original readers.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Parity check: gzip checkpoint index vs. `gzip.open`.
+
+For each given DST file, writes its (uncompressed) contents to a temporary
+multi-member .gz file, builds a `GzipIndex` with a small span, and checks
+
+  - that reads after seeks to every checkpoint, to offsets around them and
+    around the member boundaries, and to random offsets (in random order,
+    backwards too) return the same bytes as `gzip.open(...).seek/read`,
+  - that `DSTFile` opens the file through the index and yields the same banks
+    as without it,
+  - that an index that does not match the file (built from another file,
+    older format, unreadable) is ignored, and `DSTFile` falls back to gzip.
+
+Usage:
+    python test_gzip_index.py <dst_file> [<dst_file> ...] [--seed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import gzip
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from dst_awkward.dst_io import DSTFile
+from dst_awkward.gzip_index import (
+    GZIP_INDEX_FORMAT, IndexedGzipFile, build_gzip_index, gzip_index_path, open_indexed_gzip,
+)
+
+# Uncompressed bytes between checkpoints: small, to get many of them
+SPAN = 1 << 16
+
+# Members of the test file and their compression levels
+LEVELS = (6, 1, 9)
+
+# Bytes read after each seek
+READ = 5000
+
+
+def _contents(filename: str) -> bytes:
+    opener = gzip.open if filename.endswith(".gz") else bz2.open if filename.endswith(".bz2") else open
+    with opener(filename, "rb") as f:
+        return f.read()
+
+
+def _write_members(path: str, data: bytes, levels=LEVELS) -> list[int]:
+    """Write `data` as one gzip member per level; returns the member boundaries."""
+    bounds = [len(data) * i // len(levels) for i in range(len(levels) + 1)]
+    with open(path, "wb") as f:
+        for level, lo, hi in zip(levels, bounds, bounds[1:]):
+            f.write(gzip.compress(data[lo:hi], compresslevel=level))
+    return bounds[1:-1]
+
+
+def _banks(path: str) -> list:
+    with DSTFile(path) as dst:
+        return [(bank_id, ver, bytes(raw)) for bank_id, ver, raw in dst.banks()]
+
+
+def _opened_with(path: str) -> str:
+    with DSTFile(path) as dst:
+        return type(dst.f).__name__
+
+
+def check_seeks(path: str, data: bytes, boundaries: list[int], rng: random.Random) -> int:
+    index = build_gzip_index(path, span=SPAN)
+    if len(index.out_offset) < 2:
+        print(f"  only {len(index.out_offset)} checkpoints, file too small")
+        return 1
+
+    offsets = {0, len(data), len(data) - 1}
+    for point in [*index.out_offset.tolist(), *boundaries]:
+        offsets.update(o for o in (point - 1, point, point + 1) if 0 <= o <= len(data))
+    offsets.update(rng.randrange(len(data)) for _ in range(50))
+    offsets = list(offsets)
+    rng.shuffle(offsets)  # Backward seeks too
+
+    # gzip.open seeks backwards by inflating from the start: read it in order
+    expected = {}
+    with gzip.open(path, "rb") as plain:
+        for offset in sorted(offsets):
+            plain.seek(offset)
+            expected[offset] = plain.read(READ)
+
+    bad = 0
+    with IndexedGzipFile(path, index) as indexed:
+        if indexed.read() != data:
+            print("  sequential read differs")
+            bad += 1
+        for offset in offsets:
+            indexed.seek(offset)
+            got = indexed.read(READ)
+            if got != expected[offset] or got != data[offset : offset + READ] or indexed.tell() != offset + len(got):
+                bad += 1
+    print(f"  {len(index.out_offset):4d} checkpoints  {len(offsets):4d} seeks  "
+          f"{'ok' if not bad else f'{bad} MISMATCHES'}")
+    return bad
+
+
+def check_fallback(path: str, data: bytes) -> int:
+    expected = _banks(path)
+    index = build_gzip_index(path, span=SPAN)
+    index_file = gzip_index_path(path)
+    bad = 0
+
+    def expect(label, opened_with, matches):
+        nonlocal bad
+        got = _opened_with(path)
+        ok = got == opened_with and _banks(path) == expected and matches
+        print(f"  {label:36s} {got:16s} {'ok' if ok else 'MISMATCH'}")
+        bad += not ok
+
+    index.save(index_file)
+    expect("matching index", "IndexedGzipFile", True)
+
+    # Same contents compressed differently: the checkpoints would be garbage
+    _write_members(path, data, levels=(1,))
+    expect("index of another compression", "GzipFile", open_indexed_gzip(path, index) is None)
+
+    # Index from an older release
+    build_gzip_index(path, span=SPAN).save(index_file)
+    with np.load(index_file) as npz:
+        arrays = dict(npz)
+    arrays["format"] = np.int32(GZIP_INDEX_FORMAT - 1)
+    with open(index_file, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    expect("older index format", "GzipFile", True)
+
+    with open(index_file, "wb") as f:
+        f.write(b"not an index")
+    expect("unreadable index", "GzipFile", True)
+
+    os.remove(index_file)
+    return bad
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check the gzip checkpoint index against gzip.open.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    p.add_argument("--seed", type=int, default=0, help="Seed for the random seek offsets")
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for filename in args.dst_files:
+            data = _contents(filename)
+            path = os.path.join(tmp, "members.dst.gz")
+            boundaries = _write_members(path, data)
+            print(f"{filename}: {len(data)} bytes in {len(LEVELS)} gzip members")
+            failures += check_seeks(path, data, boundaries, rng)
+            failures += check_fallback(path, data)
+
+    if failures:
+        raise SystemExit(f"{failures} gzip index checks failed")
+    print("All gzip index reads agree with gzip.open.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,8 @@
 Ad-hoc PRFC reader smoke test.
 
 This repo's `tests/` directory already contains runnable scripts (not pytest-style).
-This script extracts PRFC (bank_id=30002) from a DST stream and runs the standalone
-PRFC parser in `dst_awkward.prfc_reader`.
+This script extracts PRFC (bank_id=30002) from a DST stream and parses it with
+`BankReader("prfc")`.
 """
 
 from __future__ import annotations
@@ -12,7 +12,7 @@ from __future__ import annotations
 import argparse
 
 from dst_awkward.dst_io import DSTFile
-from dst_awkward.prfc_reader import parse_prfc_bank
+from dst_awkward.dst_reader import BankReader
 
 
 PRFC_BANKID = 30002
@@ -81,6 +81,7 @@ def main() -> None:
     )
     args = p.parse_args()
 
+    reader = BankReader("prfc")
     found = 0
     with DSTFile(args.dst_file) as dst:
         for bank_id, ver, raw_bytes in dst.banks():
@@ -89,9 +90,9 @@ def main() -> None:
 
             found += 1
             print(f"\n--- PRFC bank #{found} (version {ver}) ---")
-            res = parse_prfc_bank(raw_bytes)
-            summarize_prfc(res.data, fit_indices=args.fit)
-            print(f"  parsed_bytes: {res.cursor} / {len(raw_bytes)}")
+            data, cursor = reader.parse_buffer(raw_bytes)
+            summarize_prfc(data, fit_indices=args.fit)
+            print(f"  parsed_bytes: {cursor} / {len(raw_bytes)}")
 
             if not args.all:
                 break
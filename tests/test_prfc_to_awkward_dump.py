@@ -2,9 +2,8 @@
 """
 Build an Awkward Array from PRFC banks and dump a human-readable summary.
 
-This does NOT integrate PRFC into the generic BankReader yet; it uses the standalone
-PRFC parser (`dst_awkward.prfc_reader.parse_prfc_bank`) and then wraps its output
-into an event dict suitable for `ak.Array`.
+This parses PRFC with `BankReader("prfc")` and then wraps its output into an
+event dict suitable for `ak.Array`.
 """
 
 from __future__ import annotations
@@ -16,7 +15,7 @@ from typing import Any
 import awkward as ak
 
 from dst_awkward.dst_io import DSTFile
-from dst_awkward.prfc_reader import parse_prfc_bank
+from dst_awkward.dst_reader import BankReader
 
 
 PRFC_BANKID = 30002
@@ -60,6 +59,7 @@ def main() -> None:
     event_list: list[dict[str, Any]] = []
     current_event: dict[str, Any] = {}
     event_count = 0
+    reader = BankReader("prfc")
 
     with DSTFile(args.dst_file) as dst:
         for bank_id, ver, raw_bytes in dst.banks():
@@ -75,10 +75,9 @@ def main() -> None:
                 if args.limit is not None and event_count >= args.limit:
                     break
 
-            res = parse_prfc_bank(raw_bytes)
-            prfc = res.data
+            prfc, cursor = reader.parse_buffer(raw_bytes)
             prfc["_version"] = ver
-            prfc["_parsed_bytes"] = res.cursor
+            prfc["_parsed_bytes"] = cursor
             prfc["_raw_bytes"] = len(raw_bytes)
             current_event["prfc"] = prfc
 
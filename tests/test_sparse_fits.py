@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Parity check: sparse fit layout vs. the dense 16-fit layout.
+
+For every PRFC, HCBIN and HCTIM bank in the given DST files, parses the bank
+with `BankReader(name)` and `BankReader(name, sparse_fits=True)` and checks
+that `dense_fits` of the sparse result agrees with the dense result on the
+fits in `fit_index` (and is None elsewhere), for single banks and for a
+`parse_many` batch.
+
+Usage:
+    python test_sparse_fits.py <dst_file> [<dst_file> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+
+from dst_awkward.conditional_bank_utils import MAXFIT, dense_fits
+from dst_awkward.dst_reader import BankReader
+
+from parity import plain, read_banks, report
+
+FIT_BANKS = ("prfc", "hcbin", "hctim")
+
+
+def _agrees(dense: dict, view: dict, fits: list[int]) -> bool:
+    if list(view) != list(dense):
+        return False
+    for name, value in dense.items():
+        value, got = plain(value), plain(view[name])
+        if isinstance(value, list) and len(value) == MAXFIT:
+            if any(got[i] != value[i] for i in fits):
+                return False
+            if any(got[i] is not None for i in range(MAXFIT) if i not in fits):
+                return False
+        elif got != value:
+            return False
+    return True
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check the sparse fit layout against the dense one.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    args = p.parse_args()
+
+    readers = {name: (BankReader(name), BankReader(name, sparse_fits=True)) for name in FIT_BANKS}
+
+    buffers = read_banks(args.dst_files, FIT_BANKS)
+
+    checked = Counter()
+    failures = Counter()
+    for name in FIT_BANKS:
+        dense_reader, sparse_reader = readers[name]
+        parsed = []
+        for raw_bytes in buffers[name]:
+            # Well-formed banks only
+            try:
+                dense, cursor = dense_reader.parse_buffer(raw_bytes)
+            except Exception:
+                continue
+            sparse, sparse_cursor = sparse_reader.parse_buffer(raw_bytes)
+            parsed.append((raw_bytes, sparse))
+            checked[name] += 1
+            fits = [int(i) for i in sparse["fit_index"]]
+            if sparse_cursor != cursor or not _agrees(dense, dense_fits(sparse), fits):
+                failures[name] += 1
+
+        if parsed:
+            batch = dense_fits(sparse_reader.parse_many([raw_bytes for raw_bytes, _ in parsed]))
+            if plain(batch) != [plain(dense_fits(sparse)) for _, sparse in parsed]:
+                print(f"MISMATCH in {name}: dense_fits of parse_many differs")
+                failures[name] += 1
+
+    report(checked, failures, FIT_BANKS)
+
+    if not checked:
+        raise SystemExit("No PRFC/HCBIN/HCTIM banks found")
+    if failures:
+        raise SystemExit(f"{sum(failures.values())} sparse reads differ from dense reads")
+    print(f"All {sum(checked.values())} sparse reads agree with the dense layout.")
+
+
+if __name__ == "__main__":
+    main()
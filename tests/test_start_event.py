@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Parity check: `process_file(start_event=k)` vs. skipping k events of a full read.
+
+Copies each DST file to a temporary directory, indexes the copy with
+`build_index`, and for a few bank selections (all banks, and restricted sets
+as with `dst-convert --banks`) checks that the events yielded after seeking
+to event k are events k, k+1, ... of a read from the start with the same
+selection.
+
+Usage:
+    python test_start_event.py <dst_file> [<dst_file> ...] [--seed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from dst_awkward.dst_events_to_awkward import DSTProcessor
+from dst_awkward.dst_index import build_index, index_path
+
+from parity import same
+
+# None: every bank; otherwise the bank names read
+BANK_SETS = [
+    None,
+    ["rusdraw"],
+    ["rusdraw", "fdplane"],
+    ["hcbin", "talex00", "start"],
+]
+
+# Events yielded after each seek
+RUN = 3
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check seeking to an event against a full read.")
+    p.add_argument("dst_files", nargs="+", help="Paths to .dst, .dst.gz, or .dst.bz2 files")
+    p.add_argument("--seed", type=int, default=0, help="Seed for the events seeked to")
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for filename in args.dst_files:
+            copy = os.path.join(tmp, os.path.basename(filename))
+            shutil.copyfile(filename, copy)
+            build_index(copy).save(index_path(copy))
+            print(f"{filename}:")
+
+            for banks in BANK_SETS:
+                def processor():
+                    return DSTProcessor(get_banks=banks, all_banks=banks is None, verbose=False)
+
+                events = list(processor().process_file(copy))
+                starts = sorted({1, len(events) // 2, len(events) - 1,
+                                 *rng.sample(range(len(events)), min(5, len(events)))} - {0})
+                bad = 0
+                for start in starts:
+                    got = list(processor().process_file(copy, start_event=start, limit=RUN))
+                    if not same(got, events[start : start + RUN]):
+                        bad += 1
+                label = ",".join(banks) if banks else "all banks"
+                status = "ok" if not bad else f"{bad} MISMATCHES"
+                print(f"  {label:24s} {len(events):6d} events  {len(starts):3d} seeks  {status}")
+                failures += bad
+
+    if failures:
+        raise SystemExit(f"{failures} seeks yield different events than a full read")
+    print("All seeks agree with full reads.")
+
+
+if __name__ == "__main__":
+    main()